@@ -0,0 +1,73 @@
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from dataclasses import dataclass, field
+from functools import cached_property
+
+from config import TOOL_CATALOGUE_TTL
+from executor import fetch_tools
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ToolCatalogue:
+    """A version of the gateway's tool catalogue, with its prompt fragment memoized."""
+    version: str
+    tools: list[dict]
+    checked_at: float = field(default_factory=time.monotonic)
+
+    @cached_property
+    def tools_json(self) -> str:
+        return json.dumps(self.tools)
+
+    @cached_property
+    def tools_by_name(self) -> dict[str, dict]:
+        return {tool["name"]: tool for tool in self.tools}
+
+    @cached_property
+    def _tool_json_by_name(self) -> dict[str, str]:
+        return {tool["name"]: json.dumps(tool) for tool in self.tools}
+
+    def tools_json_for(self, names: list[str]) -> str:
+        """The prompt fragment for a subset of the tools, built from memoized per-tool JSON."""
+        return "[" + ", ".join(self._tool_json_by_name[name] for name in names) + "]"
+
+    def is_fresh(self) -> bool:
+        return time.monotonic() - self.checked_at < TOOL_CATALOGUE_TTL
+
+
+_catalogue: ToolCatalogue | None = None
+_refresh_lock = asyncio.Lock()
+
+
+async def get_catalogue() -> ToolCatalogue:
+    """
+    Returns the cached tool catalogue, revalidating it with the gateway once its TTL
+    has expired. An unchanged catalogue costs a 304 round trip and keeps its memoized
+    `tools_json`; a fresh catalogue is cached without any request at all.
+    """
+    global _catalogue
+    if _catalogue is not None and _catalogue.is_fresh():
+        return _catalogue
+
+    async with _refresh_lock:
+        # Another task may have refreshed it while we were waiting.
+        if _catalogue is not None and _catalogue.is_fresh():
+            return _catalogue
+
+        etag, tools = await fetch_tools(_catalogue.version if _catalogue else None)
+        if tools is None:
+            _catalogue.checked_at = time.monotonic()
+            return _catalogue
+
+        # Gateways that do not send an ETag get a locally computed version.
+        version = etag or hashlib.sha256(json.dumps(tools, sort_keys=True).encode()).hexdigest()
+        if _catalogue is None or _catalogue.version != version:
+            logger.debug(f"Tool catalogue updated to version {version}")
+            _catalogue = ToolCatalogue(version=version, tools=tools)
+        else:
+            _catalogue.checked_at = time.monotonic()
+        return _catalogue
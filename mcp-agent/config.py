@@ -1 +1,46 @@
-GATEWAY_URL = "http://localhost:8000/mcp"
\ No newline at end of file
+GATEWAY_URL = "http://localhost:8000/mcp"
+
+# Connection pool of the shared gateway client (see executor.get_client)
+HTTP_MAX_CONNECTIONS = 100
+HTTP_MAX_KEEPALIVE_CONNECTIONS = 20
+HTTP_KEEPALIVE_EXPIRY = 30.0
+
+# Seconds. The connect timeout is kept short so a down gateway fails fast.
+HTTP_TIMEOUT = 30.0
+HTTP_CONNECT_TIMEOUT = 5.0
+
+# HTTP/2 requires the optional `h2` package (pip install httpx[http2]).
+HTTP2 = False
+
+# Retries with exponential backoff, only for idempotent calls such as tools/list.
+HTTP_RETRIES = 3
+HTTP_RETRY_BACKOFF = 0.2
+
+# Seconds before the cached tool catalogue is revalidated with the gateway.
+TOOL_CATALOGUE_TTL = 30.0
+
+# Only the TOOL_SELECTION_TOP_K tools most relevant to a query are put in the planner
+# prompt. If the best BM25 match scores below TOOL_SELECTION_MIN_SCORE, the whole
+# catalogue is sent instead.
+TOOL_SELECTION_TOP_K = 8
+TOOL_SELECTION_MIN_SCORE = 1.0
+
+# Validated plans are cached per normalized query, so repeated questions skip the LLM.
+# Set PLAN_CACHE_PATH to a SQLite file (e.g. "plan_cache.sqlite3") to keep them across restarts.
+PLAN_CACHE_SIZE = 256
+PLAN_CACHE_TTL = 3600.0
+PLAN_CACHE_PATH = None
+
+# Queries answered at once by `python main.py --batch FILE`.
+BATCH_CONCURRENCY = 16
+
+# Multi-step plans: the most tool calls one plan may contain, and the timeout of each call in seconds.
+MAX_PLAN_STEPS = 10
+TOOL_CALL_TIMEOUT = 30.0
+
+# Send the tool calls of a plan that are ready at the same time as one JSON-RPC batch.
+BATCH_TOOL_CALLS = True
+
+# Stream the planner's LLM answer and act on the plan as soon as its JSON is complete,
+# instead of waiting for the whole completion. The streamed text is shown to the user.
+STREAM_PLANNER = True
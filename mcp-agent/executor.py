@@ -1,25 +1,172 @@
+import asyncio
+import itertools
+import logging
+
 import httpx
-from config import GATEWAY_URL
-
-async def list_tools():
-    async with httpx.AsyncClient() as client:
-        res = await client.post(GATEWAY_URL, json={
-            "jsonrpc": "2.0",
-            "id": 1,
-            "method": "tools/list",
-            "params": {}
-        })
-        return res.json()["result"]["tools"]
+from config import (
+    GATEWAY_URL,
+    HTTP_MAX_CONNECTIONS,
+    HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    HTTP_KEEPALIVE_EXPIRY,
+    HTTP_TIMEOUT,
+    HTTP_CONNECT_TIMEOUT,
+    HTTP2,
+    HTTP_RETRIES,
+    HTTP_RETRY_BACKOFF,
+    TOOL_CALL_TIMEOUT,
+)
+
+logger = logging.getLogger(__name__)
+
+# Status codes worth retrying for idempotent requests
+RETRY_STATUS_CODES = {502, 503, 504}
+
+# Tells the gateway how long a tools/call may take, so it can give up upstream at
+# the same time the agent stops waiting.
+DEADLINE_HEADERS = {"X-Request-Timeout": str(TOOL_CALL_TIMEOUT)}
+
+# One pooled client shared by the planner and executor, so connections to the
+# gateway are kept alive across steps instead of being opened per request.
+_client: httpx.AsyncClient | None = None
+
+# JSON-RPC request ids, unique for the lifetime of the process
+_request_ids = itertools.count(1)
+
+# tools/call messages waiting to be sent together by _flush_batch
+_pending_calls: list[tuple[dict, asyncio.Future]] = []
+# Running _flush_batch tasks, referenced until they finish
+_flush_tasks: set[asyncio.Task] = set()
+
+
+def get_client() -> httpx.AsyncClient:
+    """Returns the shared gateway client, creating it on first use."""
+    global _client
+    if _client is None or _client.is_closed:
+        http2 = HTTP2
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                logger.warning("HTTP2 is enabled but the 'h2' package is not installed. Using HTTP/1.1.")
+                http2 = False
+
+        _client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+            ),
+            timeout=httpx.Timeout(HTTP_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT),
+            http2=http2,
+        )
+    return _client
+
+
+async def close_client():
+    """Closes the shared gateway client and its pooled connections."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+async def _rpc(method: str, params: dict, retries: int = 0, headers: dict | None = None) -> httpx.Response:
+    """Sends a JSON-RPC request to the gateway, retrying transient failures `retries` times."""
+    payload = {
+        "jsonrpc": "2.0",
+        "id": next(_request_ids),
+        "method": method,
+        "params": params
+    }
+
+    for attempt in range(retries + 1):
+        try:
+            res = await get_client().post(GATEWAY_URL, json=payload, headers=headers)
+            if res.status_code not in RETRY_STATUS_CODES or attempt == retries:
+                return res
+            logger.warning(f"Gateway returned {res.status_code} for {method}, retrying")
+        except httpx.TransportError as e:
+            if attempt == retries:
+                raise
+            logger.warning(f"Gateway request {method} failed: {e!r}, retrying")
+
+        await asyncio.sleep(HTTP_RETRY_BACKOFF * 2 ** attempt)
+
+
+async def fetch_tools(etag: str | None = None):
+    """
+    Conditionally fetches the tool catalogue.
+    Returns `(etag, tools)`, where `tools` is None if the catalogue still matches `etag`.
+    """
+    headers = {"If-None-Match": etag} if etag else None
+    res = await _rpc("tools/list", {}, retries=HTTP_RETRIES, headers=headers)
+    if res.status_code == 304:
+        return etag, None
+    return res.headers.get("etag"), res.json()["result"]["tools"]
 
 async def call_tool(tool_name, arguments):
-    async with httpx.AsyncClient() as client:
-        res = await client.post(GATEWAY_URL, json={
-            "jsonrpc": "2.0",
-            "id": 2,
-            "method": "tools/call",
-            "params": {
-                "name": tool_name,
-                "arguments": arguments
-            }
-        })
-        return res.json()["result"]
+    res = await _rpc("tools/call", {
+        "name": tool_name,
+        "arguments": arguments
+    }, headers=DEADLINE_HEADERS)
+    return res.json()["result"]
+
+async def _flush_batch():
+    """
+    Sends the pending tools/call messages as one JSON-RPC batch and resolves their
+    futures. A lone call goes out as a plain request, which the gateway can stream.
+    """
+    calls = _pending_calls[:]
+    _pending_calls.clear()
+
+    try:
+        if len(calls) == 1:
+            res = await get_client().post(GATEWAY_URL, json=calls[0][0], headers=DEADLINE_HEADERS)
+            responses = {calls[0][0]["id"]: res.json()}
+        else:
+            res = await get_client().post(GATEWAY_URL, json=[message for message, _ in calls], headers=DEADLINE_HEADERS)
+            res.raise_for_status()
+            responses = {response.get("id"): response for response in res.json()}
+    except Exception as e:
+        for _, future in calls:
+            if not future.done():
+                future.set_exception(e)
+        return
+
+    for message, future in calls:
+        if future.done():
+            continue  # The caller gave up, e.g. on a timeout
+        response = responses.get(message["id"])
+        if response is None:
+            future.set_exception(RuntimeError("Gateway returned no response for the tool call"))
+        elif "error" in response:
+            future.set_exception(RuntimeError(response["error"]["message"]))
+        else:
+            future.set_result(response["result"])
+
+def _start_flush():
+    task = asyncio.ensure_future(_flush_batch())
+    _flush_tasks.add(task)
+    task.add_done_callback(_flush_tasks.discard)
+
+async def call_tool_batched(tool_name, arguments):
+    """
+    Same as call_tool, but all calls started in the same event loop iteration (e.g.
+    the independent steps of a plan) share one JSON-RPC batch request to the gateway.
+    """
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+    if not _pending_calls:
+        # Runs after every task scheduled for this iteration has queued its call.
+        loop.call_soon(_start_flush)
+
+    _pending_calls.append(({
+        "jsonrpc": "2.0",
+        "id": next(_request_ids),
+        "method": "tools/call",
+        "params": {
+            "name": tool_name,
+            "arguments": arguments
+        }
+    }, future))
+    return await future
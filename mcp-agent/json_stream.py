@@ -0,0 +1,74 @@
+FENCE = "```json"
+
+
+class JsonBlockExtractor:
+    """
+    Finds the JSON value of a fenced ```json block in text that arrives in chunks, as
+    soon as the value's closing bracket arrives, without waiting for the closing fence
+    or anything after it.
+
+    Only the structure is tracked (bracket depth, strings and escapes), so each
+    character is looked at once. Parsing the value is left to json.loads. A block
+    that does not start with an object or array is not recognized; `text` then holds
+    the whole completion for the caller to report.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.start = None  # Index of the value's opening bracket, once found
+        self.position = 0  # Next index to scan
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+        self.finished = False  # The value was found, or the block holds none
+
+    def feed(self, chunk: str) -> str | None:
+        """Adds a chunk of text. Returns the JSON text of the block's value once it is complete."""
+        self.text += chunk
+        if self.finished:
+            return None
+        if self.start is None and not self._find_start():
+            return None
+
+        text = self.text
+        for i in range(self.position, len(text)):
+            char = text[i]
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == "\\":
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+            elif char == '"':
+                self.in_string = True
+            elif char in "{[":
+                self.depth += 1
+            elif char in "}]":
+                self.depth -= 1
+                if self.depth == 0:
+                    self.position = i + 1
+                    self.finished = True
+                    return text[self.start:i + 1]
+        self.position = len(text)
+        return None
+
+    def _find_start(self) -> bool:
+        """Looks for the fence and the bracket opening the value after it."""
+        fence = self.text.find(FENCE, self.position)
+        if fence == -1:
+            # The fence may be split across chunks, so its start is scanned again next time.
+            self.position = max(0, len(self.text) - len(FENCE) + 1)
+            return False
+
+        self.position = fence
+        value_start = fence + len(FENCE)
+        while value_start < len(self.text) and self.text[value_start].isspace():
+            value_start += 1
+        if value_start == len(self.text):
+            return False
+        if self.text[value_start] not in "{[":
+            self.finished = True
+            return False
+        self.start = self.position = value_start
+        return True
@@ -1,10 +1,7 @@
-# from langchain_openai import ChatOpenAI
 from dotenv import load_dotenv
 import os
 import logging
 
-from langchain_google_genai import ChatGoogleGenerativeAI
-
 load_dotenv()
 
 # Set up logging
@@ -13,19 +10,32 @@ logger = logging.getLogger(__name__)
 
 provider = os.getenv("LLM_PROVIDER", "gemini")
 
-LLM_LIST = {
-    "gemini" : ChatGoogleGenerativeAI(
-    model="gemini-2.0-flash",
-    temperature=0,
-    max_tokens=None,
-    timeout=None,
-    max_retries=2,
-    )
-}
 
+# Each factory imports its client library and builds the chat model only when called,
+# so importing this module is cheap and unused providers cost nothing.
+def gemini():
+    from langchain_google_genai import ChatGoogleGenerativeAI
+    return ChatGoogleGenerativeAI(
+        model="gemini-2.0-flash",
+        temperature=0,
+        max_tokens=None,
+        timeout=None,
+        max_retries=2,
+    )
 
-llm = LLM_LIST.get(provider)
+LLM_FACTORIES = {
+    "gemini": gemini,
+}
 
-if llm is None:
-    logger.warning(f"LLM Provider '{provider}' not found in LLM_LIST. Using default model 'openai'.")
-    llm = LLM_LIST["gemini"]
\ No newline at end of file
+_llm = None
+
+def get_llm():
+    """Returns the chat model of LLM_PROVIDER, building it on first use only."""
+    global _llm
+    if _llm is None:
+        factory = LLM_FACTORIES.get(provider)
+        if factory is None:
+            logger.warning(f"LLM Provider '{provider}' not found in LLM_FACTORIES. Using default model 'gemini'.")
+            factory = LLM_FACTORIES["gemini"]
+        _llm = factory()
+    return _llm
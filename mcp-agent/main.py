@@ -1,10 +1,18 @@
+import argparse
 import asyncio
-from langgraph.graph import StateGraph, END
-from planner import plan
-from executor import call_tool
-from typing import TypedDict, Optional
+import json
+import sys
+import time
+from planner import plan, plan_cache
+from executor import call_tool, call_tool_batched, close_client
+from config import BATCH_CONCURRENCY, BATCH_TOOL_CALLS, TOOL_CALL_TIMEOUT
+from steps import run_steps
+from typing import TYPE_CHECKING, TypedDict, Optional
 import logging
 
+if TYPE_CHECKING:
+    from langgraph.types import StreamWriter
+
 
 # Set up logging
 logging.basicConfig(level=logging.DEBUG)
@@ -13,19 +21,36 @@ logger = logging.getLogger(__name__)
 # Define the state schema
 class AgentState(TypedDict):
     user_query: str
-    tool_name: Optional[str]
-    arguments: Optional[dict]
+    steps: Optional[list[dict]]  # see steps.normalize_steps
     output: Optional[any]
 
-async def planner_node(state: AgentState) -> AgentState:
+async def planner_node(state: AgentState, writer: "StreamWriter") -> AgentState:
     logger.debug(f"Entering planner_node with state: {state}")
+    # The LLM's answer goes out on the graph's "custom" stream; without a listener it is dropped.
+    # LangGraph passes `writer` in, as get_stream_writer() fails in async code before Python 3.11.
     try:
-        tool_name, arguments = await plan(state["user_query"])
-        logger.debug(f"Planner selected tool: {tool_name}, arguments: {arguments}")
-        return {"tool_name": tool_name, "arguments": arguments}
+        steps = await plan(state["user_query"], on_token=lambda text: writer({"token": text}))
+        logger.debug(f"Planner selected steps: {steps}")
+        return {"steps": steps}
     except Exception as e:
         logger.error(f"Planner node failed: {str(e)}")
-        return {"output": {"error": f"Planning failed: {str(e)}"}, "tool_name": None, "arguments": None}
+        return {"output": {"error": f"Planning failed: {str(e)}"}, "steps": None}
+
+def format_results(results: list[dict]):
+    """A single call keeps its plain output; several calls are reported one line per step."""
+    if len(results) == 1:
+        result = results[0]
+        return {"error": result["error"]} if "error" in result else result["output"]
+
+    if all("error" in result for result in results):
+        return {"error": "; ".join(f"{r['id']} {r['name']}: {r['error']}" for r in results)}
+
+    lines = []
+    for r in results:
+        arguments = json.dumps(r["arguments"])
+        outcome = f"Error: {r['error']}" if "error" in r else r["output"]
+        lines.append(f"{r['id']} {r['name']}({arguments}): {outcome}")
+    return "\n".join(lines)
 
 async def executor_node(state: AgentState) -> AgentState:
     logger.debug(f"Entering executor_node with state: {state}")
@@ -33,26 +58,25 @@ async def executor_node(state: AgentState) -> AgentState:
         if state.get("output") and isinstance(state["output"], dict) and "error" in state["output"]:
             logger.debug("Skipping execution due to planner error")
             return state  # Skip execution if planner set an error
-        if not state.get("tool_name") or not state.get("arguments"):
+        if not state.get("steps"):
             logger.error("Invalid tool or arguments from planner")
             return {"output": {"error": "Invalid tool or arguments from planner"}}
-        response = await call_tool(state["tool_name"], state["arguments"])
-        
-        logger.debug(f"Executor response: {response}")
-        
-        isError = response["isError"]
-        contents = response["content"]
-        if isError:
-            return {"output": {"error": contents[0]["text"]}}
-        
-        results = [content.get("text", "") for content in contents]
-        
-        return {"output": "".join(results)}
+
+        # Independent steps run concurrently; dependent ones wait for their inputs.
+        caller = call_tool_batched if BATCH_TOOL_CALLS else call_tool
+        results = await run_steps(state["steps"], caller, TOOL_CALL_TIMEOUT)
+        logger.debug(f"Executor results: {results}")
+
+        return {"output": format_results(results)}
     except Exception as e:
         logger.error(f"Executor node failed: {str(e)}")
         return {"output": {"error": f"Execution failed: {str(e)}"}}
 
 def create_graph():
+    # LangGraph is imported here rather than at the top: it takes a large share of the
+    # agent's import time, and --help or an empty batch never builds the graph.
+    from langgraph.graph import StateGraph, END
+
     # Initialize StateGraph with state schema
     builder = StateGraph(AgentState)
     
@@ -69,35 +93,118 @@ def create_graph():
     logger.debug(f"Graph compiled with nodes: {list(graph.nodes.keys())}")
     return graph
 
-async def run_agent(user_query: str):
+_graph = None
+
+def get_graph():
+    """Returns the compiled graph, compiling it on first use only."""
+    global _graph
+    if _graph is None:
+        _graph = create_graph()
+    return _graph
+
+async def answer_query(user_query: str, on_token=None) -> dict:
+    """
+    Runs one query through the graph. Returns `{"output": ...}` or `{"error": ...}`.
+    The planner's LLM answer is passed to `on_token`, if given, as it streams in.
+    """
     if not user_query.strip():
-        print("Error: Empty query provided")
-        return
+        return {"error": "Empty query provided"}
 
-    graph = create_graph()
     try:
-        result = await graph.ainvoke({"user_query": user_query})
-        output = result.get("output")
-        if output is None:
-            print("Error: No output produced")
-        elif isinstance(output, dict) and "error" in output:
-            print(f"Error: {output['error']}")
+        if on_token is None:
+            result = await get_graph().ainvoke({"user_query": user_query})
         else:
-            print("Final Output:", output)
+            result = {}
+            async for mode, chunk in get_graph().astream({"user_query": user_query}, stream_mode=["custom", "values"]):
+                if mode == "custom":
+                    on_token(chunk["token"])
+                else:
+                    result = chunk
     except Exception as e:
-        print(f"Error: Agent execution failed: {str(e)}")
+        return {"error": f"Agent execution failed: {str(e)}"}
+
+    output = result.get("output")
+    if output is None:
+        return {"error": "No output produced"}
+    if isinstance(output, dict) and "error" in output:
+        return {"error": output["error"]}
+    return {"output": output}
+
+async def run_agent(user_query: str):
+    streamed = []
+
+    def show(text: str):
+        streamed.append(text)
+        print(text, end="", flush=True)
+
+    result = await answer_query(user_query, on_token=show)
+    if streamed:
+        print()
+    if "error" in result:
+        print(f"Error: {result['error']}")
+    else:
+        print("Final Output:", result["output"])
+
+async def run_batch(queries: list[str], concurrency: int):
+    """
+    Runs `queries` concurrently, at most `concurrency` at a time, and yields each
+    result as soon as it finishes, tagged with its input index and latency.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run_one(index: int, query: str) -> dict:
+        async with semaphore:
+            start = time.perf_counter()
+            result = await answer_query(query)
+            latency_ms = (time.perf_counter() - start) * 1000
+            return {"index": index, "query": query, **result, "latency_ms": round(latency_ms, 1)}
+
+    tasks = [asyncio.create_task(run_one(i, q)) for i, q in enumerate(queries)]
+    try:
+        for task in asyncio.as_completed(tasks):
+            yield await task
+    finally:
+        for task in tasks:
+            task.cancel()
+
+async def batch_main(path: str, concurrency: int):
+    """Answers one query per line of `path` (or stdin for "-"), printing JSON lines as results arrive."""
+    source = sys.stdin if path == "-" else open(path, encoding="utf-8")
+    with source:
+        queries = [line.strip() for line in source if line.strip()]
+
+    start = time.perf_counter()
+    try:
+        async for result in run_batch(queries, concurrency):
+            print(json.dumps(result, default=str), flush=True)
+    finally:
+        elapsed = time.perf_counter() - start
+        logger.info(f"Answered {len(queries)} queries in {elapsed:.2f}s. Plan cache stats: {plan_cache.stats()}")
+        await close_client()
 
 async def main():
-    while True:
-        try:
-            user_prompt = input("\n\nAsk something (or type 'exit' to quit): ")
-            if user_prompt.lower() == "exit":
-                print("Exiting...")
+    try:
+        while True:
+            try:
+                user_prompt = input("\n\nAsk something (or type 'exit' to quit): ")
+                if user_prompt.lower() == "exit":
+                    print("Exiting...")
+                    break
+                await run_agent(user_prompt)
+            except KeyboardInterrupt:
+                print("\nExiting...")
                 break
-            await run_agent(user_prompt)
-        except KeyboardInterrupt:
-            print("\nExiting...")
-            break
+    finally:
+        logger.info(f"Plan cache stats: {plan_cache.stats()}")
+        await close_client()
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="MCP agent")
+    parser.add_argument("--batch", metavar="FILE", help="answer one query per line of FILE ('-' for stdin) and exit")
+    parser.add_argument("--concurrency", type=int, default=BATCH_CONCURRENCY, help="queries run at once in batch mode")
+    args = parser.parse_args()
+
+    if args.batch:
+        asyncio.run(batch_main(args.batch, args.concurrency))
+    else:
+        asyncio.run(main())
@@ -0,0 +1,150 @@
+import hashlib
+import json
+import logging
+import sqlite3
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_query(query: str) -> str:
+    """Case- and whitespace-insensitive form of a query, ignoring trailing punctuation."""
+    return " ".join(query.lower().split()).strip(" ?!.")
+
+
+def schema_fingerprint(tool: dict) -> str:
+    return hashlib.sha256(json.dumps(tool.get("inputSchema"), sort_keys=True).encode()).hexdigest()[:16]
+
+
+@dataclass
+class PlanEntry:
+    steps: list[dict]
+    catalogue_version: str
+    schema_fingerprints: dict[str, str]  # tool name -> fingerprint of its inputSchema
+    expires_at: float  # Wall-clock time, so entries can be persisted across restarts
+
+
+class SqlitePlanStore:
+    """Persists plan cache entries in a SQLite database so they survive restarts."""
+
+    def __init__(self, path: str):
+        self._db = sqlite3.connect(path)
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS plans (
+                query TEXT PRIMARY KEY,
+                steps TEXT NOT NULL,
+                catalogue_version TEXT NOT NULL,
+                schema_fingerprints TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                stored_at REAL NOT NULL
+            )
+        """)
+        self._db.commit()
+
+    def load(self, limit: int) -> list[tuple[str, PlanEntry]]:
+        """Returns up to `limit` unexpired entries, least recently stored first."""
+        self._db.execute("DELETE FROM plans WHERE expires_at <= ?", (time.time(),))
+        self._db.commit()
+        rows = self._db.execute(
+            "SELECT * FROM (SELECT query, steps, catalogue_version, schema_fingerprints, "
+            "expires_at, stored_at FROM plans ORDER BY stored_at DESC LIMIT ?) ORDER BY stored_at",
+            (limit,),
+        ).fetchall()
+        return [
+            (query, PlanEntry(json.loads(steps), version, json.loads(fingerprints), expires_at))
+            for query, steps, version, fingerprints, expires_at, _ in rows
+        ]
+
+    def save(self, query: str, entry: PlanEntry):
+        self._db.execute(
+            "INSERT OR REPLACE INTO plans VALUES (?, ?, ?, ?, ?, ?)",
+            (query, json.dumps(entry.steps), entry.catalogue_version,
+             json.dumps(entry.schema_fingerprints), entry.expires_at, time.time()),
+        )
+        self._db.commit()
+
+    def delete(self, query: str):
+        self._db.execute("DELETE FROM plans WHERE query = ?", (query,))
+        self._db.commit()
+
+    def close(self):
+        self._db.close()
+
+
+class PlanCache:
+    """
+    An LRU + TTL cache of validated plans (lists of tool call steps), keyed on the
+    normalized query.
+
+    Each entry remembers the catalogue version it was planned against. When the
+    catalogue changes, the entry survives only if all of its tools still exist with
+    the same `inputSchema`; otherwise it is evicted and the query is planned again.
+    """
+
+    def __init__(self, max_size: int, ttl: float, store: SqlitePlanStore | None = None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.store = store
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[str, PlanEntry] = OrderedDict()
+
+        if store is not None:
+            self._entries.update(store.load(max_size))
+
+    def _evict(self, key: str):
+        del self._entries[key]
+        self.evictions += 1
+        if self.store is not None:
+            self.store.delete(key)
+
+    def get(self, query: str, catalogue) -> list[dict] | None:
+        """Returns the cached plan for `query` if it is still valid against the `catalogue.ToolCatalogue`."""
+        key = normalize_query(query)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        if entry.expires_at <= time.time():
+            self._evict(key)
+            self.misses += 1
+            return None
+
+        if entry.catalogue_version != catalogue.version:
+            for tool_name, fingerprint in entry.schema_fingerprints.items():
+                tool = catalogue.tools_by_name.get(tool_name)
+                if tool is None or schema_fingerprint(tool) != fingerprint:
+                    logger.debug(f"Plan for '{key}' invalidated by a change to tool '{tool_name}'")
+                    self._evict(key)
+                    self.misses += 1
+                    return None
+            entry.catalogue_version = catalogue.version
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry.steps
+
+    def put(self, query: str, catalogue, steps: list[dict]):
+        key = normalize_query(query)
+        entry = PlanEntry(
+            steps=steps,
+            catalogue_version=catalogue.version,
+            schema_fingerprints={
+                step["name"]: schema_fingerprint(catalogue.tools_by_name[step["name"]]) for step in steps
+            },
+            expires_at=time.time() + self.ttl,
+        )
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        if self.store is not None:
+            self.store.save(key, entry)
+
+        while len(self._entries) > self.max_size:
+            self._evict(next(iter(self._entries)))
+
+    def stats(self) -> dict:
+        return {"size": len(self._entries), "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
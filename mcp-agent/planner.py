@@ -1,12 +1,26 @@
-from langchain.prompts import ChatPromptTemplate
-from executor import list_tools
+from catalogue import get_catalogue
+from config import (
+    MAX_PLAN_STEPS,
+    TOOL_SELECTION_TOP_K,
+    TOOL_SELECTION_MIN_SCORE,
+    PLAN_CACHE_SIZE,
+    PLAN_CACHE_TTL,
+    PLAN_CACHE_PATH,
+    STREAM_PLANNER,
+)
+from json_stream import JsonBlockExtractor
+from plan_cache import PlanCache, SqlitePlanStore
+from steps import normalize_steps, without_references
+from tool_index import ToolIndex
+from functools import lru_cache
 import json
-from jsonschema import validate, ValidationError
 import re
 
-from llm import llm
+from llm import get_llm
 
-prompt = ChatPromptTemplate.from_template("""
+# LangChain and jsonschema are imported on first use: a query answered from the plan
+# cache never needs them, and they dominate the agent's import time.
+PROMPT_TEMPLATE = """
 You are an AI agent tasked with selecting the correct tool from a list of available tools and mapping a user query to the tool's input schema. The tools are provided in a JSON format, including tool names, descriptions, and input schemas. Your goal is to:
 
 1. Analyze the user query to identify the intended task.
@@ -32,6 +46,16 @@ You are an AI agent tasked with selecting the correct tool from a list of availa
     "arguments": <input_schema_filled>
   }}
   ```
+- If the query needs several tool calls (for example the same tool for several inputs, or a tool that takes the result of another tool), output a list of steps instead:
+  ```json
+  {{
+    "steps": [
+      {{"id": "s1", "name": "<tool_name>", "arguments": <input_schema_filled>}},
+      {{"id": "s2", "name": "<tool_name>", "arguments": {{"<parameter>": "$s1"}}}}
+    ]
+  }}
+  ```
+  Steps run in parallel, except that an argument value "$<step_id>" waits for and is replaced by the result of that earlier step.
 - If no tool matches or the query is invalid, output:
   ```json
   {{
@@ -41,60 +65,131 @@ You are an AI agent tasked with selecting the correct tool from a list of availa
 
 **Output:**
 Return the JSON object as a single, valid JSON string.
-""")
+"""
+
+# The fenced JSON block the prompt asks the LLM to answer with
+JSON_BLOCK_PATTERN = r'```json\s*(.*?)\s*```'
+
+# Ranks the catalogue's tools by relevance to the query, to keep the prompt small.
+tool_index = ToolIndex()
+
+plan_cache = PlanCache(
+    max_size=PLAN_CACHE_SIZE,
+    ttl=PLAN_CACHE_TTL,
+    store=SqlitePlanStore(PLAN_CACHE_PATH) if PLAN_CACHE_PATH else None,
+)
+
+_chain = None
+
+def get_chain():
+    """Returns the prompt | LLM chain, building it on first use only."""
+    global _chain
+    if _chain is None:
+        from langchain.prompts import ChatPromptTemplate
+        _chain = ChatPromptTemplate.from_template(PROMPT_TEMPLATE) | get_llm()
+    return _chain
+
+@lru_cache(maxsize=256)
+def schema_validator(schema_json: str):
+    """A jsonschema validator for a JSON-encoded schema, checked and built once per distinct schema."""
+    from jsonschema.validators import validator_for
+    schema = json.loads(schema_json)
+    validator = validator_for(schema)
+    validator.check_schema(schema)
+    return validator(schema)
+
+def validate_arguments(tool_name: str, arguments: dict, schema: dict):
+    """Raises ValueError if `arguments` do not match `schema`."""
+    from jsonschema import ValidationError
+    try:
+        schema_validator(json.dumps(schema, sort_keys=True)).validate(arguments)
+    except ValidationError as e:
+        raise ValueError(f"Arguments for '{tool_name}' do not match tool schema: {e.message}")
+
+def extract_json_block(content: str) -> str:
+    """The JSON text of the fenced ```json block in a complete LLM answer."""
+    match = re.search(JSON_BLOCK_PATTERN, content, re.DOTALL)
+    if not match:
+        raise ValueError(f"LLM response does not contain valid JSON in Markdown code block: {content}")
+    return match.group(1).strip()
 
-async def plan(user_query):
-    tools = await list_tools()
+async def stream_json_block(inputs: dict, on_token=None) -> str:
+    """
+    Streams the LLM's answer, passing each piece of text to `on_token`, and returns the
+    JSON text of its ```json block as soon as the block's value is complete. The stream
+    is closed then, so the closing fence and any explanation after it are not waited for.
+    """
+    extractor = JsonBlockExtractor()
+    stream = get_chain().astream(inputs)
+    try:
+        async for chunk in stream:
+            text = chunk.text()
+            if on_token is not None and text:
+                on_token(text)
+            json_str = extractor.feed(text)
+            if json_str is not None:
+                return json_str
+    finally:
+        await stream.aclose()
+    return extract_json_block(extractor.text.strip())
+
+async def plan(user_query, on_token=None):
+    """
+    Plans the tool calls for a query. Returns a list of steps, see steps.normalize_steps.
+    With STREAM_PLANNER, the LLM's answer is passed to `on_token` as it is generated.
+    """
+    catalogue = await get_catalogue()
+    tools = catalogue.tools
     if not tools:
       raise ValueError("No tools available.")
-    tools_json = json.dumps(tools)
 
-    # Create the chain
-    chain = prompt | llm
-    
-    # Invoke LLM with query and tools
-    response = await chain.ainvoke({
+    cached_plan = plan_cache.get(user_query, catalogue)
+    if cached_plan is not None:
+      return cached_plan
+
+    tool_index.sync(catalogue)
+    selected = tool_index.select(user_query, TOOL_SELECTION_TOP_K, TOOL_SELECTION_MIN_SCORE)
+    tools_json = catalogue.tools_json_for(selected) if selected else catalogue.tools_json
+
+    # Invoke LLM with query and tools, and extract the JSON from its Markdown code block
+    inputs = {
         "user_query": user_query,
         "tools_json": tools_json
-    })
-    
-    # Strip Markdown and extract JSON
-    content = response.content.strip()
-    
-    # Remove json and delimiters using regex
-    json_pattern = r'```json\s*(.*?)\s*```'
-    match = re.search(json_pattern, content, re.DOTALL)
-    if not match:
-      raise ValueError(f"LLM response does not contain valid JSON in Markdown code block: {content}")
+    }
+    if STREAM_PLANNER:
+      json_str = await stream_json_block(inputs, on_token)
+    else:
+      response = await get_chain().ainvoke(inputs)
+      json_str = extract_json_block(response.content.strip())
 
-    json_str = match.group(1).strip()    
-      
     try:
       tool_call = json.loads(json_str)
       print(f"tool call: {tool_call}")
     except json.JSONDecodeError:
-      raise ValueError(f"LLM response is not valid JSON: {response.content}")
+      raise ValueError(f"LLM response is not valid JSON: {json_str}")
     
     # Handle error response
     if "error" in tool_call:
       raise ValueError(f"LLM returned an error: {tool_call['error']}")
     
-    # Validate response structure
-    if not isinstance(tool_call, dict) or "name" not in tool_call or "arguments" not in tool_call:
-      raise ValueError("LLM response missing required fields: 'name' and 'arguments'.")
+    if not isinstance(tool_call, dict):
+      raise ValueError("LLM response is not a JSON object.")
 
-    tool_name = tool_call["name"]
-    arguments = tool_call["arguments"]
-    
-    # Verify tool exists
-    selected_tool = next((tool for tool in tools if tool["name"] == tool_name), None)
-    if not selected_tool:
-      raise ValueError(f"Selected tool '{tool_name}' not found in tools list.")
-    
-    # Validate arguments against tool's input schema
-    try:
-      validate(instance=arguments, schema=selected_tool["inputSchema"])
-    except ValidationError as e:
-      raise ValueError(f"Arguments do not match tool schema: {e.message}")
-  
-    return tool_name, arguments
\ No newline at end of file
+    steps = normalize_steps(tool_call)
+    if len(steps) > MAX_PLAN_STEPS:
+      raise ValueError(f"Plan has {len(steps)} steps, more than the maximum of {MAX_PLAN_STEPS}.")
+
+    step_ids = {step["id"] for step in steps}
+    for step in steps:
+      # Verify tool exists
+      selected_tool = catalogue.tools_by_name.get(step["name"])
+      if not selected_tool:
+        raise ValueError(f"Selected tool '{step['name']}' not found in tools list.")
+
+      # Validate arguments against tool's input schema. Arguments filled from earlier
+      # steps are only known at execution time and are checked by the tool server.
+      arguments, schema = without_references(step["arguments"], selected_tool["inputSchema"], step_ids)
+      validate_arguments(step["name"], arguments, schema)
+
+    plan_cache.put(user_query, catalogue, steps)
+    return steps
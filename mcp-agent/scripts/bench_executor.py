@@ -0,0 +1,66 @@
+"""
+Measures tools/call throughput of the executor against a running gateway.
+
+Compares the old behaviour (a fresh httpx.AsyncClient per call) with the shared,
+pooled client from executor.py, using the calculator `add` tool.
+
+Usage (with the gateway and calculator server running):
+    $ cd mcp-agent
+    $ python scripts/bench_executor.py [calls] [concurrency]
+"""
+import asyncio
+import os
+import sys
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import GATEWAY_URL  # noqa: E402
+from executor import call_tool, close_client  # noqa: E402
+
+
+async def unpooled_call_tool(tool_name, arguments):
+    async with httpx.AsyncClient() as client:
+        res = await client.post(GATEWAY_URL, json={
+            "jsonrpc": "2.0",
+            "id": 2,
+            "method": "tools/call",
+            "params": {"name": tool_name, "arguments": arguments}
+        })
+        return res.json()["result"]
+
+
+async def run(call, calls: int, concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        async with semaphore:
+            result = await call("add", {"a": i, "b": 1})
+            assert not result["isError"], result
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(calls)))
+    return calls / (time.perf_counter() - start)
+
+
+async def main():
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    # Warm up both paths (gateway routing, server imports, pool)
+    await run(unpooled_call_tool, 20, concurrency)
+    await run(call_tool, 20, concurrency)
+
+    before = await run(unpooled_call_tool, calls, concurrency)
+    after = await run(call_tool, calls, concurrency)
+    await close_client()
+
+    print(f"{calls} x add, concurrency {concurrency}")
+    print(f"  fresh client per call: {before:8.1f} req/s")
+    print(f"  pooled shared client:  {after:8.1f} req/s  ({after / before:.2f}x)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
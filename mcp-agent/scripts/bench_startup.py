@@ -0,0 +1,71 @@
+"""
+Measures the agent's startup cost: each case runs in a fresh interpreter, several
+times, and the median wall time is reported. The modules `main` imports are listed
+with their cumulative import time, from `python -X importtime`.
+
+No gateway or LLM is contacted. GOOGLE_API_KEY is set to a dummy value if missing,
+so building the chat model does not fail.
+
+Usage:
+    $ cd mcp-agent
+    $ python scripts/bench_startup.py [runs, default 5]
+"""
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+AGENT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CASES = [
+    ("python -c pass (interpreter only)", ["-c", "pass"]),
+    ("import main", ["-c", "import main"]),
+    ("main.py --help", ["main.py", "--help"]),
+    ("import main, build the graph", ["-c", "import main; main.get_graph()"]),
+    ("import main, build graph and LLM chain", ["-c", "import main, planner; main.get_graph(); planner.get_chain()"]),
+]
+
+
+def run(args: list[str], env: dict) -> float:
+    started = time.perf_counter()
+    subprocess.run([sys.executable, *args], cwd=AGENT_DIR, env=env, check=True, capture_output=True)
+    return (time.perf_counter() - started) * 1000
+
+
+def slowest_imports(env: dict) -> list[tuple[int, str]]:
+    """The modules `main` imports directly, by cumulative import time in µs, slowest first."""
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"], cwd=AGENT_DIR, env=env, capture_output=True, text=True
+    ).stderr
+    # A module is listed after the modules it imports, indented two spaces deeper.
+    children = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        if depth == 1:
+            children.append((int(cumulative), name.strip()))
+        elif depth == 0:
+            if name.strip() == "main":
+                return sorted(children, reverse=True)
+            children = []
+    return []
+
+
+def main(runs: int):
+    env = {**os.environ, "GOOGLE_API_KEY": os.environ.get("GOOGLE_API_KEY", "dummy")}
+    print(f"Median of {runs} runs, {sys.executable}")
+    for label, args in CASES:
+        run(args, env)  # Warm the OS file cache and bytecode caches
+        times = [run(args, env) for _ in range(runs)]
+        print(f"  {label:<40} {statistics.median(times):8.0f} ms")
+
+    print("\nModules imported by main (cumulative):")
+    for cumulative, name in slowest_imports(env):
+        print(f"  {name:<40} {cumulative / 1000:8.0f} ms")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
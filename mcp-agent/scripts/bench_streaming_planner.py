@@ -0,0 +1,126 @@
+"""
+Measures the time to the first tool call with and without STREAM_PLANNER, using a fake
+chat model that streams a canned answer at a fixed rate instead of calling an LLM.
+
+The answer is written the way models tend to answer the planner prompt: a sentence,
+the ```json block, then an explanation. Without streaming, the tool call waits for
+the whole answer. With streaming it goes out as soon as the JSON object is complete.
+Queries run through the full graph (planner, then executor). The gateway is replaced
+by a stub that records when the tool call arrives, so nothing has to be running.
+
+Usage:
+    $ cd mcp-agent
+    $ python scripts/bench_streaming_planner.py [queries, default 5] [ms per token, default 20]
+"""
+import asyncio
+import logging
+import os
+import re
+import statistics
+import sys
+import time
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GOOGLE_API_KEY", "dummy")
+
+import catalogue  # noqa: E402
+import main  # noqa: E402
+import planner  # noqa: E402
+
+logging.getLogger().setLevel(logging.WARNING)  # main.py logs every node at DEBUG
+
+ADD_TOOL = {
+    "name": "add",
+    "description": "Add two numbers",
+    "inputSchema": {
+        "type": "object",
+        "properties": {"a": {"type": "number"}, "b": {"type": "number"}},
+        "required": ["a", "b"],
+    },
+}
+
+ANSWER = """Sure, the query asks for a sum, so the add tool fits.
+```json
+{{
+  "name": "add",
+  "arguments": {{"a": {a}, "b": 1}}
+}}
+```
+The add tool takes two numbers, `a` and `b`, and returns their sum. The query names
+both numbers explicitly, so no defaults are needed and the arguments map directly to
+the tool's input schema. No other tool in the list matches the intent of the query.
+"""
+
+
+class FakeStreamingChatModel(BaseChatModel):
+    """Answers with ANSWER for the number in the query, one token (~4 characters) every `token_delay` seconds."""
+    token_delay: float
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-streaming"
+
+    def tokens(self, messages) -> list[str]:
+        a = re.findall(r"add (\d+)", messages[-1].content)[-1]
+        return re.findall(r"\s*\S{1,4}|\s+", ANSWER.format(a=a))
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        raise NotImplementedError("Only the async API is used.")
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        tokens = self.tokens(messages)
+        await asyncio.sleep(self.token_delay * len(tokens))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="".join(tokens)))])
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        for token in self.tokens(messages):
+            await asyncio.sleep(self.token_delay)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+
+
+async def measure(query: str, stream: bool) -> dict:
+    """Runs `query` through the graph. Returns the time to the first token shown and to the tool call, in ms."""
+    planner.STREAM_PLANNER = stream
+    started = time.perf_counter()
+    times = {}
+
+    async def gateway_stub(tool_name, arguments):
+        times.setdefault("tool_call_ms", (time.perf_counter() - started) * 1000)
+        return {"content": [{"type": "text", "text": str(float(arguments["a"] + arguments["b"]))}], "isError": False}
+
+    def on_token(text: str):
+        times.setdefault("first_token_ms", (time.perf_counter() - started) * 1000)
+
+    main.call_tool = main.call_tool_batched = gateway_stub
+    result = await main.answer_query(query, on_token=on_token)
+    assert "output" in result, result
+    times["total_ms"] = (time.perf_counter() - started) * 1000
+    return times
+
+
+async def run(queries: int, token_delay: float):
+    catalogue._catalogue = catalogue.ToolCatalogue(version="bench", tools=[ADD_TOOL], checked_at=float("inf"))
+    from langchain.prompts import ChatPromptTemplate
+    planner._chain = ChatPromptTemplate.from_template(planner.PROMPT_TEMPLATE) | FakeStreamingChatModel(token_delay=token_delay)
+    await measure("add 0 and 1", True)  # Warm up: imports, graph, jsonschema
+
+    print(f"{queries} queries, {token_delay * 1000:.0f} ms per token (median)")
+    print(f"{'planner':>10} {'first token ms':>15} {'tool call ms':>13} {'total ms':>9}")
+    for stream in (False, True):
+        # A new query each time, so the plan cache never answers.
+        results = [await measure(f"add {i + 1 + stream * queries} and 1", stream) for i in range(queries)]
+        first_token = statistics.median(r.get("first_token_ms", r["tool_call_ms"]) for r in results)
+        tool_call = statistics.median(r["tool_call_ms"] for r in results)
+        total = statistics.median(r["total_ms"] for r in results)
+        print(f"{'streaming' if stream else 'buffered':>10} {first_token:15.0f} {tool_call:13.0f} {total:9.0f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(run(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 5,
+        (float(sys.argv[2]) if len(sys.argv) > 2 else 20) / 1000,
+    ))
@@ -0,0 +1,129 @@
+"""
+Benchmarks tool pre-selection on a synthetic 500-tool catalogue.
+
+Reports the size of the tools fragment of the planner prompt with and without
+pre-selection, how often the expected tool is among the selected ones, and the
+cost of selecting and of incrementally re-indexing a changed catalogue.
+Tokens are estimated at ~4 characters per token.
+
+Usage:
+    $ cd mcp-agent
+    $ python scripts/bench_tool_index.py
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from catalogue import ToolCatalogue  # noqa: E402
+from config import TOOL_SELECTION_TOP_K, TOOL_SELECTION_MIN_SCORE  # noqa: E402
+from tool_index import ToolIndex  # noqa: E402
+
+# action -> (description verb, words a user might use instead)
+ACTIONS = {
+    "get": ("Retrieve", ["show", "fetch", "get"]),
+    "list": ("List all", ["list", "enumerate", "show all"]),
+    "create": ("Create a new", ["create", "make", "add a new"]),
+    "delete": ("Delete an existing", ["delete", "remove"]),
+    "update": ("Update the fields of an existing", ["update", "change", "modify"]),
+    "search": ("Search for", ["search", "find", "look up"]),
+    "export": ("Export to CSV", ["export", "download"]),
+    "archive": ("Archive", ["archive"]),
+    "count": ("Count the number of", ["count", "how many"]),
+    "summarize": ("Summarize", ["summarize", "give a summary of"]),
+}
+
+ENTITIES = [
+    "invoice", "customer", "order", "shipment", "ticket", "user", "project", "task",
+    "calendar event", "meeting", "contract", "payment", "refund", "subscription", "product",
+    "warehouse", "supplier", "employee", "timesheet", "expense", "budget", "report",
+    "dashboard", "alert", "incident", "deployment", "repository", "pull request", "build",
+    "test run", "log entry", "metric", "database backup", "dns record", "certificate",
+    "firewall rule", "virtual machine", "storage bucket", "email campaign", "newsletter",
+    "blog post", "comment", "survey", "lead", "opportunity", "quote", "coupon", "review",
+    "playlist", "recipe",
+]
+
+
+def make_tool(action: str, entity: str) -> dict:
+    verb, _ = ACTIONS[action]
+    name = f"{action}_{entity.replace(' ', '_')}"
+    noun = entity if action in ("get", "delete", "update", "archive") else f"{entity}s"
+    return {
+        "name": name,
+        "description": f"{verb} {noun} in the {entity} management system.",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "id": {"type": "string", "description": f"Identifier of the {entity}"},
+                "filter": {"type": "string", "description": "Optional filter expression"},
+            },
+            "required": ["id"],
+        },
+    }
+
+
+def make_queries(rng: random.Random, count: int) -> list[tuple[str, str]]:
+    queries = []
+    for _ in range(count):
+        action = rng.choice(list(ACTIONS))
+        entity = rng.choice(ENTITIES)
+        phrase = rng.choice(ACTIONS[action][1])
+        template = rng.choice([
+            "{phrase} the {entity} with id 42",
+            "can you {phrase} {entity}s for me",
+            "I need to {phrase} my {entity}",
+            "please {phrase} {entity} X-17 right now",
+        ])
+        queries.append((template.format(phrase=phrase, entity=entity), f"{action}_{entity.replace(' ', '_')}"))
+    return queries
+
+
+def main():
+    rng = random.Random(7)
+    tools = [make_tool(action, entity) for action in ACTIONS for entity in ENTITIES]
+    catalogue = ToolCatalogue(version="v1", tools=tools)
+    index = ToolIndex()
+
+    start = time.perf_counter()
+    index.sync(catalogue)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    queries = make_queries(rng, 1000)
+    full_tokens = len(catalogue.tools_json) / 4
+    selected_tokens = 0.0
+    hits = top1 = fallbacks = 0
+
+    start = time.perf_counter()
+    for query, expected in queries:
+        selected = index.select(query, TOOL_SELECTION_TOP_K, TOOL_SELECTION_MIN_SCORE)
+        if selected is None:
+            fallbacks += 1
+            selected_tokens += full_tokens
+            hits += 1  # The full catalogue always contains the tool
+            continue
+        selected_tokens += len(catalogue.tools_json_for(selected)) / 4
+        hits += expected in selected
+        top1 += selected[0] == expected
+    select_ms = (time.perf_counter() - start) * 1000 / len(queries)
+
+    changed = [dict(tool, description=tool["description"] + " Deprecated.") for tool in tools[:5]]
+    start = time.perf_counter()
+    reindexed = index.update(changed + tools[5:], "v2")
+    update_ms = (time.perf_counter() - start) * 1000
+
+    print(f"catalogue: {len(tools)} tools, top-k = {TOOL_SELECTION_TOP_K}")
+    print(f"  tools prompt tokens, full catalogue: {full_tokens:10.0f}")
+    print(f"  tools prompt tokens, pre-selected:   {selected_tokens / len(queries):10.0f} (mean)")
+    print(f"  expected tool selected (top-k):      {hits / len(queries):10.1%}")
+    print(f"  expected tool ranked first:          {top1 / len(queries):10.1%}")
+    print(f"  fallbacks to full catalogue:         {fallbacks / len(queries):10.1%}")
+    print(f"  index build:                         {build_ms:10.2f} ms")
+    print(f"  selection per query:                 {select_ms:10.3f} ms")
+    print(f"  incremental update ({reindexed} tools):      {update_ms:10.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+import asyncio
+import json
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+# An argument value of "$s1" is replaced by the result of step "s1".
+PLACEHOLDER_PATTERN = re.compile(r"\$([A-Za-z_][\w-]*)")
+
+
+def find_references(value, step_ids) -> set[str]:
+    """Returns the ids of the steps referenced by placeholders anywhere in `value`."""
+    if isinstance(value, str):
+        return {ref for ref in PLACEHOLDER_PATTERN.findall(value) if ref in step_ids}
+    if isinstance(value, dict):
+        return set().union(*(find_references(v, step_ids) for v in value.values()))
+    if isinstance(value, list):
+        return set().union(*(find_references(v, step_ids) for v in value))
+    return set()
+
+
+def resolve_references(value, outputs: dict[str, str]):
+    """Substitutes step outputs for placeholders. A value that is exactly one placeholder keeps the output's JSON type."""
+    if isinstance(value, str):
+        match = PLACEHOLDER_PATTERN.fullmatch(value)
+        if match and match.group(1) in outputs:
+            output = outputs[match.group(1)]
+            try:
+                return json.loads(output)
+            except json.JSONDecodeError:
+                return output
+        return PLACEHOLDER_PATTERN.sub(lambda m: outputs.get(m.group(1), m.group(0)), value)
+    if isinstance(value, dict):
+        return {k: resolve_references(v, outputs) for k, v in value.items()}
+    if isinstance(value, list):
+        return [resolve_references(v, outputs) for v in value]
+    return value
+
+
+def without_references(arguments: dict, schema: dict, step_ids) -> tuple[dict, dict]:
+    """
+    Drops top-level arguments that are filled from other steps, and relaxes the schema's
+    `required` list to match, so the rest can be validated before anything runs.
+    """
+    placeholders = {k for k, v in arguments.items() if find_references(v, step_ids)}
+    if not placeholders:
+        return arguments, schema
+
+    arguments = {k: v for k, v in arguments.items() if k not in placeholders}
+    schema = dict(schema, required=[r for r in schema.get("required", []) if r not in placeholders])
+    return arguments, schema
+
+
+def normalize_steps(tool_call: dict) -> list[dict]:
+    """
+    Turns a planner response into a list of `{"id", "name", "arguments", "depends_on"}`
+    steps. Accepts either a single `{"name", "arguments"}` call or `{"steps": [...]}`.
+    Steps may only depend on steps listed before them, so the result is always a DAG.
+    """
+    if "steps" not in tool_call:
+        if "name" not in tool_call or "arguments" not in tool_call:
+            raise ValueError("LLM response missing required fields: 'name' and 'arguments'.")
+        return [{"id": "s1", "name": tool_call["name"], "arguments": tool_call["arguments"], "depends_on": []}]
+
+    raw_steps = tool_call["steps"]
+    if not isinstance(raw_steps, list) or not raw_steps:
+        raise ValueError("LLM response 'steps' must be a non-empty list.")
+
+    for position, step in enumerate(raw_steps, start=1):
+        if not isinstance(step, dict) or "name" not in step or "arguments" not in step:
+            raise ValueError(f"Step {position} is missing required fields: 'name' and 'arguments'.")
+
+    # Steps without an id are numbered by position, and can be referenced by that id too.
+    step_ids = [str(step.get("id") or f"s{position}") for position, step in enumerate(raw_steps, start=1)]
+    all_ids = set(step_ids)
+
+    steps = []
+    seen = set()
+    for step_id, step in zip(step_ids, raw_steps):
+        if step_id in seen:
+            raise ValueError(f"Duplicate step id '{step_id}'.")
+
+        depends_on = set(map(str, step.get("depends_on", []))) | find_references(step["arguments"], all_ids)
+        unknown = depends_on - seen
+        if unknown:
+            raise ValueError(f"Step '{step_id}' depends on steps that do not precede it: {sorted(unknown)}")
+
+        steps.append({"id": step_id, "name": step["name"], "arguments": step["arguments"], "depends_on": sorted(depends_on)})
+        seen.add(step_id)
+
+    return steps
+
+
+async def run_steps(steps: list[dict], call_tool, timeout: float) -> list[dict]:
+    """
+    Runs the steps through `call_tool`. Each step starts as soon as the steps it depends
+    on have finished, so independent calls run concurrently and total latency follows the
+    slowest dependency chain. Failures and timeouts are reported per step, and steps that
+    depend on a failed step are skipped.
+
+    Returns, in step order, `{"id", "name", "arguments", "output"}` or `{..., "error"}` dicts.
+    """
+    tasks: dict[str, asyncio.Task] = {}
+
+    async def run(step: dict) -> dict:
+        result = {"id": step["id"], "name": step["name"], "arguments": step["arguments"]}
+
+        outputs = {}
+        for dep in step["depends_on"]:
+            dep_result = await tasks[dep]
+            if "error" in dep_result:
+                return {**result, "error": f"Skipped because step '{dep}' failed"}
+            outputs[dep] = dep_result["output"]
+
+        arguments = resolve_references(step["arguments"], outputs)
+        result["arguments"] = arguments
+        try:
+            response = await asyncio.wait_for(call_tool(step["name"], arguments), timeout)
+        except asyncio.TimeoutError:
+            return {**result, "error": f"Tool call timed out after {timeout}s"}
+        except Exception as e:
+            logger.error(f"Step '{step['id']}' failed: {str(e)}")
+            return {**result, "error": f"Execution failed: {str(e)}"}
+
+        contents = response["content"]
+        if response["isError"]:
+            return {**result, "error": contents[0]["text"]}
+        return {**result, "output": "".join(content.get("text", "") for content in contents)}
+
+    # Steps only depend on earlier steps, so every dependency's task already exists.
+    for step in steps:
+        tasks[step["id"]] = asyncio.create_task(run(step))
+
+    return list(await asyncio.gather(*tasks.values()))
@@ -0,0 +1,34 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from steps import normalize_steps, run_steps  # noqa: E402
+
+
+def test_references_to_steps_without_ids():
+    steps = normalize_steps({"steps": [
+        {"name": "add", "arguments": {"a": 2, "b": 3}},
+        {"name": "multiply", "arguments": {"a": "$s1", "b": 10}},
+    ]})
+    assert [step["id"] for step in steps] == ["s1", "s2"]
+    assert steps[1]["depends_on"] == ["s1"]
+
+    async def call_tool(name, arguments):
+        result = arguments["a"] + arguments["b"] if name == "add" else arguments["a"] * arguments["b"]
+        return {"content": [{"type": "text", "text": str(result)}], "isError": False}
+
+    results = asyncio.run(run_steps(steps, call_tool, timeout=5))
+    assert results[1]["arguments"] == {"a": 5, "b": 10}
+    assert results[1]["output"] == "50"
+
+
+def test_reference_to_a_later_step_is_rejected():
+    with pytest.raises(ValueError, match="do not precede it"):
+        normalize_steps({"steps": [
+            {"name": "multiply", "arguments": {"a": "$s2", "b": 10}},
+            {"name": "add", "arguments": {"a": 2, "b": 3}},
+        ]})
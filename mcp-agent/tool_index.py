@@ -0,0 +1,129 @@
+import hashlib
+import json
+import math
+import re
+from collections import Counter
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+CAMEL_CASE_PATTERN = re.compile(r"([a-z0-9])([A-Z])")
+
+# Tool names are the strongest signal, so their terms are counted this many times.
+NAME_WEIGHT = 3
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercases and splits text on non-alphanumerics, snake_case and camelCase, folding plurals."""
+    tokens = TOKEN_PATTERN.findall(CAMEL_CASE_PATTERN.sub(r"\1 \2", text).lower())
+    return [t[:-1] if len(t) > 3 and t.endswith("s") and not t.endswith("ss") else t for t in tokens]
+
+
+def tool_terms(tool: dict) -> Counter:
+    """Term frequencies of a tool's name, description and input parameters."""
+    terms = Counter(tokenize(tool["name"]) * NAME_WEIGHT)
+    terms.update(tokenize(tool.get("description") or ""))
+    for param, schema in tool.get("inputSchema", {}).get("properties", {}).items():
+        terms.update(tokenize(param))
+        terms.update(tokenize(schema.get("description", "")))
+    return terms
+
+
+class ToolIndex:
+    """
+    A BM25 index over the tool catalogue, used to send only the tools relevant to a
+    query to the LLM. It runs locally and is updated incrementally: when the catalogue
+    changes, only added, removed or modified tools are re-indexed.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.version = None
+        self._docs: dict[str, tuple[str, Counter, int]] = {}  # tool name -> (fingerprint, terms, length)
+        self._doc_freq = Counter()
+        self._total_length = 0
+
+    def __len__(self):
+        return len(self._docs)
+
+    def _add(self, name: str, fingerprint: str, terms: Counter):
+        length = sum(terms.values())
+        self._docs[name] = (fingerprint, terms, length)
+        self._doc_freq.update(terms.keys())
+        self._total_length += length
+
+    def _remove(self, name: str):
+        _, terms, length = self._docs.pop(name)
+        self._doc_freq.subtract(terms.keys())
+        self._total_length -= length
+
+    def update(self, tools: list[dict], version=None) -> int:
+        """Brings the index in line with `tools` and returns the number of tools re-indexed."""
+        fingerprints = {
+            tool["name"]: hashlib.sha256(json.dumps(tool, sort_keys=True).encode()).hexdigest()
+            for tool in tools
+        }
+
+        for name in [name for name in self._docs if name not in fingerprints]:
+            self._remove(name)
+
+        changed = 0
+        for tool in tools:
+            name = tool["name"]
+            current = self._docs.get(name)
+            if current is not None and current[0] == fingerprints[name]:
+                continue
+            if current is not None:
+                self._remove(name)
+            self._add(name, fingerprints[name], tool_terms(tool))
+            changed += 1
+
+        self._doc_freq = +self._doc_freq  # Drop terms that no longer occur
+        self.version = version
+        return changed
+
+    def sync(self, catalogue):
+        """Updates the index from a catalogue.ToolCatalogue if its version has changed."""
+        if self.version != catalogue.version:
+            self.update(catalogue.tools, catalogue.version)
+
+    def search(self, query: str, k: int) -> list[tuple[float, str]]:
+        """Returns up to `k` `(score, tool name)` pairs, best first. Tools matching no query term are left out."""
+        if not self._docs:
+            return []
+
+        doc_count = len(self._docs)
+        avg_length = self._total_length / doc_count
+        query_terms = [t for t in set(tokenize(query)) if t in self._doc_freq]
+
+        idf = {
+            t: math.log(1 + (doc_count - self._doc_freq[t] + 0.5) / (self._doc_freq[t] + 0.5))
+            for t in query_terms
+        }
+
+        scores = []
+        for name, (_, terms, length) in self._docs.items():
+            score = 0.0
+            for t in query_terms:
+                tf = terms.get(t)
+                if tf:
+                    norm = self.k1 * (1 - self.b + self.b * length / avg_length)
+                    score += idf[t] * tf * (self.k1 + 1) / (tf + norm)
+            if score > 0:
+                scores.append((score, name))
+
+        scores.sort(reverse=True)
+        return scores[:k]
+
+    def select(self, query: str, k: int, min_score: float) -> list[str] | None:
+        """
+        Returns the names of the `k` most relevant tools, or None when the full
+        catalogue should be used instead: the catalogue is no larger than `k`,
+        or the best match scores below `min_score`.
+        """
+        if len(self._docs) <= k:
+            return None
+
+        results = self.search(query, k)
+        if not results or results[0][0] < min_score:
+            return None
+        return [name for _, name in results]
@@ -0,0 +1,139 @@
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import importlib.util
+import os
+import sys
+import threading
+
+# Threads per embedded server for running its sync tools
+SYNC_TOOL_THREADS = int(os.getenv("GATEWAY_EMBEDDED_SYNC_THREADS", "16"))
+
+# An event loop per thread of the sync tool pools, to run FastMCP's call_tool
+# coroutine in. For a sync tool it never waits on anything, so it completes at once.
+_thread_loops = threading.local()
+
+
+def load_object(path: str, attribute: str):
+    """
+    Imports the module at `path` and returns its `attribute`. The module's directory is
+    appended to sys.path, so it can import its sibling modules as it does when run as
+    a script. A module is imported once, under its file name.
+    """
+    path = os.path.realpath(path)
+    module_name = os.path.splitext(os.path.basename(path))[0]
+    module = sys.modules.get(module_name)
+    if module is None:
+        directory = os.path.dirname(path)
+        if directory not in sys.path:
+            sys.path.append(directory)
+        spec = importlib.util.spec_from_file_location(module_name, path)
+        if spec is None:
+            raise ValueError(f"Cannot import '{path}'")
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[module_name] = module
+        try:
+            spec.loader.exec_module(module)
+        except BaseException:
+            del sys.modules[module_name]
+            raise
+    elif os.path.realpath(getattr(module, "__file__", "") or "") != path:
+        raise ValueError(f"Cannot import '{path}': another module named '{module_name}' is already loaded")
+    return getattr(module, attribute)
+
+
+def run_in_thread_loop(coroutine):
+    """Runs `coroutine` to completion on the calling thread's own event loop."""
+    loop = getattr(_thread_loops, "loop", None)
+    if loop is None:
+        loop = _thread_loops.loop = asyncio.new_event_loop()
+    return loop.run_until_complete(coroutine)
+
+
+def dump(model) -> dict:
+    """An MCP SDK model as it is serialized on the wire."""
+    return model.model_dump(by_alias=True, mode="json", exclude_none=True)
+
+
+class EmbeddedServer:
+    """
+    A FastMCP server hosted in the gateway's process, called directly instead of over HTTP.
+
+    `spec` is "path/to/server.py:attribute", the path being relative to `base_dir`.
+    Its async tools run concurrently on an event loop in a thread of its own, as they
+    would in the server's own process. Its sync tools run in a pool of
+    SYNC_TOOL_THREADS threads, so a blocking tool holds up neither the gateway's loop,
+    nor the server's, nor the server's other sync tools.
+    """
+
+    def __init__(self, spec: str, base_dir: str = "."):
+        path, _, attribute = spec.rpartition(":")
+        if not path or not attribute:
+            raise ValueError(f"Embedded server '{spec}' must be given as 'path/to/server.py:attribute'")
+        self.spec = spec
+        self.path = os.path.join(base_dir, path)
+        self.attribute = attribute
+        self.mcp = None
+        self.loop: asyncio.AbstractEventLoop | None = None
+        self.thread: threading.Thread | None = None
+        self.sync_tools: ThreadPoolExecutor | None = None
+
+    def start(self):
+        """Imports the server, unless already done, and starts its event loop thread and thread pool."""
+        if self.loop is not None:
+            return
+        if self.mcp is None:
+            from mcp.server.fastmcp import FastMCP  # Installed along with the embedded servers' dependencies
+            server = load_object(self.path, self.attribute)
+            if not isinstance(server, FastMCP):
+                raise ValueError(f"Embedded server '{self.spec}' is a {type(server).__name__}, not a FastMCP server")
+            self.mcp = server
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name=f"embedded:{self.spec}", daemon=True)
+        self.thread.start()
+        self.sync_tools = ThreadPoolExecutor(SYNC_TOOL_THREADS, thread_name_prefix=f"embedded:{self.spec}")
+
+    def stop(self):
+        """Stops the event loop thread and the thread pool. Tool calls still running are abandoned."""
+        if self.loop is None:
+            return
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(timeout=5)
+        self.sync_tools.shutdown(wait=False, cancel_futures=True)
+        self.loop, self.thread, self.sync_tools = None, None, None
+
+    async def run(self, coroutine, timeout: float):
+        """Runs `coroutine` on the server's loop. It is cancelled there if `timeout` passes first."""
+        if self.loop is None:
+            coroutine.close()
+            raise RuntimeError(f"Embedded server '{self.spec}' is not running")
+        future = asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+        return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+
+    async def list_tools(self, timeout: float) -> list[dict]:
+        """The server's tools, as a tools/list result lists them."""
+        return [dump(tool) for tool in await self.run(self.mcp.list_tools(), timeout)]
+
+    async def call_tool(self, name: str, arguments: dict | None, timeout: float) -> dict:
+        """
+        The tools/call result of calling tool `name`. As over HTTP, a tool that raises
+        gives a result with `isError` set. asyncio.TimeoutError is raised if `timeout` passes;
+        a sync tool still running then finishes in the background.
+        """
+        if self.loop is None:
+            raise RuntimeError(f"Embedded server '{self.spec}' is not running")
+
+        async def call():
+            try:
+                content = await self.mcp.call_tool(name, arguments or {})
+            except Exception as e:
+                return {"content": [{"type": "text", "text": str(e)}], "isError": True}
+            return {"content": [dump(item) for item in content], "isError": False}
+
+        tool = self.mcp._tool_manager.get_tool(name)
+        if tool is None or tool.is_async:
+            return await self.run(call(), timeout)
+        future = asyncio.get_running_loop().run_in_executor(self.sync_tools, lambda: run_in_thread_loop(call()))
+        return await asyncio.wait_for(future, timeout)
+
+    def to_dict(self) -> dict:
+        return {"spec": self.spec, "running": self.loop is not None}
@@ -1,25 +1,152 @@
-from contextlib import asynccontextmanager
+from contextlib import AsyncExitStack, asynccontextmanager
 from fastapi import FastAPI, Request, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from starlette.background import BackgroundTask
 import httpx
+import argparse
 import asyncio
 import json
-import asyncio
+import os
+import shutil
+import tempfile
+import time
+
+from metrics import PROMETHEUS_CONTENT_TYPE, MetricsRegistry
+from registry import ToolRegistry
+from result_cache import ResultCache, annotated_as_pure, cache_key
+from telemetry import configure_logging, configure_tracing, logger, shutdown_tracing, span
+from upstreams import DeadlineExceeded, Replica, SessionPool, UpstreamServer, UpstreamUnavailable, load_servers
 
+# Serializes refreshes of the registry. Request handlers never take it: they read
+# whichever immutable snapshot `REGISTRY` points at.
 CACHE_LOCK = asyncio.Lock()
 
-# In a real-world scenario, this would be dynamic
-SERVER_REGISTRY = {
-    "calculator": "http://localhost:3001/mcp/",
-    "weather": "http://localhost:3002/mcp/",
-    "filesystem": "http://localhost:3003/mcp/"
+# The MCP servers behind the gateway, each with one or more replicas or embedded in
+# process, loaded from a JSON file. Servers can be added, changed or removed at runtime
+# through /admin/servers.
+SERVERS_FILE = os.getenv("GATEWAY_SERVERS_FILE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "servers.json"))
+SERVER_REGISTRY = load_servers(SERVERS_FILE)
+
+# Whether PUT /admin/servers may set up embedded servers. They import and run a file
+# of the caller's choosing in the gateway's process, so by default only the servers
+# file can declare them.
+ADMIN_EMBEDDED_SERVERS = os.getenv("GATEWAY_ADMIN_EMBEDDED", "false").lower() in ("1", "true", "yes")
+
+# Set by `python gateway.py --workers N` for its worker processes: the file through
+# which they share the server registry and the discovered tools (see shared_registry.py).
+# One worker, the leader, runs the periodic tool discovery and the others adopt what it
+# publishes, checking for a new version every REGISTRY_POLL_INTERVAL seconds.
+REGISTRY_FILE = os.getenv("GATEWAY_REGISTRY_FILE", "")
+REGISTRY_POLL_INTERVAL = 0.5
+REGISTRY_STARTUP_TIMEOUT = 30.0
+
+# How tools/call picks a replica: "p2c" (the less loaded of two random replicas)
+# or "least" (the replica with the fewest outstanding requests).
+LOAD_BALANCING_POLICY = os.getenv("GATEWAY_LOAD_BALANCING", "p2c")
+
+# Upper bound for an upstream call, in seconds. Callers can ask for less with the
+# X-Request-Timeout header (seconds); the time left is passed on to the server.
+UPSTREAM_TIMEOUT = 30.0
+DEADLINE_HEADER = "X-Request-Timeout"
+
+# Stateful servers ("stateful": true in servers.json) are called within pooled,
+# already initialized sessions.
+SESSION_HEADER = "Mcp-Session-Id"
+MCP_PROTOCOL_VERSION = "2025-03-26"
+# Answers to a session the server does not know: 404 per the spec, 400 from FastMCP.
+SESSION_REJECTED_STATUS_CODES = {400, 404}
+# Background DELETEs of abandoned sessions, referenced until they finish
+SESSION_CLEANUP_TASKS = set()
+
+# Replicas are pinged every HEALTH_CHECK_INTERVAL seconds and ejected from load
+# balancing after UNHEALTHY_THRESHOLD consecutive failed pings or connection attempts.
+HEALTH_CHECK_INTERVAL = 5.0
+HEALTH_CHECK_TIMEOUT = 2.0
+UNHEALTHY_THRESHOLD = 2
+
+# When enabled, tools/call responses are forwarded to the caller as the upstream
+# bytes arrive instead of being buffered, re-parsed and re-serialized.
+STREAMING_PROXY = os.getenv("GATEWAY_STREAMING_PROXY", "true").lower() in ("1", "true", "yes")
+
+# Opt-in cache of tools/call results for deterministic tools. A tool is cached if it
+# has a TTL (seconds) in RESULT_CACHE_TTLS, or if its MCP annotations mark it as pure
+# (read-only, idempotent, closed world), in which case RESULT_CACHE_DEFAULT_TTL applies.
+RESULT_CACHE_ENABLED = os.getenv("GATEWAY_RESULT_CACHE", "false").lower() in ("1", "true", "yes")
+RESULT_CACHE_MAX_BYTES = int(os.getenv("GATEWAY_RESULT_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+RESULT_CACHE_DEFAULT_TTL = 3600.0
+RESULT_CACHE_TTLS = {
+    "get_temperature": 60.0,
+    "get_current_weather": 60.0,
 }
+RESULT_CACHE = ResultCache(max_bytes=RESULT_CACHE_MAX_BYTES)
+
+# Maximum time to wait for a single server's tools/list during discovery.
+DISCOVERY_TIMEOUT = 10.0
+
+# The current tool registry snapshot. This is populated on startup and replaced,
+# never mutated, by each refresh.
+REGISTRY = ToolRegistry()
+
+# Logs go to stderr at GATEWAY_LOG_LEVEL (DEBUG also logs every tools/call), as
+# key=value text or, with GATEWAY_LOG_FORMAT=json, JSON lines.
+LOG_LEVEL = os.getenv("GATEWAY_LOG_LEVEL", "INFO")
+LOG_FORMAT = os.getenv("GATEWAY_LOG_FORMAT", "text")
+configure_logging(LOG_LEVEL, LOG_FORMAT)
 
-# A cache to map a tool name to its server URL. This is populated on startup.
-TOOL_TO_SERVER_CACHE = {}
+# OpenTelemetry spans for request parsing, routing, upstream calls and response
+# serialization: "otel" (use the process's tracer provider), "console", or off.
+TRACING = os.getenv("GATEWAY_TRACING", "").lower()
 
-# A cache to map a tool name to it's metadata
-TOOL_METADATA_CACHE = {}  # tool_name → metadata dict
+# Metrics served on GET /metrics in the Prometheus text format
+METRICS = MetricsRegistry()
+REQUESTS = METRICS.counter("gateway_requests_total", "JSON-RPC messages received, by method.", ("method",))
+JSONRPC_ERRORS = METRICS.counter("gateway_jsonrpc_errors_total", "JSON-RPC errors returned by the gateway, by code.", ("code",))
+TOOL_CALL_SECONDS = METRICS.histogram(
+    "gateway_tool_call_duration_seconds", "tools/call latency until the response body is sent.", ("tool", "server")
+)
+UPSTREAM_SECONDS = METRICS.histogram(
+    "gateway_upstream_request_duration_seconds", "Latency of requests to upstream servers, until the response headers.", ("server",)
+)
+REFRESH_SECONDS = METRICS.histogram("gateway_tool_refresh_duration_seconds", "Duration of a full tool discovery of all servers.")
+DISCOVERY_SECONDS = METRICS.histogram("gateway_tool_discovery_duration_seconds", "Duration of tools/list discovery, per server.", ("server",))
+DISCOVERY_FAILURES = METRICS.counter("gateway_tool_discovery_failures_total", "Failed tools/list discoveries, per server.", ("server",))
+
+# Read from the state the gateway keeps anyway, at scrape time
+CIRCUIT_STATES = {"closed": 0, "half_open": 1, "open": 2}
+METRICS.callback(
+    "gateway_upstream_in_flight", "Requests in flight to each server.", ("server",),
+    lambda: (((name,), server.limiter.in_flight) for name, server in SERVER_REGISTRY.items()),
+)
+METRICS.callback(
+    "gateway_upstream_queued", "Requests waiting for a concurrency slot of each server.", ("server",),
+    lambda: (((name,), server.limiter.waiting) for name, server in SERVER_REGISTRY.items()),
+)
+METRICS.callback(
+    "gateway_upstream_circuit_state", "Circuit breaker state of each server: 0 closed, 1 half-open, 2 open.", ("server",),
+    lambda: (((name,), CIRCUIT_STATES[server.breaker.state]) for name, server in SERVER_REGISTRY.items()),
+)
+METRICS.callback(
+    "gateway_replica_outstanding", "Requests in flight to each replica.", ("server", "replica"),
+    lambda: (((name, r.url), r.outstanding) for name, server in SERVER_REGISTRY.items() for r in server.replicas),
+)
+METRICS.callback(
+    "gateway_replica_healthy", "Whether each replica passes its health checks.", ("server", "replica"),
+    lambda: (((name, r.url), int(r.healthy)) for name, server in SERVER_REGISTRY.items() for r in server.replicas),
+)
+METRICS.callback(
+    "gateway_session_handshakes_total", "MCP initialize handshakes with each replica of a stateful server.", ("server", "replica"),
+    lambda: (((name, r.url), r.sessions.handshakes) for name, server in SERVER_REGISTRY.items()
+             for r in server.replicas if r.sessions is not None),
+    "counter",
+)
+METRICS.callback("gateway_registry_version", "Version of the tool registry snapshot.", (), lambda: [((), REGISTRY.version)])
+METRICS.callback("gateway_tools", "Tools in the registry.", (), lambda: [((), len(REGISTRY.tool_metadata))])
+for stat, metric_type in (("hits", "counter"), ("misses", "counter"), ("coalesced", "counter"),
+                          ("evictions", "counter"), ("entries", "gauge"), ("bytes", "gauge")):
+    METRICS.callback(
+        f"gateway_result_cache_{stat}" + ("_total" if metric_type == "counter" else ""),
+        f"Result cache {stat}.", (), lambda stat=stat: [((), RESULT_CACHE.stats()[stat])], metric_type,
+    )
 
 # This dictionary will hold our application's state, including the httpx client.
 # This is the modern way to manage state in FastAPI.
@@ -29,15 +156,76 @@ async def periodic_tool_refresher(interval_seconds: int = 300):
     """Periodically refreshes the tool cache every `interval_seconds`."""
     while True:
         try:
-            print("[Tool Refresher] Refreshing tool cache...")
-            async with CACHE_LOCK:
-                await populate_tool_cache()
+            logger.debug("Refreshing tool cache")
+            await populate_tool_cache()
         except Exception as e:
-            print(f"[Tool Refresher] Error refreshing tools: {e}")
+            logger.error("Error refreshing tools", extra={"error": repr(e)})
         
         await asyncio.sleep(interval_seconds)
 
 
+async def check_replica_health(client: httpx.AsyncClient, server: UpstreamServer, replica: Replica):
+    """Pings a replica and updates its health, logging when it is ejected or comes back."""
+    pool = replica.sessions
+    if pool is not None and not pool.idle and pool.in_use >= pool.size:
+        return  # Every session is busy with requests, which report the replica's health themselves.
+
+    def ping(replica: Replica, headers: dict, timeout: float):
+        return client.post(replica.url, json={"jsonrpc": "2.0", "id": 0, "method": "ping"}, headers=headers, timeout=timeout)
+
+    try:
+        res, session_id = await asyncio.wait_for(
+            send_in_session(client, replica, pool, ping, {}, HEALTH_CHECK_TIMEOUT), HEALTH_CHECK_TIMEOUT
+        )
+        if session_id is not None:
+            pool.release(session_id)
+        healthy = res.status_code == 200 and "result" in extract_json_body_from_response(res)
+    except (httpx.HTTPError, ValueError, asyncio.TimeoutError):
+        healthy = False
+
+    was_healthy = replica.healthy
+    if healthy:
+        replica.record_success()
+    else:
+        replica.record_failure(UNHEALTHY_THRESHOLD)
+
+    if was_healthy != replica.healthy:
+        if replica.healthy:
+            logger.info("Replica is healthy again", extra={"server": server.name, "replica": replica.url})
+        else:
+            logger.warning("Replica is unhealthy, ejected", extra={"server": server.name, "replica": replica.url})
+
+
+async def periodic_health_checker(interval_seconds: float = HEALTH_CHECK_INTERVAL):
+    """Actively health-checks every replica of every server every `interval_seconds`."""
+    client = lifespan_context["http_client"]
+    while True:
+        await asyncio.gather(*(
+            check_replica_health(client, server, replica)
+            for server in list(SERVER_REGISTRY.values())
+            for replica in server.replicas
+        ))
+        await asyncio.sleep(interval_seconds)
+
+
+def build_transport_mounts() -> dict:
+    """
+    Gives every replica origin its own connection pool, sized by its server's
+    `max_connections`, so one server cannot exhaust the connections of the others.
+    Servers added later through /admin/servers share the default pool.
+    """
+    mounts = {}
+    for server in SERVER_REGISTRY.values():
+        limits = httpx.Limits(
+            max_connections=server.settings["max_connections"],
+            max_keepalive_connections=server.settings["max_connections"],
+        )
+        for replica in server.replicas:
+            url = httpx.URL(replica.url)
+            mounts[f"{url.scheme}://{url.netloc.decode('ascii')}"] = httpx.AsyncHTTPTransport(limits=limits)
+    return mounts
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # --- Code to run on startup ---
@@ -46,35 +234,177 @@ async def lifespan(app: FastAPI):
         "Accept": 'application/json, text/event-stream',
         "Content-Type": 'application/json'
     }
-    lifespan_context["http_client"] = httpx.AsyncClient(timeout=30.0, headers=client_headers)
-    print("Gateway starting up: HTTP Client created.")
+    lifespan_context["http_client"] = httpx.AsyncClient(
+        timeout=UPSTREAM_TIMEOUT, headers=client_headers, mounts=build_transport_mounts()
+    )
+    logger.info("Gateway starting up: HTTP client created")
+    if TRACING:
+        configure_tracing(TRACING)
     
-    # Populate the tool cache on startup
-    async with CACHE_LOCK:
+    # Import the embedded servers, then populate the tool cache on startup
+    for server in SERVER_REGISTRY.values():
+        if server.embedded is not None:
+            server.embedded.start()
+    if REGISTRY_FILE:
+        leader = await join_shared_registry()
+    else:
+        leader = True
         await populate_tool_cache()
+    await asyncio.gather(*(warm_sessions(server) for server in SERVER_REGISTRY.values()))
     
-    # Start periodic refresher task
-    app.state._refresh_task = asyncio.create_task(periodic_tool_refresher())
+    # Start periodic refresher and health checker tasks
+    app.state._background_tasks = [asyncio.create_task(periodic_health_checker())]
+    if leader:
+        app.state._background_tasks.append(asyncio.create_task(periodic_tool_refresher()))
+    if REGISTRY_FILE:
+        app.state._background_tasks.append(asyncio.create_task(periodic_registry_sync()))
     
     yield  # The application is now running
     
     # --- Code to run on shutdown ---
     
-    # Shutdown: cancel background task and close client
-    app.state._refresh_task.cancel()
-    try:
-        await app.state._refresh_task
-    except asyncio.CancelledError:
-        pass
+    # Shutdown: cancel background tasks and close client
+    for task in app.state._background_tasks:
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
     
-    # Gracefully close the client and its connections.
-    await lifespan_context["http_client"].aclose()
-    print("Gateway shutting down: HTTP Client closed.")
+    # End the idle sessions of stateful servers, then gracefully close the client and its connections.
+    client = lifespan_context["http_client"]
+    await asyncio.gather(*(
+        delete_session(client, replica, session_id)
+        for server in SERVER_REGISTRY.values()
+        for replica in server.replicas if replica.sessions is not None
+        for session_id in replica.sessions.idle
+    ))
+    await client.aclose()
+    for server in SERVER_REGISTRY.values():
+        if server.embedded is not None:
+            server.embedded.stop()
+    if REGISTRY_FILE:
+        lifespan_context["shared_registry"].close()
+        lifespan_context["leader_lock"].close()
+    shutdown_tracing()
+    logger.info("Gateway shutting down: HTTP client closed")
 
 
 app = FastAPI(title="MCP Gateway", lifespan=lifespan)
 
 
+async def join_shared_registry() -> bool:
+    """
+    Opens the registry shared by the gateway's workers and adopts its current snapshot.
+    The first worker to get the leader lock discovers the tools and publishes them.
+    The others wait for that first snapshot. Returns whether this worker leads.
+    """
+    from shared_registry import LeaderLock, SharedSnapshot  # fcntl is POSIX only
+
+    snapshot = lifespan_context["shared_registry"] = SharedSnapshot(REGISTRY_FILE)
+    leader = lifespan_context["leader_lock"] = LeaderLock(REGISTRY_FILE + ".leader")
+    lifespan_context["shared_version"] = 0
+    apply_shared_registry(*snapshot.read())
+
+    if leader.try_acquire():
+        logger.info("This worker leads tool discovery", extra={"pid": os.getpid()})
+        await populate_tool_cache()
+        return True
+
+    started = time.monotonic()
+    while snapshot.version == 0:
+        if time.monotonic() - started > REGISTRY_STARTUP_TIMEOUT:
+            logger.warning("No tools published by the leader worker yet; starting without them")
+            return False
+        await asyncio.sleep(0.1)
+    apply_shared_registry(*snapshot.read())
+    return False
+
+
+def apply_shared_registry(version: int, document: dict | None):
+    """
+    Makes a snapshot of the shared registry this worker's own: its servers replace
+    SERVER_REGISTRY and its tools replace REGISTRY. Servers whose config is unchanged
+    are kept as they are, with their health, breaker and load state.
+    """
+    global REGISTRY
+    lifespan_context["shared_version"] = version
+    if document is None:
+        return
+
+    base_dir = os.path.dirname(os.path.abspath(SERVERS_FILE))
+    servers = {}
+    for name, config in document["servers"].items():
+        previous = SERVER_REGISTRY.get(name)
+        if previous is not None and previous.to_config() == config:
+            servers[name] = previous
+            continue
+        try:
+            server = UpstreamServer.from_config(name, config, previous, base_dir)
+            if server.embedded is not None:
+                server.embedded.start()
+        except (ValueError, AttributeError, ImportError, OSError, SyntaxError) as e:
+            logger.error("Could not adopt shared server config", extra={"server": name, "error": repr(e)})
+            continue
+        servers[name] = server
+
+    for name, server in SERVER_REGISTRY.items():
+        replacement = servers.get(name)
+        if server.embedded is not None and (replacement is None or replacement.embedded is not server.embedded):
+            server.embedded.stop()
+    SERVER_REGISTRY.clear()
+    SERVER_REGISTRY.update(servers)
+
+    tools = {name: tuple(entry) for name, entry in document["tools"].items() if name in servers}
+    if tools != dict(REGISTRY.servers):
+        REGISTRY = ToolRegistry.from_servers(tools, REGISTRY.version + 1)
+
+
+def publish_registry(changed=(), deleted=()):
+    """
+    Merges this worker's registry into the shared one, if any, and adopts the result.
+
+    Servers in `changed` (added or reconfigured through this worker) overwrite their
+    shared entry, and servers in `deleted` are removed. For the other servers only
+    tools are published, and only while the server's config matches the shared one,
+    so a refresh on stale config cannot undo another worker's admin change.
+    """
+    snapshot = lifespan_context.get("shared_registry")
+    if snapshot is None:
+        return
+
+    def merge(document: dict | None) -> dict:
+        servers = dict(document["servers"]) if document else {}
+        tools = dict(document["tools"]) if document else {}
+        for name in deleted:
+            servers.pop(name, None)
+        for name, server in SERVER_REGISTRY.items():
+            config = server.to_config()
+            if document is None or name in changed:
+                servers[name] = config
+            if servers.get(name) == config and name in REGISTRY.servers:
+                tools[name] = list(REGISTRY.servers[name])
+        return {"servers": servers, "tools": {name: entry for name, entry in tools.items() if name in servers}}
+
+    apply_shared_registry(*snapshot.update(merge))
+
+
+async def periodic_registry_sync(interval_seconds: float = REGISTRY_POLL_INTERVAL):
+    """
+    Adopts the snapshots other workers publish to the shared registry, and takes over
+    the periodic tool discovery if the leader worker exits.
+    """
+    snapshot = lifespan_context["shared_registry"]
+    leader = lifespan_context["leader_lock"]
+    while True:
+        if snapshot.version != lifespan_context["shared_version"]:
+            apply_shared_registry(*snapshot.read())
+        if not leader.held and leader.try_acquire():
+            logger.info("This worker took over tool discovery", extra={"pid": os.getpid()})
+            app.state._background_tasks.append(asyncio.create_task(periodic_tool_refresher()))
+        await asyncio.sleep(interval_seconds)
+
+
 def extract_json_body_from_response(res):
     raw = res.text
     if raw.startswith("event:"):
@@ -94,6 +424,319 @@ def extract_json_body_from_response(res):
     return json_body
 
 
+async def iter_and_close(chunks, resources: AsyncExitStack):
+    """
+    Yields `chunks` and always closes `resources` afterwards, releasing the upstream
+    connection. An interrupted stream is passed on to them as the exception it ended with.
+    """
+    try:
+        async for chunk in chunks:
+            yield chunk
+    except BaseException as e:
+        await resources.__aexit__(type(e), e, e.__traceback__)
+        raise
+    await resources.aclose()
+
+
+async def iter_sse_payload(pending: bytes, chunks):
+    """Yields the rest of an SSE `data:` line, stopping at its line terminator."""
+    while True:
+        end = pending.find(b"\n")
+        if end != -1:
+            yield pending[:end].rstrip(b"\r")
+            return
+
+        # Hold back a trailing CR in case the next chunk starts with LF.
+        keep = 1 if pending.endswith(b"\r") else 0
+        if len(pending) > keep:
+            yield pending[:len(pending) - keep]
+        pending = pending[len(pending) - keep:]
+
+        chunk = await anext(chunks, None)
+        if chunk is None:
+            return
+        pending += chunk
+
+
+async def open_sse_payload_stream(chunks):
+    """
+    Reads an SSE response only up to its first `data:` line and returns an
+    iterator over that line's JSON payload. The payload itself is never buffered,
+    so a multi-MB tool result flows through as it arrives.
+    """
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        while buffer:
+            if buffer.startswith(b"data:"):
+                return iter_sse_payload(buffer.removeprefix(b"data:").lstrip(b" "), chunks)
+            if b"data:".startswith(buffer):
+                break  # Need more bytes to tell whether this is a data line.
+            newline = buffer.find(b"\n")
+            if newline == -1:
+                break
+            buffer = buffer[newline + 1:]
+
+    raise ValueError("No data: line found in SSE response.")
+
+
+def request_deadline(headers) -> float:
+    """The monotonic deadline of a request: UPSTREAM_TIMEOUT, or less if the caller asked for less."""
+    timeout = UPSTREAM_TIMEOUT
+    try:
+        timeout = min(timeout, float(headers.get(DEADLINE_HEADER, timeout)))
+    except ValueError:
+        pass
+    return time.monotonic() + timeout
+
+
+def remaining_time(deadline: float) -> float:
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise DeadlineExceeded("Deadline exceeded before the request was sent upstream")
+    return remaining
+
+
+@asynccontextmanager
+async def admit(server: UpstreamServer, deadline: float):
+    """
+    Holds one of `server`'s concurrency slots for the duration of the block. Refuses
+    the request at once if the server's circuit is open or its queue is full.
+    """
+    if not server.breaker.allow():
+        raise UpstreamUnavailable(f"Server '{server.name}' is unavailable: circuit breaker is open")
+
+    limiter = server.limiter
+    try:
+        await limiter.acquire(remaining_time(deadline))
+    except UpstreamUnavailable:
+        raise UpstreamUnavailable(f"Server '{server.name}' is overloaded: request queue is full")
+    try:
+        yield
+    finally:
+        limiter.release()
+
+
+async def initialize_session(client: httpx.AsyncClient, replica: Replica) -> str:
+    """Opens an MCP session on a stateful replica: initialize, then notifications/initialized."""
+    res = await client.post(replica.url, json={
+        "jsonrpc": "2.0",
+        "id": 0,
+        "method": "initialize",
+        "params": {
+            "protocolVersion": MCP_PROTOCOL_VERSION,
+            "capabilities": {},
+            "clientInfo": {"name": "mcp-gateway", "version": "1.0"},
+        },
+    })
+    res.raise_for_status()
+    session_id = res.headers.get(SESSION_HEADER)
+    if not session_id:
+        raise ValueError(f"Replica {replica.url} returned no {SESSION_HEADER}; is the server stateful?")
+
+    res = await client.post(
+        replica.url, json={"jsonrpc": "2.0", "method": "notifications/initialized"}, headers={SESSION_HEADER: session_id}
+    )
+    res.raise_for_status()
+    return session_id
+
+
+async def delete_session(client: httpx.AsyncClient, replica: Replica, session_id: str):
+    """Ends a session on the server. Best effort: the server may be gone already."""
+    try:
+        await client.delete(replica.url, headers={SESSION_HEADER: session_id}, timeout=HEALTH_CHECK_TIMEOUT)
+    except httpx.HTTPError:
+        pass
+
+
+def abandon_session(client: httpx.AsyncClient, replica: Replica, pool: SessionPool, session_id: str):
+    """Drops a session left in an unknown state (e.g. by a timeout) and ends it on the server in the background."""
+    pool.discard(session_id)
+    task = asyncio.create_task(delete_session(client, replica, session_id))
+    SESSION_CLEANUP_TASKS.add(task)
+    task.add_done_callback(SESSION_CLEANUP_TASKS.discard)
+
+
+async def send_in_session(client: httpx.AsyncClient, replica: Replica, pool: SessionPool | None, send, headers: dict, timeout: float):
+    """
+    Runs `send(replica, headers, timeout)` and returns `(response, session id)`.
+
+    Stateless replicas get no session. For stateful ones a session is checked out of
+    `pool` (opening it if needed), and the caller must hand it back. If the server no
+    longer knows the session, e.g. after a restart, it is replaced and the request is
+    sent once more. The idle sessions are dropped too, since a server that lost one
+    session has usually lost them all.
+    """
+    if pool is None:
+        return await send(replica, headers, timeout), None
+
+    for attempt in range(2):
+        session_id = await pool.acquire(lambda: initialize_session(client, replica))
+        try:
+            response = await send(replica, {**headers, SESSION_HEADER: session_id}, timeout)
+        except BaseException:
+            abandon_session(client, replica, pool, session_id)
+            raise
+        if response.status_code not in SESSION_REJECTED_STATUS_CODES:
+            return response, session_id
+
+        pool.discard(session_id)
+        pool.clear_idle()
+        if attempt:
+            return response, None
+        await response.aclose()
+
+
+async def warm_sessions(server: UpstreamServer):
+    """Opens the full session pool of every replica of a stateful server ahead of its first requests."""
+    client = lifespan_context["http_client"]
+    for replica in server.replicas:
+        pool = replica.sessions
+        if pool is None:
+            continue
+        session_ids = await asyncio.gather(
+            *(pool.acquire(lambda: initialize_session(client, replica)) for _ in range(pool.size - pool.in_use)),
+            return_exceptions=True,
+        )
+        errors = [e for e in session_ids if isinstance(e, BaseException)]
+        for session_id in session_ids:
+            if isinstance(session_id, str):
+                pool.release(session_id)
+        if errors:
+            logger.warning("Could not open all sessions", extra={"server": server.name, "replica": replica.url, "error": repr(errors[0])})
+
+
+@asynccontextmanager
+async def upstream_request(server: UpstreamServer, send, deadline: float, count_in_breaker: bool = True):
+    """
+    Runs `send(replica, headers, timeout)` on a replica picked by the load balancer,
+    within the deadline, and yields `(replica, response)`. The replica, and the session
+    of a stateful server, stay checked out until the block exits, so a streamed
+    response can be read inside it.
+
+    A connection failure means the request never reached the replica, so the replica is
+    marked as failing and the request fails over to the next one. Timeouts, transport
+    errors and 5xx responses count against the server's circuit breaker, unless
+    `count_in_breaker` is false: requests that were not admitted through the breaker,
+    such as tool discovery, must neither open nor close it.
+    """
+    client = lifespan_context["http_client"]
+    breaker = server.breaker if count_in_breaker else None
+    tried = []
+    last_error = None
+    while True:
+        replica = server.pick(LOAD_BALANCING_POLICY, exclude=tried)
+        if replica is None:
+            if breaker is not None:
+                breaker.record_failure()
+            if last_error is None:
+                raise UpstreamUnavailable(f"Server '{server.name}' has no replicas")
+            raise last_error
+        tried.append(replica)
+
+        timeout = remaining_time(deadline)
+        pool = replica.sessions
+        replica.acquire()
+        started = time.perf_counter()
+        try:
+            with span("gateway.upstream", {"server": server.name, "replica": replica.url}):
+                response, session_id = await asyncio.wait_for(
+                    send_in_session(client, replica, pool, send, upstream_headers(timeout), timeout), timeout
+                )
+        except (httpx.ConnectError, httpx.ConnectTimeout) as e:
+            replica.record_failure(UNHEALTHY_THRESHOLD)
+            last_error = e
+            continue
+        except (asyncio.TimeoutError, httpx.TimeoutException):
+            if breaker is not None:
+                breaker.record_failure()
+            raise DeadlineExceeded(f"Server '{server.name}' did not answer before the deadline")
+        except httpx.TransportError:
+            if breaker is not None:
+                breaker.record_failure()
+            raise
+        finally:
+            replica.release()
+            UPSTREAM_SECONDS.observe(time.perf_counter() - started, server.name)
+        break
+
+    replica.record_success()
+    if breaker is not None:
+        if response.status_code >= 500:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+
+    replica.acquire()
+    try:
+        yield replica, response
+    except BaseException:
+        # The response may not have been read to the end, so the session is not reused.
+        if session_id is not None:
+            abandon_session(client, replica, pool, session_id)
+        raise
+    else:
+        if session_id is not None:
+            pool.release(session_id)
+    finally:
+        replica.release()
+
+
+def upstream_headers(timeout: float) -> dict:
+    """Headers passing the caller's remaining time on to the upstream server."""
+    return {DEADLINE_HEADER: f"{timeout:.3f}"}
+
+
+def upstream_error(e: Exception, error_id=None) -> tuple[int, dict]:
+    """Maps an exception from an upstream call to an HTTP status and a JSON-RPC error."""
+    if isinstance(e, UpstreamUnavailable):
+        return 503, build_jsonrpc_error(-32000, str(e), error_id)
+    if isinstance(e, DeadlineExceeded):
+        return 504, build_jsonrpc_error(-32000, str(e), error_id)
+    if isinstance(e, httpx.HTTPStatusError):
+        return e.response.status_code, build_jsonrpc_error(-32000, f"Upstream server error: {e}", error_id)
+    return 500, build_jsonrpc_error(-32603, str(e), error_id)
+
+
+async def proxy_tool_call(client: httpx.AsyncClient, server: UpstreamServer, body: dict, accept: str, deadline: float):
+    """
+    Proxies a tools/call to one of `server`'s replicas and streams the upstream body back.
+
+    Callers that accept `text/event-stream` get the upstream SSE bytes verbatim.
+    Everyone else gets the JSON payload of the first `data:` line, unwrapped on the fly.
+    Only error responses are read in full, so they can be mapped to JSON-RPC errors.
+    The server's concurrency slot and the replica are held until the body has been streamed.
+    """
+    def open_stream(replica: Replica, headers: dict, timeout: float):
+        request = client.build_request("POST", replica.url, json=body, headers=headers, timeout=timeout)
+        return client.send(request, stream=True)
+
+    resources = AsyncExitStack()
+    try:
+        await resources.enter_async_context(admit(server, deadline))
+        _, upstream = await resources.enter_async_context(upstream_request(server, open_stream, deadline))
+        resources.push_async_callback(upstream.aclose)
+
+        if upstream.is_error:
+            await upstream.aread()
+            upstream.raise_for_status()
+
+        content_type = upstream.headers.get("content-type", "application/json")
+        chunks = upstream.aiter_bytes()
+        if content_type.startswith("text/event-stream") and "text/event-stream" not in accept:
+            chunks = await open_sse_payload_stream(chunks)
+            content_type = "application/json"
+    except BaseException as e:
+        await resources.__aexit__(type(e), e, e.__traceback__)
+        raise
+
+    return StreamingResponse(
+        iter_and_close(chunks, resources),
+        status_code=upstream.status_code,
+        media_type=content_type,
+    )
+
+
 def build_error_response(message: str, error_id: int = 1) -> dict:
     return {
         "jsonrpc": "2.0",
@@ -107,88 +750,398 @@ def build_error_response(message: str, error_id: int = 1) -> dict:
     }
 
 
-async def populate_tool_cache():
-    """Discovers tools from all registered servers and populates the cache."""
-    global TOOL_TO_SERVER_CACHE
-    global TOOL_METADATA_CACHE
-    TOOL_TO_SERVER_CACHE.clear()
-    TOOL_METADATA_CACHE.clear()
-    
-    client = lifespan_context["http_client"]
-    discover_tasks = [
-        client.post(url, json={"jsonrpc": "2.0", "id": 1, "method": "tools/list", "params": {}})
-        for name, url in SERVER_REGISTRY.items()
+def build_jsonrpc_error(code: int, message: str, error_id=None) -> dict:
+    JSONRPC_ERRORS.inc(code)
+    return {"jsonrpc": "2.0", "error": {"code": code, "message": message}, "id": error_id}
+
+
+def tool_call_name(message: dict) -> str | None:
+    """The tool a tools/call message names, or None if its params are not an object with a name."""
+    params = message.get("params")
+    if isinstance(params, dict) and isinstance(params.get("name"), str):
+        return params["name"] or None
+    return None
+
+
+async def call_embedded(server: UpstreamServer, body: dict, deadline: float) -> dict:
+    """
+    Calls a tool of an embedded server in process and returns the JSON-RPC response.
+    As with replicas, a missed deadline counts against the server's circuit breaker.
+    """
+    params = body.get("params") or {}
+    started = time.perf_counter()
+    try:
+        with span("gateway.upstream", {"server": server.name, "replica": "embedded"}):
+            result = await server.embedded.call_tool(params.get("name"), params.get("arguments"), remaining_time(deadline))
+    except asyncio.TimeoutError:
+        server.breaker.record_failure()
+        raise DeadlineExceeded(f"Server '{server.name}' did not answer before the deadline")
+    finally:
+        UPSTREAM_SECONDS.observe(time.perf_counter() - started, server.name)
+    server.breaker.record_success()
+    return {"jsonrpc": "2.0", "id": body.get("id"), "result": result}
+
+
+async def call_upstream(client: httpx.AsyncClient, server: UpstreamServer, body: dict, deadline: float) -> dict:
+    """Proxies one JSON-RPC message to one of `server`'s replicas, or its embedded server, and returns the parsed response."""
+    if server.embedded is not None:
+        async with admit(server, deadline):
+            return await call_embedded(server, body, deadline)
+
+    def post(replica: Replica, headers: dict, timeout: float):
+        return client.post(replica.url, json=body, headers=headers, timeout=timeout)
+
+    async with admit(server, deadline), upstream_request(server, post, deadline) as (_, proxy_response):
+        json_response = extract_json_body_from_response(proxy_response)
+    proxy_response.raise_for_status()  # Raise an exception for 4xx/5xx responses
+    return json_response
+
+
+class UpstreamErrorResponse(Exception):
+    """Raised inside the result cache for JSON-RPC error responses, which are passed on but never cached."""
+
+    def __init__(self, response: dict):
+        super().__init__(response.get("error"))
+        self.response = response
+
+
+def result_cache_ttl(registry: ToolRegistry, tool_name: str) -> float | None:
+    """The result cache TTL of a tool, or None if its results must not be cached."""
+    if not RESULT_CACHE_ENABLED:
+        return None
+    if tool_name in RESULT_CACHE_TTLS:
+        return RESULT_CACHE_TTLS[tool_name]
+    if annotated_as_pure(registry.tool_metadata.get(tool_name, {})):
+        return RESULT_CACHE_DEFAULT_TTL
+    return None
+
+
+async def call_tool_buffered(
+    client: httpx.AsyncClient, registry: ToolRegistry, server: UpstreamServer, body: dict, deadline: float
+) -> dict:
+    """Proxies a tools/call and returns the parsed response, served from the result cache where allowed."""
+    params = body.get("params") or {}
+    ttl = result_cache_ttl(registry, params.get("name"))
+    if ttl is None:
+        return await call_upstream(client, server, body, deadline)
+
+    async def call():
+        response = await call_upstream(client, server, body, deadline)
+        if "result" not in response:
+            raise UpstreamErrorResponse(response)
+        return response["result"]
+
+    # Cached and shared results must carry this caller's own id.
+    try:
+        result = await RESULT_CACHE.get_or_call(cache_key(params["name"], params.get("arguments")), ttl, call)
+    except UpstreamErrorResponse as e:
+        return {**e.response, "id": body.get("id")}
+    return {"jsonrpc": "2.0", "id": body.get("id"), "result": result}
+
+
+async def handle_batch(client: httpx.AsyncClient, registry: ToolRegistry, messages: list, deadline: float) -> JSONResponse:
+    """
+    Handles a JSON-RPC batch. tools/call messages are grouped by target server and
+    each server's group is dispatched concurrently with the others. Every message gets
+    its own response or error, returned in request order; notifications get none.
+    """
+    if not messages:
+        return JSONResponse(content=build_jsonrpc_error(-32600, "Invalid Request: empty batch"), status_code=400)
+
+    responses = [None] * len(messages)
+    server_calls: dict[UpstreamServer, list[int]] = {}
+
+    for i, message in enumerate(messages):
+        if not isinstance(message, dict):
+            responses[i] = build_jsonrpc_error(-32600, "Invalid Request")
+            continue
+
+        method = message.get("method")
+        REQUESTS.inc(method if method in ("tools/list", "tools/call") else "other")
+        if method == "tools/list":
+            responses[i] = {"jsonrpc": "2.0", "id": message.get("id"), "result": {"tools": registry.tools}}
+        elif method == "tools/call":
+            tool_name = tool_call_name(message)
+            server = SERVER_REGISTRY.get(registry.tool_to_server.get(tool_name))
+            if not tool_name:
+                responses[i] = build_jsonrpc_error(-32602, "Tool name not provided in MCP tools/call", message.get("id"))
+            elif not server:
+                responses[i] = build_error_response(f"Tool '{tool_name}' not found.", message.get("id"))
+            else:
+                server_calls.setdefault(server, []).append(i)
+        else:
+            responses[i] = build_jsonrpc_error(-32601, f"Unsupported MCP method: {method}", message.get("id"))
+
+    async def call_timed(server: UpstreamServer, message: dict):
+        started = time.perf_counter()
+        try:
+            return await call_tool_buffered(client, registry, server, message, deadline)
+        finally:
+            TOOL_CALL_SECONDS.observe(time.perf_counter() - started, message["params"]["name"], server.name)
+
+    async def dispatch(server: UpstreamServer, indexes: list[int]):
+        results = await asyncio.gather(
+            *(call_timed(server, messages[i]) for i in indexes),
+            return_exceptions=True,
+        )
+        for i, result in zip(indexes, results):
+            if isinstance(result, Exception):
+                _, result = upstream_error(result, messages[i].get("id"))
+            responses[i] = result
+
+    await asyncio.gather(*(dispatch(server, indexes) for server, indexes in server_calls.items()))
+
+    content = [
+        response for message, response in zip(messages, responses)
+        if not (isinstance(message, dict) and "id" not in message)
     ]
-    
-    results = await asyncio.gather(*discover_tasks, return_exceptions=True)
+    return JSONResponse(content=content)
 
-    for server_name, res in zip(SERVER_REGISTRY.keys(), results):
-        if isinstance(res, httpx.Response) and res.status_code == 200:
-            try:
-                json_body = extract_json_body_from_response(res)
-                
-                tools = json_body["result"]["tools"]
-                for tool in tools:
-                    TOOL_TO_SERVER_CACHE[tool["name"]] = SERVER_REGISTRY[server_name]
-                    TOOL_METADATA_CACHE[tool["name"]] = tool
-            except (KeyError, IndexError, TypeError):
-                print(f"Warning: Could not parse tools from server: {server_name}")
-            except ValueError as e:
-                print(f"Data response from {server_name} not found: {e}")
+
+async def discover_server_tools(server: UpstreamServer) -> list | None:
+    """The tools of a single server, or None if discovery fails."""
+    client = lifespan_context["http_client"]
+    server_name = server.name
+    started = time.perf_counter()
+
+    def discover(replica: Replica, headers: dict, timeout: float):
+        return client.post(
+            replica.url,
+            json={"jsonrpc": "2.0", "id": 1, "method": "tools/list", "params": {}},
+            headers=headers,
+            timeout=timeout,
+        )
+
+    try:
+        if server.embedded is not None:
+            tools = await server.embedded.list_tools(DISCOVERY_TIMEOUT)
         else:
-            print(f"Warning: Could not discover tools from server: {server_name}. Error: {res}")
-            
-    print("Tool cache populated:", TOOL_TO_SERVER_CACHE)
+            async with upstream_request(
+                server, discover, time.monotonic() + DISCOVERY_TIMEOUT, count_in_breaker=False
+            ) as (_, res):
+                if res.status_code != 200:
+                    raise ValueError(f"Unexpected response: {res}")
+                tools = extract_json_body_from_response(res)["result"]["tools"]
+    except (httpx.HTTPError, DeadlineExceeded, UpstreamUnavailable, asyncio.TimeoutError, RuntimeError, KeyError, IndexError, TypeError, ValueError) as e:
+        DISCOVERY_FAILURES.inc(server_name)
+        logger.warning("Could not discover tools from server", extra={"server": server_name, "error": repr(e)})
+        return None
+    finally:
+        DISCOVERY_SECONDS.observe(time.perf_counter() - started, server_name)
+    return tools
+
+
+async def refresh_server_tools(server: UpstreamServer):
+    """
+    Discovers the tools of a single server and publishes them in a new registry snapshot.
+    If discovery fails, the server keeps the tools from its last successful refresh.
+    """
+    global REGISTRY
+    tools = await discover_server_tools(server)
+    # The server may have been removed through the admin API while we were waiting.
+    if tools is not None and SERVER_REGISTRY.get(server.name) is server:
+        REGISTRY = REGISTRY.with_server(server.name, tools)
+
+
+async def populate_tool_cache():
+    """
+    Discovers tools from all registered servers and swaps them into the registry.
+    Servers are refreshed independently, so a slow or dead server neither delays
+    nor wipes the tools of the others.
+    """
+    global REGISTRY
+    async with CACHE_LOCK:
+        started = time.perf_counter()
+        await asyncio.gather(*(
+            refresh_server_tools(server) for server in list(SERVER_REGISTRY.values())
+        ))
+        REGISTRY = REGISTRY.without_servers(set(REGISTRY.servers) - set(SERVER_REGISTRY))
+        REFRESH_SECONDS.observe(time.perf_counter() - started)
+        publish_registry()
+
+    logger.info("Tool cache populated", extra={"version": REGISTRY.version, "tools": dict(REGISTRY.tool_to_server)})
+
+
+async def record_tool_call(tool_name: str, server_name: str, started: float):
+    """Runs once the response body has been sent, so streamed calls are timed in full."""
+    TOOL_CALL_SECONDS.observe(time.perf_counter() - started, tool_name, server_name)
 
 
 @app.post("/mcp")
 async def mcp_gateway(request: Request):
     """The main gateway endpoint that routes MCP requests using the shared client."""
     client = lifespan_context["http_client"]
-    
+    # Read the snapshot once so the whole request sees a consistent registry.
+    registry = REGISTRY
+    deadline = request_deadline(request.headers)
+
     try:
-        body = await request.json()
+        with span("gateway.parse"):
+            body = await request.json()
+        if isinstance(body, list):
+            return await handle_batch(client, registry, body, deadline)
+
         method = body.get("method")
-        
+        REQUESTS.inc(method if method in ("tools/list", "tools/call") else "other")
+
         if method == "tools/list":
-            return JSONResponse(
-                status_code=200, 
-                content={
-                            "jsonrpc": "2.0",
-                            "id": body.get("id"),
-                            "result": {
-                                    "tools": list(TOOL_METADATA_CACHE.values())
-                                }
-                        }
-                )
+            # Clients that already hold this catalogue revalidate it for free.
+            etag = registry.etag
+            if request.headers.get("if-none-match") == etag:
+                return Response(status_code=304, headers={"ETag": etag})
+
+            with span("gateway.serialize"):
+                return JSONResponse(
+                    status_code=200, 
+                    headers={"ETag": etag},
+                    content={
+                                "jsonrpc": "2.0",
+                                "id": body.get("id"),
+                                "result": {
+                                        "tools": registry.tools
+                                    }
+                            }
+                    )
 
         if method == "tools/call":
-            tool_name = body.get("params", {}).get("name")
+            tool_name = tool_call_name(body)
             if not tool_name:
-                raise HTTPException(status_code=400, detail="Tool name not provided in MCP tools/call")
+                return JSONResponse(
+                    status_code=400,
+                    content=build_jsonrpc_error(-32602, "Tool name not provided in MCP tools/call", body.get("id")),
+                )
 
-            server_url = TOOL_TO_SERVER_CACHE.get(tool_name)
-            if not server_url:
+            with span("gateway.route", {"tool": tool_name}):
+                server = SERVER_REGISTRY.get(registry.tool_to_server.get(tool_name))
+            if not server:
                 return JSONResponse(status_code=404, content=build_error_response(f"Tool '{tool_name}' not found.", body.get("id")))
 
-            print(f"Tool {tool_name} is present in the server {server_url}")
-            # Proxy the request to the identified server using the shared client
-            proxy_response = await client.post(server_url, json=body)
-            json_response = extract_json_body_from_response(proxy_response)
-            proxy_response.raise_for_status()  # Raise an exception for 4xx/5xx responses
-            return JSONResponse(content=json_response, status_code=proxy_response.status_code)
+            logger.debug("Routing tools/call", extra={"tool": tool_name, "server": server.name})
+            started = time.perf_counter()
+            try:
+                # Embedded servers answer in process, so there is nothing to stream.
+                if STREAMING_PROXY and server.embedded is None and result_cache_ttl(registry, tool_name) is None:
+                    response = await proxy_tool_call(client, server, body, request.headers.get("accept", ""), deadline)
+                else:
+                    # Proxy the request to the identified server using the shared client
+                    result = await call_tool_buffered(client, registry, server, body, deadline)
+                    with span("gateway.serialize"):
+                        response = JSONResponse(content=result)
+            except Exception:
+                TOOL_CALL_SECONDS.observe(time.perf_counter() - started, tool_name, server.name)
+                raise
+            response.background = BackgroundTask(record_tool_call, tool_name, server.name, started)
+            return response
     
         else:
             # For a production gateway, you might want to proxy other valid MCP methods too
             raise HTTPException(status_code=400, detail="Unsupported MCP method: {method}")
 
-    except httpx.HTTPStatusError as e:
-         return JSONResponse(content={"jsonrpc": "2.0", "error": {"code": -32000, "message": f"Upstream server error: {e}"}, "id": body.get("id")}, status_code=e.response.status_code)
+    except (httpx.HTTPStatusError, UpstreamUnavailable, DeadlineExceeded) as e:
+        status_code, content = upstream_error(e, body.get("id"))
+        return JSONResponse(content=content, status_code=status_code)
     except Exception as e:
-        return JSONResponse(content={"jsonrpc": "2.0", "error": {"code": -32603, "message": str(e)}, "id": None}, status_code=500)
+        return JSONResponse(content=build_jsonrpc_error(-32603, str(e)), status_code=500)
+
+
+@app.get("/metrics")
+async def get_metrics():
+    """All gateway metrics, including the result cache stats, in the Prometheus text format."""
+    return Response(METRICS.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+
+@app.get("/cache/stats")
+async def cache_stats():
+    """Hit, miss and size counters of the tools/call result cache."""
+    return {"enabled": RESULT_CACHE_ENABLED, **RESULT_CACHE.stats()}
+
+
+@app.get("/admin/servers")
+async def list_servers():
+    """The registered servers with the health and load of each replica."""
+    return {name: server.to_dict() for name, server in SERVER_REGISTRY.items()}
+
+
+@app.put("/admin/servers/{server_name}")
+async def put_server(server_name: str, request: Request):
+    """
+    Adds or replaces a server. The body is a config entry as in servers.json, e.g.
+    `{"replicas": ["http://localhost:3001/mcp/", "http://localhost:3011/mcp/"]}`.
+    Replicas that were already registered keep their health state. The server is only
+    registered once its tools could be discovered.
+
+    Embedded servers run code in the gateway's process, so they can only be set up
+    here if ADMIN_EMBEDDED_SERVERS is enabled. Their paths are relative to the servers file.
+    """
+    global REGISTRY
+    config = await request.json()
+    if isinstance(config, dict) and config.get("embedded") is not None and not ADMIN_EMBEDDED_SERVERS:
+        raise HTTPException(
+            status_code=403,
+            detail="Embedded servers can only be configured in the servers file, unless GATEWAY_ADMIN_EMBEDDED is enabled",
+        )
+
+    previous = SERVER_REGISTRY.get(server_name)
+    try:
+        server = UpstreamServer.from_config(server_name, config, previous, os.path.dirname(os.path.abspath(SERVERS_FILE)))
+        if server.embedded is not None:
+            server.embedded.start()
+    except (ValueError, AttributeError, ImportError, OSError, SyntaxError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    started_here = server.embedded is not None and (previous is None or previous.embedded is not server.embedded)
+    tools = await discover_server_tools(server)
+    if tools is None:
+        if started_here:
+            server.embedded.stop()
+        raise HTTPException(status_code=502, detail=f"Could not discover the tools of server '{server_name}'")
+
+    if previous is not None and previous.embedded is not None and previous.embedded is not server.embedded:
+        previous.embedded.stop()
+    SERVER_REGISTRY[server_name] = server
+    REGISTRY = REGISTRY.with_server(server_name, tools)
+    publish_registry(changed={server_name})
+    await warm_sessions(server)
+    return {server_name: server.to_dict(), "tools": [tool["name"] for tool in REGISTRY.servers.get(server_name, ())]}
+
+
+@app.delete("/admin/servers/{server_name}")
+async def delete_server(server_name: str):
+    """Removes a server and its tools."""
+    global REGISTRY
+    server = SERVER_REGISTRY.pop(server_name, None)
+    if server is None:
+        raise HTTPException(status_code=404, detail=f"Server '{server_name}' not found")
+    if server.embedded is not None:
+        server.embedded.stop()
+    REGISTRY = REGISTRY.without_servers({server_name})
+    publish_registry(deleted={server_name})
+    return {"deleted": server_name}
+
+
+@app.post("/admin/refresh")
+async def refresh_tools():
+    """Rediscovers the tools of every server now, without waiting for the periodic refresh."""
+    await populate_tool_cache()
+    return {"version": REGISTRY.version, "tools": len(REGISTRY.tool_metadata)}
 
 
 if __name__ == "__main__":
-    print("Hello from MCP Gateway!")
+    parser = argparse.ArgumentParser(description="MCP Gateway")
+    parser.add_argument(
+        "--workers", type=int, default=1,
+        help="Worker processes. With more than one, the workers share one tool registry, discovered by one of them.",
+    )
+    args = parser.parse_args()
+
+    logger.info("Hello from MCP Gateway!")
     import uvicorn
-    uvicorn.run(app, host="127.0.0.1", port=8000)
+    if args.workers > 1:
+        registry_dir = tempfile.mkdtemp(prefix="mcp-gateway-")
+        os.environ["GATEWAY_REGISTRY_FILE"] = os.path.join(registry_dir, "registry")
+        try:
+            uvicorn.run("gateway:app", host="127.0.0.1", port=8000, workers=args.workers)
+        finally:
+            shutil.rmtree(registry_dir, ignore_errors=True)
+    else:
+        uvicorn.run(app, host="127.0.0.1", port=8000)
@@ -0,0 +1,76 @@
+from dataclasses import dataclass, field
+from functools import cached_property
+from types import MappingProxyType
+import hashlib
+import json
+from typing import Mapping
+
+
+def _freeze(mapping: dict) -> Mapping:
+    return MappingProxyType(mapping)
+
+
+@dataclass(frozen=True)
+class ToolRegistry:
+    """
+    An immutable snapshot of the tools exposed through the gateway.
+
+    Snapshots are never modified in place. A refresh builds a new snapshot off to
+    the side and publishes it with a single reference assignment, so a request that
+    grabbed a snapshot keeps a consistent view for its whole lifetime.
+    """
+    version: int = 0
+    # server name -> tools discovered on it
+    servers: Mapping[str, tuple[dict, ...]] = field(default_factory=lambda: _freeze({}))
+    # tool name -> server name
+    tool_to_server: Mapping[str, str] = field(default_factory=lambda: _freeze({}))
+    # tool name -> metadata dict
+    tool_metadata: Mapping[str, dict] = field(default_factory=lambda: _freeze({}))
+
+    @property
+    def tools(self) -> list[dict]:
+        return list(self.tool_metadata.values())
+
+    @cached_property
+    def etag(self) -> str:
+        """A strong ETag of the tool catalogue. Unlike `version`, it is stable across restarts."""
+        digest = hashlib.sha256(json.dumps(self.tools, sort_keys=True).encode()).hexdigest()
+        return f'"{digest[:32]}"'
+
+    @classmethod
+    def from_servers(cls, servers: dict, version: int) -> "ToolRegistry":
+        """A snapshot of `servers` (server name -> tools), e.g. as shared by another gateway worker."""
+        servers = {server_name: tuple(tools) for server_name, tools in servers.items()}
+        tool_to_server = {}
+        tool_metadata = {}
+        for server_name, tools in servers.items():
+            for tool in tools:
+                tool_to_server[tool["name"]] = server_name
+                tool_metadata[tool["name"]] = tool
+
+        return cls(
+            version=version,
+            servers=_freeze(servers),
+            tool_to_server=_freeze(tool_to_server),
+            tool_metadata=_freeze(tool_metadata),
+        )
+
+    def _rebuild(self, servers: dict) -> "ToolRegistry":
+        return ToolRegistry.from_servers(servers, self.version + 1)
+
+    def with_server(self, server_name: str, tools: list[dict]) -> "ToolRegistry":
+        """Returns a snapshot with `server_name`'s tools replaced, or `self` if nothing changed."""
+        tools = tuple(tools)
+        if self.servers.get(server_name) == tools:
+            return self
+
+        servers = dict(self.servers)
+        servers[server_name] = tools
+        return self._rebuild(servers)
+
+    def without_servers(self, server_names) -> "ToolRegistry":
+        """Returns a snapshot without the given servers, or `self` if none were present."""
+        servers = {name: entry for name, entry in self.servers.items() if name not in server_names}
+        if len(servers) == len(self.servers):
+            return self
+        return self._rebuild(servers)
@@ -0,0 +1,105 @@
+from collections import OrderedDict
+import asyncio
+import json
+import time
+
+
+def cache_key(tool_name: str, arguments) -> str:
+    """Tool name plus canonical JSON of the arguments, so key order and spacing do not matter."""
+    return tool_name + "\0" + json.dumps(arguments, sort_keys=True, separators=(",", ":"))
+
+
+def annotated_as_pure(tool: dict) -> bool:
+    """
+    True for tools whose MCP annotations declare them read-only and idempotent, with
+    no interaction with an open world (e.g. the calculator tools).
+    """
+    annotations = tool.get("annotations") or {}
+    return (
+        annotations.get("readOnlyHint") is True
+        and annotations.get("idempotentHint") is True
+        and annotations.get("openWorldHint") is False
+    )
+
+
+class ResultCache:
+    """
+    An LRU cache of successful tools/call results, bounded by their total JSON size.
+    Every entry has its own TTL.
+
+    Concurrent misses for the same key are single-flighted. The first caller starts the
+    upstream request and the others wait for its result. The request runs as its own
+    task, so a caller that disconnects does not cancel it for the rest.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self._entries: OrderedDict[str, tuple[float, int, dict]] = OrderedDict()  # key -> (expires at, size, result)
+        self._inflight: dict[str, asyncio.Task] = {}
+
+    def _remove(self, key: str):
+        _, size, _ = self._entries.pop(key)
+        self.size -= size
+
+    def _store(self, key: str, ttl: float, result: dict):
+        size = len(json.dumps(result))
+        if size > self.max_bytes:
+            return
+
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (time.monotonic() + ttl, size, result)
+        self.size += size
+
+        while self.size > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def get(self, key: str) -> dict | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry[2]
+
+    async def _fill(self, key: str, ttl: float, call) -> dict:
+        try:
+            result = await call()
+            if not result.get("isError"):
+                self._store(key, ttl, result)
+            return result
+        finally:
+            del self._inflight[key]
+
+    async def get_or_call(self, key: str, ttl: float, call) -> dict:
+        """Returns the cached result for `key`, or awaits `call()` (shared with concurrent callers) to produce it."""
+        result = self.get(key)
+        if result is not None:
+            self.hits += 1
+            return result
+
+        task = self._inflight.get(key)
+        if task is None:
+            self.misses += 1
+            task = self._inflight[key] = asyncio.ensure_future(self._fill(key, ttl, call))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "bytes": self.size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+        }
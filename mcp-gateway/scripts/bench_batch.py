@@ -0,0 +1,59 @@
+"""
+Compares tools/call throughput of single requests and JSON-RPC batches.
+
+Usage (with the gateway and calculator server running):
+    $ cd mcp-gateway
+    $ python scripts/bench_batch.py [calls] [concurrency] [batch size]
+"""
+import asyncio
+import sys
+import time
+
+import httpx
+
+GATEWAY_URL = "http://127.0.0.1:8000/mcp"
+
+
+def add_call(i: int) -> dict:
+    return {"jsonrpc": "2.0", "id": i, "method": "tools/call",
+            "params": {"name": "add", "arguments": {"a": i, "b": 1}}}
+
+
+async def run(client: httpx.AsyncClient, calls: int, concurrency: int, batch_size: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def send(ids: range):
+        async with semaphore:
+            if batch_size == 1:
+                res = await client.post(GATEWAY_URL, json=add_call(ids[0]))
+                responses = [res.json()]
+            else:
+                res = await client.post(GATEWAY_URL, json=[add_call(i) for i in ids])
+                responses = res.json()
+            assert [r["id"] for r in responses] == list(ids), responses
+            assert all(not r["result"]["isError"] for r in responses), responses
+
+    start = time.perf_counter()
+    await asyncio.gather(*(send(range(i, min(i + batch_size, calls))) for i in range(0, calls, batch_size)))
+    return calls / (time.perf_counter() - start)
+
+
+async def main():
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    batch_size = int(sys.argv[3]) if len(sys.argv) > 3 else 20
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(timeout=60.0, limits=limits) as client:
+        await run(client, 50, concurrency, 1)  # Warm up
+
+        single = await run(client, calls, concurrency, 1)
+        batched = await run(client, calls, concurrency, batch_size)
+
+    print(f"{calls} x add, {concurrency} concurrent HTTP requests")
+    print(f"  one call per request:        {single:8.1f} calls/s")
+    print(f"  batches of {batch_size:<3} per request:  {batched:8.1f} calls/s  ({batched / single:.2f}x)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,122 @@
+"""
+Compares tools/call latency through the gateway with the calculator server behind it
+over HTTP and embedded in the gateway's process.
+
+The calculator server is started on port 3001. For each mode a gateway process is
+started with a servers file holding only the calculator, then `add` is called one at a
+time (latency percentiles) and with many calls in flight (throughput).
+
+Run it with an interpreter that has both the gateway's and the calculator's
+dependencies installed.
+
+Usage:
+    $ cd mcp-gateway
+    $ python scripts/bench_embedded.py [calls, default 2000] [concurrency, default 32]
+"""
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+GATEWAY_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CALCULATOR_DIR = os.path.join(os.path.dirname(GATEWAY_DIR), "mcp-servers", "calculator-server")
+GATEWAY_URL = "http://127.0.0.1:8000/mcp"
+CALCULATOR_URL = "http://127.0.0.1:3001/mcp/"
+
+MODES = {
+    "http": {"calculator": {"replicas": [CALCULATOR_URL]}},
+    "embedded": {"calculator": {"embedded": os.path.join(CALCULATOR_DIR, "calculator.py") + ":mcp"}},
+}
+
+
+def call_body(i: int) -> dict:
+    return {"jsonrpc": "2.0", "id": i, "method": "tools/call", "params": {"name": "add", "arguments": {"a": i, "b": 1}}}
+
+
+async def wait_until_serving(client: httpx.AsyncClient, url: str, body: dict):
+    for _ in range(200):
+        try:
+            res = await client.post(url, json=body, headers={"Accept": "application/json, text/event-stream"})
+            if res.status_code == 200 and "add" in res.text:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.1)
+    raise RuntimeError(f"{url} did not come up.")
+
+
+async def measure(client: httpx.AsyncClient, calls: int, concurrency: int) -> dict:
+    for i in range(100):  # Warm up connections and caches
+        (await client.post(GATEWAY_URL, json=call_body(i))).raise_for_status()
+
+    latencies = []
+    for i in range(calls):
+        started = time.perf_counter()
+        res = await client.post(GATEWAY_URL, json=call_body(i))
+        latencies.append((time.perf_counter() - started) * 1000)
+        assert res.json()["result"]["content"][0]["text"] == str(float(i + 1)), res.text
+
+    pending = iter(range(calls))
+
+    async def worker():
+        for i in pending:
+            (await client.post(GATEWAY_URL, json=call_body(i))).raise_for_status()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "mean_ms": statistics.fmean(latencies),
+        "p50_ms": latencies[len(latencies) // 2],
+        "p99_ms": latencies[int(len(latencies) * 0.99)],
+        "calls_per_s": calls / elapsed,
+    }
+
+
+async def main(calls: int, concurrency: int):
+    calculator = subprocess.Popen([sys.executable, "calculator.py"], cwd=CALCULATOR_DIR,
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    results = {}
+    try:
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        async with httpx.AsyncClient(timeout=30.0, limits=limits) as client:
+            await wait_until_serving(client, CALCULATOR_URL, {"jsonrpc": "2.0", "id": 1, "method": "tools/list"})
+            with tempfile.TemporaryDirectory() as directory:
+                for mode, servers in MODES.items():
+                    servers_file = os.path.join(directory, f"{mode}.json")
+                    with open(servers_file, "w") as f:
+                        json.dump(servers, f)
+                    env = dict(os.environ, GATEWAY_SERVERS_FILE=servers_file, GATEWAY_LOG_LEVEL="WARNING")
+                    gateway = subprocess.Popen([sys.executable, "gateway.py"], cwd=GATEWAY_DIR, env=env,
+                                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+                    try:
+                        await wait_until_serving(client, GATEWAY_URL, {"jsonrpc": "2.0", "id": 1, "method": "tools/list"})
+                        results[mode] = await measure(client, calls, concurrency)
+                    finally:
+                        gateway.terminate()
+                        gateway.wait()
+    finally:
+        calculator.terminate()
+        calculator.wait()
+
+    print(f"{calls} `add` calls through the gateway; throughput with {concurrency} in flight")
+    print(f"{'mode':>9} {'mean ms':>9} {'p50 ms':>8} {'p99 ms':>8} {'calls/s':>9}")
+    for mode, result in results.items():
+        print(f"{mode:>9} {result['mean_ms']:9.2f} {result['p50_ms']:8.2f} {result['p99_ms']:8.2f} {result['calls_per_s']:9.0f}")
+    saved = results["http"]["mean_ms"] - results["embedded"]["mean_ms"]
+    print(f"Embedding saves {saved:.2f} ms per call ({saved / results['http']['mean_ms']:.0%} of the mean latency).")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 2000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 32,
+    ))
@@ -0,0 +1,125 @@
+"""
+Compares the buffered and streaming tools/call proxy paths of the gateway.
+
+A fake filesystem server is started on port 3003 (the `filesystem` entry of
+SERVER_REGISTRY) whose `read_file` tool returns a payload of the requested size.
+For every payload size and proxy mode a fresh gateway process is started, so the
+reported peak RSS (VmHWM) belongs to that single call.
+
+Usage:
+    $ cd mcp-gateway
+    $ python scripts/bench_streaming.py
+"""
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import httpx
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+GATEWAY_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+GATEWAY_URL = "http://127.0.0.1:8000/mcp"
+SIZES = {"1 KB": 1024, "1 MB": 1024 * 1024, "50 MB": 50 * 1024 * 1024}
+CHUNK_SIZE = 64 * 1024
+
+upstream = FastAPI()
+
+
+@upstream.post("/mcp/")
+async def fake_filesystem(request: Request):
+    body = await request.json()
+    if body["method"] == "ping":
+        return JSONResponse({"jsonrpc": "2.0", "id": body["id"], "result": {}})
+    if body["method"] == "tools/list":
+        tool = {"name": "read_file", "description": "Returns `size` bytes of text.",
+                "inputSchema": {"type": "object", "properties": {"size": {"type": "integer"}}}}
+        return JSONResponse({"jsonrpc": "2.0", "id": body["id"], "result": {"tools": [tool]}})
+
+    size = body["params"]["arguments"]["size"]
+    head, tail = json.dumps({
+        "jsonrpc": "2.0", "id": body["id"],
+        "result": {"content": [{"type": "text", "text": "<payload>"}], "isError": False},
+    }).split("<payload>")
+
+    async def sse():
+        yield f"event: message\r\ndata: {head}".encode()
+        for offset in range(0, size, CHUNK_SIZE):
+            yield b"x" * min(CHUNK_SIZE, size - offset)
+        yield f"{tail}\r\n\r\n".encode()
+
+    return StreamingResponse(sse(), media_type="text/event-stream")
+
+
+def start_upstream():
+    server = uvicorn.Server(uvicorn.Config(upstream, host="127.0.0.1", port=3003, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+
+
+def peak_rss_kb(pid: int) -> int:
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1])
+    return 0
+
+
+async def wait_for_gateway(client: httpx.AsyncClient):
+    for _ in range(100):
+        try:
+            res = await client.post(GATEWAY_URL, json={"jsonrpc": "2.0", "id": 1, "method": "tools/list"})
+            if any(tool["name"] == "read_file" for tool in res.json()["result"]["tools"]):
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.1)
+    raise RuntimeError("Gateway did not come up.")
+
+
+async def measure(streaming: bool, size: int) -> dict:
+    env = dict(os.environ, GATEWAY_STREAMING_PROXY="true" if streaming else "false")
+    gateway = subprocess.Popen([sys.executable, "gateway.py"], cwd=GATEWAY_DIR, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        async with httpx.AsyncClient(timeout=120.0) as client:
+            await wait_for_gateway(client)
+            body = {"jsonrpc": "2.0", "id": 2, "method": "tools/call",
+                    "params": {"name": "read_file", "arguments": {"size": size}}}
+
+            received = 0
+            start = time.perf_counter()
+            ttfb = None
+            async with client.stream("POST", GATEWAY_URL, json=body) as res:
+                async for chunk in res.aiter_bytes():
+                    if ttfb is None:
+                        ttfb = time.perf_counter() - start
+                    received += len(chunk)
+            total = time.perf_counter() - start
+
+        return {"ttfb_ms": ttfb * 1000, "total_ms": total * 1000,
+                "bytes": received, "peak_rss_mb": peak_rss_kb(gateway.pid) / 1024}
+    finally:
+        gateway.terminate()
+        gateway.wait()
+
+
+async def main():
+    start_upstream()
+    print(f"{'size':>6} {'mode':>9} {'ttfb ms':>9} {'total ms':>9} {'peak RSS MB':>12}")
+    for label, size in SIZES.items():
+        for streaming in (False, True):
+            result = await measure(streaming, size)
+            mode = "streaming" if streaming else "buffered"
+            print(f"{label:>6} {mode:>9} {result['ttfb_ms']:9.1f} {result['total_ms']:9.1f} "
+                  f"{result['peak_rss_mb']:12.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,141 @@
+"""
+Checks that tool refreshes never disturb tools/call requests in flight.
+
+The calculator server is started on port 3001, next to a fake server
+(flaky_upstream.py) that takes a second to answer tools/list, so every refresh
+spends that second waiting on it. While POST /admin/refresh runs back to back,
+many `add` calls are kept in flight. The check fails if any call gets a 404 or a
+wrong result, if calls never overlap each other, or if no call completes while a
+refresh is running (i.e. the slow server held the calls up).
+
+Run it with an interpreter that has both the gateway's and the calculator's
+dependencies installed.
+
+Usage:
+    $ cd mcp-gateway
+    $ python scripts/check_refresh.py [seconds, default 10] [concurrency, default 32]
+"""
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+GATEWAY_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CALCULATOR_DIR = os.path.join(os.path.dirname(GATEWAY_DIR), "mcp-servers", "calculator-server")
+GATEWAY_URL = "http://127.0.0.1:8000"
+CALCULATOR_URL = "http://127.0.0.1:3001/mcp/"
+SLOW_URL = "http://127.0.0.1:3004/mcp/"
+LIST_TOOLS = {"jsonrpc": "2.0", "id": 1, "method": "tools/list"}
+
+
+def call_body(i: int) -> dict:
+    return {"jsonrpc": "2.0", "id": i, "method": "tools/call", "params": {"name": "add", "arguments": {"a": i, "b": 1}}}
+
+
+async def wait_until_serving(client: httpx.AsyncClient, url: str, tool: str):
+    for _ in range(200):
+        try:
+            res = await client.post(url, json=LIST_TOOLS, headers={"Accept": "application/json, text/event-stream"})
+            if res.status_code == 200 and tool in res.text:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.1)
+    raise RuntimeError(f"{url} did not come up.")
+
+
+async def run_check(client: httpx.AsyncClient, duration: float, concurrency: int) -> list[str]:
+    """Returns what went wrong, if anything."""
+    calls = []  # (started, finished, status, correct)
+    refreshes = []  # (started, finished)
+    stop_at = time.perf_counter() + duration
+
+    async def caller(worker: int):
+        i = worker
+        while time.perf_counter() < stop_at:
+            started = time.perf_counter()
+            res = await client.post(f"{GATEWAY_URL}/mcp", json=call_body(i))
+            correct = res.status_code == 200 and res.json()["result"]["content"][0]["text"] == str(float(i + 1))
+            calls.append((started, time.perf_counter(), res.status_code, correct))
+            i += concurrency
+
+    async def refresher():
+        while time.perf_counter() < stop_at:
+            started = time.perf_counter()
+            (await client.post(f"{GATEWAY_URL}/admin/refresh")).raise_for_status()
+            refreshes.append((started, time.perf_counter()))
+
+    await asyncio.gather(refresher(), *(caller(worker) for worker in range(concurrency)))
+
+    not_found = sum(1 for _, _, status, _ in calls if status == 404)
+    wrong = sum(1 for _, _, status, correct in calls if status != 404 and not correct)
+    during_refresh = sum(
+        1 for started, finished, _, _ in calls
+        if any(refresh_started <= started and finished <= refresh_finished for refresh_started, refresh_finished in refreshes)
+    )
+    # Most calls in flight at once: +1 at each start, -1 at each finish
+    events = sorted([(started, 1) for started, _, _, _ in calls] + [(finished, -1) for _, finished, _, _ in calls])
+    in_flight = peak = 0
+    for _, change in events:
+        in_flight += change
+        peak = max(peak, in_flight)
+
+    print(f"{len(calls)} calls and {len(refreshes)} refreshes in {duration:.0f} s")
+    print(f"  404s: {not_found}, wrong results: {wrong}")
+    print(f"  calls started and finished within a refresh: {during_refresh}")
+    print(f"  most calls in flight at once: {peak}")
+
+    problems = []
+    if not_found:
+        problems.append(f"{not_found} calls got a 404")
+    if wrong:
+        problems.append(f"{wrong} calls failed or returned a wrong result")
+    if not refreshes or not during_refresh:
+        problems.append("no call completed while a refresh was running")
+    if peak < 2:
+        problems.append("calls never overlapped")
+    return problems
+
+
+async def main(duration: float, concurrency: int):
+    calculator = subprocess.Popen([sys.executable, "calculator.py"], cwd=CALCULATOR_DIR,
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    slow = subprocess.Popen([sys.executable, "scripts/flaky_upstream.py", "--port", "3004", "--list-latency", "1.0"],
+                            cwd=GATEWAY_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    gateway = None
+    try:
+        limits = httpx.Limits(max_connections=concurrency + 1, max_keepalive_connections=concurrency + 1)
+        async with httpx.AsyncClient(timeout=30.0, limits=limits) as client:
+            await wait_until_serving(client, CALCULATOR_URL, "add")
+            await wait_until_serving(client, SLOW_URL, "echo")
+            with tempfile.TemporaryDirectory() as directory:
+                servers_file = os.path.join(directory, "servers.json")
+                with open(servers_file, "w") as f:
+                    json.dump({"calculator": {"replicas": [CALCULATOR_URL]}, "slow": {"replicas": [SLOW_URL]}}, f)
+                env = dict(os.environ, GATEWAY_SERVERS_FILE=servers_file, GATEWAY_LOG_LEVEL="WARNING")
+                gateway = subprocess.Popen([sys.executable, "gateway.py"], cwd=GATEWAY_DIR, env=env,
+                                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+                await wait_until_serving(client, f"{GATEWAY_URL}/mcp", "add")
+                problems = await run_check(client, duration, concurrency)
+    finally:
+        for process in (gateway, slow, calculator):
+            if process is not None:
+                process.terminate()
+                process.wait()
+
+    if problems:
+        print("FAILED: " + "; ".join(problems))
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(
+        float(sys.argv[1]) if len(sys.argv) > 1 else 10,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 32,
+    ))
@@ -0,0 +1,204 @@
+"""
+Checks load balancing and failover across replicas of one server.
+
+Three calculator replicas are started on ports 3011-3013 behind a gateway. The
+check then:
+
+1. sends `add` calls and checks that every replica serves a fair share of them,
+   counted from the replicas' access logs;
+2. stops one replica and checks that calls keep succeeding on the others, and that
+   the health checks eject it;
+3. restarts it and checks that it is let back in and serves calls again.
+
+Run it with an interpreter that has both the gateway's and the calculator's
+dependencies installed.
+
+Usage:
+    $ cd mcp-gateway
+    $ python scripts/check_replicas.py [calls per phase, default 600] [concurrency, default 16]
+"""
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+GATEWAY_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CALCULATOR_DIR = os.path.join(os.path.dirname(GATEWAY_DIR), "mcp-servers", "calculator-server")
+GATEWAY_URL = "http://127.0.0.1:8000"
+PORTS = [3011, 3012, 3013]
+LIST_TOOLS = {"jsonrpc": "2.0", "id": 1, "method": "tools/list"}
+# Health checks run every 5 s and eject a replica after two failures
+HEALTH_TIMEOUT = 20.0
+
+
+def replica_url(port: int) -> str:
+    return f"http://127.0.0.1:{port}/mcp/"
+
+
+def call_body(i: int) -> dict:
+    return {"jsonrpc": "2.0", "id": i, "method": "tools/call", "params": {"name": "add", "arguments": {"a": i, "b": 1}}}
+
+
+class Replicas:
+    """The calculator replicas, each logging to its own file in `directory`."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.processes: dict[int, subprocess.Popen] = {}
+
+    def log_path(self, port: int) -> str:
+        return os.path.join(self.directory, f"calculator-{port}.log")
+
+    def start(self, port: int):
+        log = open(self.log_path(port), "a")
+        env = dict(os.environ, CALCULATOR_PORT=str(port))
+        self.processes[port] = subprocess.Popen([sys.executable, "calculator.py"], cwd=CALCULATOR_DIR, env=env,
+                                                stdout=log, stderr=log)
+        log.close()
+
+    def stop(self, port: int):
+        process = self.processes.pop(port)
+        process.terminate()
+        process.wait()
+
+    def stop_all(self):
+        for port in list(self.processes):
+            self.stop(port)
+
+    def requests_served(self) -> dict[int, int]:
+        """MCP requests (calls, pings, discovery) each replica has served so far."""
+        counts = {}
+        for port in PORTS:
+            with open(self.log_path(port)) as f:
+                counts[port] = sum(1 for line in f if '"POST /mcp/' in line)
+        return counts
+
+
+async def wait_until(check, what: str, timeout: float):
+    give_up_at = time.monotonic() + timeout
+    while time.monotonic() < give_up_at:
+        try:
+            if await check():
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError(f"Timed out waiting for {what}.")
+
+
+async def serves_add(client: httpx.AsyncClient, url: str) -> bool:
+    res = await client.post(url, json=LIST_TOOLS, headers={"Accept": "application/json, text/event-stream"})
+    return res.status_code == 200 and "add" in res.text
+
+
+async def replica_health(client: httpx.AsyncClient) -> dict[int, bool]:
+    replicas = (await client.get(f"{GATEWAY_URL}/admin/servers")).json()["calculator"]["replicas"]
+    return {int(replica["url"].split(":")[2].split("/")[0]): replica["healthy"] for replica in replicas}
+
+
+async def is_healthy(client: httpx.AsyncClient, port: int) -> bool:
+    return (await replica_health(client))[port]
+
+
+async def is_unhealthy(client: httpx.AsyncClient, port: int) -> bool:
+    return not (await replica_health(client))[port]
+
+
+async def send_calls(client: httpx.AsyncClient, calls: int, concurrency: int) -> int:
+    """Sends `calls` add calls, `concurrency` at a time. Returns how many failed."""
+    pending = iter(range(calls))
+    failed = 0
+
+    async def worker():
+        nonlocal failed
+        for i in pending:
+            res = await client.post(f"{GATEWAY_URL}/mcp", json=call_body(i))
+            if res.status_code != 200 or res.json()["result"]["content"][0]["text"] != str(float(i + 1)):
+                failed += 1
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return failed
+
+
+async def phase(client: httpx.AsyncClient, replicas: Replicas, name: str, calls: int, concurrency: int,
+                serving: list[int], problems: list[str]):
+    """Sends calls and checks that they all succeed and that each port in `serving` gets a fair share."""
+    before = replicas.requests_served()
+    failed = await send_calls(client, calls, concurrency)
+    after = replicas.requests_served()
+    served = {port: after[port] - before[port] for port in PORTS}
+    print(f"{name}: {failed} of {calls} calls failed; requests per replica: {served}")
+
+    if failed:
+        problems.append(f"{name}: {failed} calls failed")
+    fair_share = calls / len(serving)
+    for port in serving:
+        if served[port] < fair_share / 2:
+            problems.append(f"{name}: replica {port} served {served[port]} requests, under half its share of {fair_share:.0f}")
+
+
+async def run_check(client: httpx.AsyncClient, replicas: Replicas, calls: int, concurrency: int) -> list[str]:
+    problems = []
+    await phase(client, replicas, "all replicas up", calls, concurrency, PORTS, problems)
+
+    stopped = PORTS[-1]
+    replicas.stop(stopped)
+    await phase(client, replicas, f"replica {stopped} stopped", calls, concurrency, PORTS[:-1], problems)
+    try:
+        await wait_until(lambda: is_unhealthy(client, stopped), f"replica {stopped} to be ejected", HEALTH_TIMEOUT)
+        print(f"replica {stopped} ejected")
+    except RuntimeError as e:
+        problems.append(str(e))
+
+    replicas.start(stopped)
+    try:
+        await wait_until(lambda: is_healthy(client, stopped), f"replica {stopped} to come back", HEALTH_TIMEOUT)
+        print(f"replica {stopped} healthy again")
+        await phase(client, replicas, f"replica {stopped} restarted", calls, concurrency, PORTS, problems)
+    except RuntimeError as e:
+        problems.append(str(e))
+    return problems
+
+
+async def main(calls: int, concurrency: int):
+    with tempfile.TemporaryDirectory() as directory:
+        replicas = Replicas(directory)
+        gateway = None
+        try:
+            for port in PORTS:
+                replicas.start(port)
+            limits = httpx.Limits(max_connections=concurrency + 1, max_keepalive_connections=concurrency + 1)
+            async with httpx.AsyncClient(timeout=30.0, limits=limits) as client:
+                for port in PORTS:
+                    await wait_until(lambda: serves_add(client, replica_url(port)), f"replica {port}", 30.0)
+
+                servers_file = os.path.join(directory, "servers.json")
+                with open(servers_file, "w") as f:
+                    json.dump({"calculator": {"replicas": [replica_url(port) for port in PORTS]}}, f)
+                env = dict(os.environ, GATEWAY_SERVERS_FILE=servers_file, GATEWAY_LOG_LEVEL="WARNING")
+                gateway = subprocess.Popen([sys.executable, "gateway.py"], cwd=GATEWAY_DIR, env=env,
+                                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+                await wait_until(lambda: serves_add(client, f"{GATEWAY_URL}/mcp"), "the gateway", 30.0)
+                problems = await run_check(client, replicas, calls, concurrency)
+        finally:
+            if gateway is not None:
+                gateway.terminate()
+                gateway.wait()
+            replicas.stop_all()
+
+    if problems:
+        print("FAILED: " + "; ".join(problems))
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 600,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 16,
+    ))
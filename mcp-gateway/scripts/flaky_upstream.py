@@ -0,0 +1,63 @@
+"""
+A fake MCP server for exercising the gateway's circuit breakers, deadlines and
+concurrency limits. Its single `echo` tool can be made slow, failing or hanging.
+
+Usage:
+    $ cd mcp-gateway
+    $ python scripts/flaky_upstream.py --port 3004 --latency 0.5 --error-rate 0.2 --hang-rate 0.1
+
+Then register it with the gateway:
+    $ curl -X PUT localhost:8000/admin/servers/flaky -d '{"replicas": ["http://localhost:3004/mcp/"]}'
+"""
+import argparse
+import asyncio
+import random
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+ECHO_TOOL = {
+    "name": "echo",
+    "description": "Returns its `text` argument.",
+    "inputSchema": {"type": "object", "properties": {"text": {"type": "string"}}},
+}
+
+
+def create_app(latency: float, error_rate: float, hang_rate: float, list_latency: float = 0.0) -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/mcp/")
+    async def flaky(request: Request):
+        body = await request.json()
+        if body["method"] == "ping":
+            return JSONResponse({"jsonrpc": "2.0", "id": body["id"], "result": {}})
+        if body["method"] == "tools/list":
+            await asyncio.sleep(list_latency)
+            return JSONResponse({"jsonrpc": "2.0", "id": body["id"], "result": {"tools": [ECHO_TOOL]}})
+
+        roll = random.random()
+        if roll < hang_rate:
+            await asyncio.Event().wait()  # Never answers
+        await asyncio.sleep(latency)
+        if roll < hang_rate + error_rate:
+            return JSONResponse({"detail": "injected failure"}, status_code=500)
+
+        text = body["params"]["arguments"].get("text", "")
+        result = {"content": [{"type": "text", "text": text}], "isError": False}
+        return JSONResponse({"jsonrpc": "2.0", "id": body["id"], "result": result})
+
+    return app
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=3004)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds to wait before answering a tools/call")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of tools/call answered with HTTP 500")
+    parser.add_argument("--hang-rate", type=float, default=0.0, help="Fraction of tools/call never answered")
+    parser.add_argument("--list-latency", type=float, default=0.0, help="Seconds to wait before answering a tools/list")
+    args = parser.parse_args()
+
+    app = create_app(args.latency, args.error_rate, args.hang_rate, args.list_latency)
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
@@ -0,0 +1,328 @@
+"""
+Load tests the gateway together with the calculator, weather and filesystem servers.
+
+Starts all four processes locally, drives each scenario with a closed loop of
+`--concurrency` workers for `--duration` seconds, and reports p50/p95/p99 latency,
+throughput, errors and peak RSS (VmHWM) of every process. Results are written as
+JSON, and `--compare` prints the change against an earlier results file, so runs
+on two commits can be compared.
+
+Scenarios:
+    mix         tools/list and tools/call across all three servers
+    large_read  read_file of a `--payload-mb` MB file
+    refresh     the mix while POST /admin/refresh runs back to back
+    unhealthy   the mix plus a server that is slow, fails and hangs
+                (scripts/flaky_upstream.py), with a 1 s request deadline
+
+Usage:
+    $ cd mcp-gateway
+    $ python scripts/loadtest.py [--scenarios mix refresh] [--concurrency 32] [--duration 10]
+                                 [--output results.json] [--compare baseline.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+GATEWAY_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPO_DIR = os.path.dirname(GATEWAY_DIR)
+GATEWAY = "http://127.0.0.1:8000"
+
+# (name, working directory, script, port)
+SERVERS = [
+    ("calculator", "mcp-servers/calculator-server", "calculator.py", 3001),
+    ("weather", "mcp-servers/weather-server", "weather.py", 3002),
+    ("filesystem", "mcp-servers/filesystem-server", "filesystem.py", 3003),
+]
+FLAKY_PORT = 3009
+
+# (weight, operation, JSON-RPC method, params)
+MIX = [
+    (2, "tools/list", "tools/list", {}),
+    (3, "add", "tools/call", {"name": "add", "arguments": {"a": 2, "b": 3}}),
+    (2, "multiply", "tools/call", {"name": "multiply", "arguments": {"a": 6, "b": 7}}),
+    (2, "get_temperature", "tools/call", {"name": "get_temperature", "arguments": {"city": "London"}}),
+    (1, "get_current_weather", "tools/call", {"name": "get_current_weather", "arguments": {"city": "Tokyo"}}),
+]
+
+
+def percentile(sorted_values: list[float], p: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, max(0, round(p / 100 * len(sorted_values)) - 1))]
+
+
+def summarize(latencies: list[float], errors: dict, elapsed: float) -> dict:
+    latencies = sorted(latencies)
+    ms = lambda seconds: round(seconds * 1000, 2)
+    return {
+        "requests": len(latencies) + sum(errors.values()),
+        "ok": len(latencies),
+        "errors": dict(errors),
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "latency_ms": {
+            "p50": ms(percentile(latencies, 50)),
+            "p95": ms(percentile(latencies, 95)),
+            "p99": ms(percentile(latencies, 99)),
+            "max": ms(latencies[-1]) if latencies else 0.0,
+        },
+    }
+
+
+def peak_rss_mb(pid: int) -> float:
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return round(int(line.split()[1]) / 1024, 1)
+    return 0.0
+
+
+class Stack:
+    """The gateway and the MCP servers, each in its own process."""
+
+    def __init__(self, python: str):
+        self.python = python
+        self.processes: dict[str, subprocess.Popen] = {}
+        self.logs = tempfile.TemporaryDirectory(prefix="loadtest-")
+
+    def spawn(self, name: str, args: list[str], cwd: str, env: dict | None = None):
+        log = open(os.path.join(self.logs.name, f"{name}.log"), "w")
+        self.processes[name] = subprocess.Popen(
+            [self.python, *args], cwd=cwd, stdout=log, stderr=subprocess.STDOUT, env={**os.environ, **(env or {})}
+        )
+
+    async def start(self, client: httpx.AsyncClient):
+        for name, directory, script, _ in SERVERS:
+            self.spawn(name, [script], os.path.join(REPO_DIR, directory))
+        self.spawn("flaky", [
+            "scripts/flaky_upstream.py", "--port", str(FLAKY_PORT),
+            "--latency", "0.05", "--error-rate", "0.3", "--hang-rate", "0.2",
+        ], GATEWAY_DIR)
+        for _, _, _, port in SERVERS:
+            await wait_until(lambda port=port: client.post(f"http://127.0.0.1:{port}/mcp/", json=ping()), f"port {port}")
+
+        self.spawn("gateway", ["gateway.py"], GATEWAY_DIR, {"GATEWAY_LOG_LEVEL": "warning"})
+        expected = {"add", "get_temperature", "read_file"}
+
+        async def gateway_ready():
+            res = await client.post(f"{GATEWAY}/mcp", json={"jsonrpc": "2.0", "id": 1, "method": "tools/list"})
+            tools = {tool["name"] for tool in res.json()["result"]["tools"]}
+            if not expected <= tools:
+                raise RuntimeError(f"missing tools: {expected - tools}")
+            return res
+
+        await wait_until(gateway_ready, "the gateway")
+
+    def peak_rss(self) -> dict:
+        return {name: peak_rss_mb(process.pid) for name, process in self.processes.items() if process.poll() is None}
+
+    def stop(self):
+        for process in self.processes.values():
+            process.terminate()
+        for process in self.processes.values():
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        self.logs.cleanup()
+
+
+def ping() -> dict:
+    return {"jsonrpc": "2.0", "id": 0, "method": "ping"}
+
+
+async def wait_until(check, what: str, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            await check()
+            return
+        except Exception as e:
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"Timed out waiting for {what}: {e!r}")
+        await asyncio.sleep(0.2)
+
+
+async def drive(client: httpx.AsyncClient, operations: list, concurrency: int, duration: float, headers: dict | None = None) -> dict:
+    """
+    Runs `concurrency` workers that each send one request at a time, picked at random
+    from the weighted `operations`, until `duration` seconds have passed.
+    """
+    weights = [op[0] for op in operations]
+    latencies: dict[str, list[float]] = {op[1]: [] for op in operations}
+    errors: dict[str, dict] = {op[1]: {} for op in operations}
+    stop_at = time.monotonic() + duration
+
+    async def worker():
+        request_id = 0
+        while time.monotonic() < stop_at:
+            _, name, method, params = random.choices(operations, weights)[0]
+            request_id += 1
+            started = time.perf_counter()
+            try:
+                res = await client.post(
+                    f"{GATEWAY}/mcp", json={"jsonrpc": "2.0", "id": request_id, "method": method, "params": params}, headers=headers
+                )
+                body = res.json()
+                if res.status_code != 200 or "error" in body:
+                    kind = f"http {res.status_code}"
+                elif method == "tools/call" and body["result"].get("isError"):
+                    kind = "tool error"
+                else:
+                    kind = None
+            except httpx.HTTPError as e:
+                kind = type(e).__name__
+            elapsed = time.perf_counter() - started
+
+            if kind is None:
+                latencies[name].append(elapsed)
+            else:
+                errors[name][kind] = errors[name].get(kind, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    all_errors = {}
+    for by_kind in errors.values():
+        for kind, count in by_kind.items():
+            all_errors[kind] = all_errors.get(kind, 0) + count
+    return {
+        **summarize([latency for values in latencies.values() for latency in values], all_errors, elapsed),
+        "operations": {name: summarize(latencies[name], errors[name], elapsed) for name in latencies},
+    }
+
+
+async def scenario_mix(client, args) -> dict:
+    return await drive(client, MIX, args.concurrency, args.duration)
+
+
+async def scenario_large_read(client, args) -> dict:
+    with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False) as f:
+        line = "x" * 1023 + "\n"
+        for _ in range(args.payload_mb * 1024):
+            f.write(line)
+    try:
+        operations = [(1, "read_file", "tools/call", {"name": "read_file", "arguments": {"path": f.name}})]
+        result = await drive(client, operations, args.concurrency, args.duration)
+    finally:
+        os.unlink(f.name)
+    return {"payload_mb": args.payload_mb, **result}
+
+
+async def scenario_refresh(client, args) -> dict:
+    refresh_latencies = []
+    load = asyncio.create_task(drive(client, MIX, args.concurrency, args.duration))
+    while not load.done():
+        started = time.perf_counter()
+        await client.post(f"{GATEWAY}/admin/refresh")
+        refresh_latencies.append(time.perf_counter() - started)
+        await asyncio.sleep(0.05)
+    return {**await load, "refreshes": summarize(refresh_latencies, {}, args.duration)}
+
+
+async def scenario_unhealthy(client, args) -> dict:
+    res = await client.put(f"{GATEWAY}/admin/servers/flaky", json={"replicas": [f"http://127.0.0.1:{FLAKY_PORT}/mcp/"]})
+    res.raise_for_status()
+    try:
+        operations = MIX + [(3, "echo (flaky)", "tools/call", {"name": "echo", "arguments": {"text": "hi"}})]
+        result = await drive(client, operations, args.concurrency, args.duration, headers={"X-Request-Timeout": "1"})
+        result["flaky_server"] = (await client.get(f"{GATEWAY}/admin/servers")).json()["flaky"]
+    finally:
+        await client.delete(f"{GATEWAY}/admin/servers/flaky")
+    return result
+
+
+SCENARIOS = {
+    "mix": scenario_mix,
+    "large_read": scenario_large_read,
+    "refresh": scenario_refresh,
+    "unhealthy": scenario_unhealthy,
+}
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_result(name: str, result: dict):
+    latency = result["latency_ms"]
+    print(f"{name:<12} {result['throughput_rps']:>9.1f} req/s  p50 {latency['p50']:>8.2f}  p95 {latency['p95']:>8.2f}  "
+          f"p99 {latency['p99']:>8.2f} ms  errors {sum(result['errors'].values())}")
+    for operation, stats in result.get("operations", {}).items():
+        if len(result["operations"]) > 1:
+            latency = stats["latency_ms"]
+            print(f"  {operation:<22} p50 {latency['p50']:>8.2f}  p99 {latency['p99']:>8.2f} ms  errors {stats['errors'] or 0}")
+    print(f"  peak RSS MB: {result['peak_rss_mb']}")
+
+
+def print_comparison(results: dict, baseline: dict):
+    print(f"\nCompared to {baseline.get('commit') or 'baseline'}:")
+    for name, result in results["scenarios"].items():
+        before = baseline["scenarios"].get(name)
+        if before is None:
+            continue
+        change = lambda new, old: f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+        print(f"{name:<12} throughput {change(result['throughput_rps'], before['throughput_rps']):>8}  "
+              f"p50 {change(result['latency_ms']['p50'], before['latency_ms']['p50']):>8}  "
+              f"p99 {change(result['latency_ms']['p99'], before['latency_ms']['p99']):>8}  "
+              f"gateway RSS {change(result['peak_rss_mb'].get('gateway', 0), before['peak_rss_mb'].get('gateway', 0)):>8}")
+
+
+async def main(args):
+    results = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "settings": {"concurrency": args.concurrency, "duration": args.duration, "payload_mb": args.payload_mb},
+        "scenarios": {},
+    }
+
+    stack = Stack(args.python)
+    limits = httpx.Limits(max_connections=args.concurrency + 2)
+    async with httpx.AsyncClient(timeout=60.0, limits=limits) as client:
+        try:
+            await stack.start(client)
+            await drive(client, MIX, args.concurrency, 1.0)  # Warm up
+            for name in args.scenarios:
+                result = await SCENARIOS[name](client, args)
+                # VmHWM is a high-water mark, so it covers this and all earlier scenarios.
+                result["peak_rss_mb"] = stack.peak_rss()
+                results["scenarios"][name] = result
+                print_result(name, result)
+        finally:
+            stack.stop()
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            print_comparison(results, json.load(f))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per scenario")
+    parser.add_argument("--payload-mb", type=int, default=10, help="File size for the large_read scenario")
+    parser.add_argument("--output", default="loadtest-results.json")
+    parser.add_argument("--compare", help="An earlier results file to compare against")
+    parser.add_argument("--python", default=sys.executable, help="Interpreter for the gateway and servers (needs `mcp`)")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,132 @@
+from contextlib import contextmanager
+import fcntl
+import json
+import mmap
+import os
+import struct
+import time
+
+# Sequence number and payload length, followed by the payload: a JSON document
+HEADER = struct.Struct("<QQ")
+INITIAL_SIZE = 64 * 1024
+
+# A reader that keeps seeing a write in progress for this long assumes the writer
+# died, and reads under the file lock instead.
+TORN_READ_TIMEOUT = 0.1
+
+
+class SharedSnapshot:
+    """
+    A JSON document shared by the gateway's worker processes through a memory-mapped file.
+
+    The header's sequence number works as a seqlock: a writer makes it odd before
+    writing and even again afterwards. Readers take no lock. They retry when the
+    number was odd or changed while they read. Writers serialize on an exclusive
+    flock of the file, so `update` can read, modify and write without losing a
+    concurrent update. The version of the document is half the sequence number.
+    The file grows as needed and never shrinks.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        with self.locked(fcntl.LOCK_EX):
+            if os.fstat(self.fd).st_size < INITIAL_SIZE:
+                os.ftruncate(self.fd, INITIAL_SIZE)
+        self.mm = mmap.mmap(self.fd, 0)
+
+    @contextmanager
+    def locked(self, operation: int):
+        fcntl.flock(self.fd, operation)
+        try:
+            yield
+        finally:
+            fcntl.flock(self.fd, fcntl.LOCK_UN)
+
+    def _remap(self):
+        """Maps the whole file again if another process grew it."""
+        size = os.fstat(self.fd).st_size
+        if size != len(self.mm):
+            self.mm.close()
+            self.mm = mmap.mmap(self.fd, size)
+
+    @property
+    def version(self) -> int:
+        """The version of the last complete write: 0 if nothing was written yet."""
+        sequence, _ = HEADER.unpack_from(self.mm, 0)
+        return sequence // 2
+
+    def read(self) -> tuple[int, dict | None]:
+        """The current version and document, or `(0, None)` if nothing was written yet."""
+        give_up_at = time.monotonic() + TORN_READ_TIMEOUT
+        while time.monotonic() < give_up_at:
+            sequence, length = HEADER.unpack_from(self.mm, 0)
+            if sequence % 2 == 0:
+                if HEADER.size + length > len(self.mm):
+                    self._remap()
+                    continue
+                payload = self.mm[HEADER.size:HEADER.size + length]
+                if HEADER.unpack_from(self.mm, 0)[0] == sequence:
+                    return sequence // 2, json.loads(payload) if length else None
+            time.sleep(0)
+        with self.locked(fcntl.LOCK_SH):
+            return self._read_locked()
+
+    def _read_locked(self) -> tuple[int, dict | None]:
+        """Reads while holding the file lock, so no write is in progress."""
+        self._remap()
+        sequence, length = HEADER.unpack_from(self.mm, 0)
+        if sequence % 2 == 1 or length == 0:
+            return sequence // 2, None  # The last writer died mid-write: the document is lost
+        return sequence // 2, json.loads(self.mm[HEADER.size:HEADER.size + length])
+
+    def update(self, change) -> tuple[int, dict]:
+        """
+        Replaces the document with `change(current document or None)` and returns the
+        new version and document. Concurrent updates are applied one after the other.
+        """
+        with self.locked(fcntl.LOCK_EX):
+            _, document = self._read_locked()
+            document = change(document)
+            payload = json.dumps(document).encode()
+
+            needed = HEADER.size + len(payload)
+            if needed > len(self.mm):
+                os.ftruncate(self.fd, max(needed, 2 * len(self.mm)))
+                self._remap()
+
+            sequence, _ = HEADER.unpack_from(self.mm, 0)
+            sequence |= 1  # Odd: write in progress. Stays odd after a writer died mid-write.
+            HEADER.pack_into(self.mm, 0, sequence, 0)
+            self.mm[HEADER.size:needed] = payload
+            HEADER.pack_into(self.mm, 0, sequence + 1, len(payload))
+            return (sequence + 1) // 2, document
+
+    def close(self):
+        self.mm.close()
+        os.close(self.fd)
+
+
+class LeaderLock:
+    """
+    Elects one leader among the processes sharing `path`: whoever holds the exclusive
+    flock. The OS releases it when the leader exits, so another process can take over.
+    """
+
+    def __init__(self, path: str):
+        self.fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        self.held = False
+
+    def try_acquire(self) -> bool:
+        """Becomes the leader if no other process is. Returns whether this process leads."""
+        if not self.held:
+            try:
+                fcntl.flock(self.fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                self.held = True
+            except BlockingIOError:
+                pass
+        return self.held
+
+    def close(self):
+        os.close(self.fd)
+        self.held = False
@@ -0,0 +1,95 @@
+from contextlib import nullcontext
+import json
+import logging
+
+logger = logging.getLogger("mcp-gateway")
+
+# Attributes every LogRecord has. Anything else was passed through `extra=` and is
+# logged as a structured field.
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "taskName"}
+
+
+def record_fields(record: logging.LogRecord) -> dict:
+    return {key: value for key, value in vars(record).items() if key not in _RECORD_ATTRIBUTES}
+
+
+class KeyValueFormatter(logging.Formatter):
+    """`<time> <LEVEL> <message> key=value ...`"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        fields = " ".join(f"{key}={json.dumps(value, default=str)}" for key, value in record_fields(record).items())
+        return f"{line} {fields}" if fields else line
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, for log shippers."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            **record_fields(record),
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def configure_logging(level: str, format: str):
+    """Sends the gateway's logs to stderr at `level`, as key=value text or, with `format="json"`, JSON lines."""
+    handler = logging.StreamHandler()
+    if format == "json":
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(KeyValueFormatter("%(asctime)s %(levelname)s %(message)s"))
+    logger.handlers[:] = [handler]
+    logger.setLevel(level.upper())
+    logger.propagate = False
+
+
+# Returned by span() while tracing is off: entering and leaving it does nothing.
+_NO_SPAN = nullcontext()
+_tracer = None
+_tracer_provider = None
+
+
+def configure_tracing(mode: str) -> bool:
+    """
+    Turns on OpenTelemetry spans. `mode` is "otel" to use whatever tracer provider
+    the process was set up with (e.g. by `opentelemetry-instrument`), or "console" to
+    print finished spans to stdout. Tracing stays off if OpenTelemetry is not installed.
+    """
+    global _tracer, _tracer_provider
+    try:
+        from opentelemetry import trace
+
+        if mode == "console":
+            from opentelemetry.sdk.resources import Resource
+            from opentelemetry.sdk.trace import TracerProvider
+            from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+
+            _tracer_provider = TracerProvider(resource=Resource.create({"service.name": "mcp-gateway"}))
+            _tracer_provider.add_span_processor(BatchSpanProcessor(ConsoleSpanExporter()))
+            trace.set_tracer_provider(_tracer_provider)
+    except ImportError as e:
+        logger.warning("Tracing disabled: OpenTelemetry is not installed", extra={"error": str(e)})
+        return False
+
+    _tracer = trace.get_tracer("mcp-gateway")
+    return True
+
+
+def shutdown_tracing():
+    """Flushes spans that have not been exported yet."""
+    if _tracer_provider is not None:
+        _tracer_provider.shutdown()
+
+
+def span(name: str, attributes: dict | None = None):
+    """A context manager tracing the enclosed block as span `name`, or a no-op while tracing is off."""
+    if _tracer is None:
+        return _NO_SPAN
+    return _tracer.start_as_current_span(name, attributes=attributes)
@@ -0,0 +1,301 @@
+from dataclasses import dataclass, field
+import asyncio
+import json
+import os
+import random
+import time
+
+from embedded import EmbeddedServer
+
+
+class UpstreamUnavailable(Exception):
+    """A request was refused without contacting the server: its circuit is open or its queue is full."""
+
+
+class DeadlineExceeded(Exception):
+    """The caller's deadline passed before the upstream server answered."""
+
+
+class CircuitBreaker:
+    """
+    Stops sending requests to a failing server.
+
+    After `failure_threshold` consecutive failures the circuit opens and requests are
+    refused at once. After `reset_timeout` seconds one probe request is let through
+    (half-open). Its success closes the circuit, and its failure opens it again.
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+
+    def allow(self) -> bool:
+        if self.state == "closed":
+            return True
+        # One probe per `reset_timeout`, so a probe that never reports back cannot wedge the circuit.
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            self.state = "half_open"
+            self.opened_at = time.monotonic()
+            return True
+        return False
+
+    def record_success(self):
+        self.state = "closed"
+        self.failures = 0
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+    def to_dict(self) -> dict:
+        return {"state": self.state, "failures": self.failures}
+
+
+class ConcurrencyLimiter:
+    """
+    Bounds the requests in flight to a server. Up to `max_queue` more requests may
+    wait for a slot. Beyond that they are refused at once, so a slow server
+    produces fast 503s instead of an ever-growing pile of waiting requests.
+    """
+
+    def __init__(self, max_concurrency: int, max_queue: int):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.waiting = 0
+        self.in_flight = 0
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def acquire(self, timeout: float):
+        if self._semaphore.locked() and self.waiting >= self.max_queue:
+            raise UpstreamUnavailable("queue is full")
+
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout)
+        except asyncio.TimeoutError:
+            raise DeadlineExceeded("deadline exceeded while queued")
+        finally:
+            self.waiting -= 1
+        self.in_flight += 1
+
+    def release(self):
+        self.in_flight -= 1
+        self._semaphore.release()
+
+    def to_dict(self) -> dict:
+        return {"in_flight": self.in_flight, "queued": self.waiting, "max_concurrency": self.max_concurrency, "max_queue": self.max_queue}
+
+
+class SessionPool:
+    """
+    Initialized MCP sessions (`Mcp-Session-Id`s) of one stateful replica, so the
+    initialize handshake is paid once per session rather than once per request.
+
+    A session is checked out by one request at a time: the server routes responses by
+    JSON-RPC id within a session, and ids from different callers may collide. Up to
+    `size` sessions are opened; further requests wait for one to be handed back.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self.idle: list[str] = []
+        self.in_use = 0
+        self.handshakes = 0
+        self._semaphore = asyncio.Semaphore(size)
+
+    async def acquire(self, initialize) -> str:
+        """Checks out an idle session, or opens one with `await initialize()` if none is idle."""
+        await self._semaphore.acquire()
+        try:
+            if self.idle:
+                session_id = self.idle.pop()
+            else:
+                session_id = await initialize()
+                self.handshakes += 1
+        except BaseException:
+            self._semaphore.release()
+            raise
+        self.in_use += 1
+        return session_id
+
+    def release(self, session_id: str):
+        """Hands a session back for reuse."""
+        self.in_use -= 1
+        self.idle.append(session_id)
+        self._semaphore.release()
+
+    def discard(self, session_id: str):
+        """Forgets a checked-out session that expired or was left in an unknown state."""
+        self.in_use -= 1
+        self._semaphore.release()
+
+    def clear_idle(self):
+        """Forgets the idle sessions, e.g. because the server restarted and lost them all."""
+        self.idle.clear()
+
+    def to_dict(self) -> dict:
+        return {"size": self.size, "idle": len(self.idle), "in_use": self.in_use, "handshakes": self.handshakes}
+
+
+@dataclass(eq=False)
+class Replica:
+    """One instance of an MCP server, with the state used for health checks and load balancing."""
+    url: str
+    healthy: bool = True
+    outstanding: int = 0  # Requests currently in flight
+    failures: int = 0  # Consecutive failed health checks or connection attempts
+    sessions: SessionPool | None = None  # Only for stateful servers
+
+    def acquire(self):
+        self.outstanding += 1
+
+    def release(self):
+        self.outstanding -= 1
+
+    def record_success(self):
+        self.failures = 0
+        self.healthy = True
+
+    def record_failure(self, unhealthy_threshold: int):
+        self.failures += 1
+        if self.failures >= unhealthy_threshold:
+            self.healthy = False
+
+    def to_dict(self) -> dict:
+        state = {"url": self.url, "healthy": self.healthy, "outstanding": self.outstanding, "failures": self.failures}
+        if self.sessions is not None:
+            state["sessions"] = self.sessions.to_dict()
+        return state
+
+
+# Settings a server's config entry may override
+SERVER_DEFAULTS = {
+    "max_concurrency": 64,  # Requests in flight to the server, across replicas
+    "max_queue": 128,  # Requests waiting for one of those slots
+    "max_connections": 64,  # Connection pool size, per replica
+    "breaker_failure_threshold": 5,
+    "breaker_reset_timeout": 10.0,  # Seconds
+    "stateful": False,  # Whether the server needs an initialized Mcp-Session-Id
+    "session_pool_size": 8,  # Sessions kept per replica of a stateful server
+    "embedded": None,  # "path/to/server.py:attribute" of a FastMCP server to host in process instead of replicas
+}
+
+
+@dataclass(eq=False)
+class UpstreamServer:
+    """A named MCP server backed by one or more interchangeable replicas, or embedded in the gateway."""
+    name: str
+    replicas: list[Replica] = field(default_factory=list)
+    settings: dict = field(default_factory=lambda: dict(SERVER_DEFAULTS))
+    limiter: ConcurrencyLimiter = None
+    breaker: CircuitBreaker = None
+    embedded: EmbeddedServer | None = None
+
+    def __post_init__(self):
+        for replica in self.replicas:
+            if not self.settings["stateful"]:
+                replica.sessions = None
+            elif replica.sessions is None or replica.sessions.size != self.settings["session_pool_size"]:
+                replica.sessions = SessionPool(self.settings["session_pool_size"])
+        if self.limiter is None:
+            self.limiter = ConcurrencyLimiter(self.settings["max_concurrency"], self.settings["max_queue"])
+        if self.breaker is None:
+            self.breaker = CircuitBreaker(self.settings["breaker_failure_threshold"], self.settings["breaker_reset_timeout"])
+
+    @classmethod
+    def from_config(cls, name: str, config, previous: "UpstreamServer | None" = None, base_dir: str = ".") -> "UpstreamServer":
+        """
+        Builds a server from its config entry: a URL, a list of URLs,
+        `{"replicas": [...], **SERVER_DEFAULTS overrides}`, or
+        `{"embedded": "path/to/server.py:attribute", ...}` with the path relative to
+        `base_dir`. Replicas that already exist in `previous` keep their health and load
+        state, and so does an unchanged embedded server. If the limits are unchanged,
+        the limiter and breaker are kept too.
+        """
+        if isinstance(config, str):
+            config = {"replicas": [config]}
+        elif isinstance(config, list):
+            config = {"replicas": config}
+
+        unknown = set(config) - set(SERVER_DEFAULTS) - {"replicas"}
+        if unknown:
+            raise ValueError(f"Unknown settings for server '{name}': {sorted(unknown)}")
+        settings = {**SERVER_DEFAULTS, **{k: v for k, v in config.items() if k in SERVER_DEFAULTS}}
+
+        urls = config.get("replicas")
+        embedded = None
+        if settings["embedded"] is not None:
+            if not isinstance(settings["embedded"], str) or urls:
+                raise ValueError(f"Server '{name}' is embedded: it needs a 'path/to/server.py:attribute' string and no replicas.")
+            if previous is not None and previous.embedded is not None and previous.embedded.spec == settings["embedded"]:
+                embedded = previous.embedded
+            else:
+                embedded = EmbeddedServer(settings["embedded"], base_dir)
+            urls = []
+        elif not urls or not all(isinstance(url, str) for url in urls):
+            raise ValueError(f"Server '{name}' needs a non-empty list of replica URLs.")
+
+        existing = {replica.url: replica for replica in previous.replicas} if previous else {}
+        keep_state = previous is not None and previous.settings == settings
+        return cls(
+            name=name,
+            replicas=[existing.get(url) or Replica(url) for url in dict.fromkeys(urls)],
+            settings=settings,
+            limiter=previous.limiter if keep_state else None,
+            breaker=previous.breaker if keep_state else None,
+            embedded=embedded,
+        )
+
+    def to_config(self) -> dict:
+        """The config entry this server was built from, as `from_config` takes it."""
+        config = {"replicas": [replica.url for replica in self.replicas], **self.settings}
+        if self.embedded is not None:
+            del config["replicas"]
+        return config
+
+    def pick(self, policy: str = "p2c", exclude=()) -> Replica | None:
+        """
+        Picks a replica for the next request, skipping those in `exclude`.
+
+        Unhealthy replicas are only used when no healthy one is left, so a server whose
+        replicas all fail their health checks is still tried rather than cut off.
+        `policy` is "p2c" (the less loaded of two random replicas) or "least" (the least
+        loaded replica overall).
+        """
+        candidates = [r for r in self.replicas if r.healthy and r not in exclude]
+        if not candidates:
+            candidates = [r for r in self.replicas if r not in exclude]
+        if len(candidates) <= 1:
+            return candidates[0] if candidates else None
+
+        if policy == "least":
+            return min(candidates, key=lambda r: (r.outstanding, random.random()))
+
+        first, second = random.sample(candidates, 2)
+        return first if first.outstanding <= second.outstanding else second
+
+    def to_dict(self) -> dict:
+        state = {
+            "replicas": [replica.to_dict() for replica in self.replicas],
+            "circuit": self.breaker.to_dict(),
+            "concurrency": self.limiter.to_dict(),
+        }
+        if self.embedded is not None:
+            state["embedded"] = self.embedded.to_dict()
+        return state
+
+
+def load_servers(path: str) -> dict[str, UpstreamServer]:
+    """
+    Loads the server registry from a JSON file mapping server names to their config
+    entries. Paths of embedded servers are relative to the file.
+    """
+    with open(path, encoding="utf-8") as f:
+        config = json.load(f)
+    base_dir = os.path.dirname(os.path.abspath(path))
+    return {name: UpstreamServer.from_config(name, entry, base_dir=base_dir) for name, entry in config.items()}
@@ -0,0 +1,114 @@
+from functools import lru_cache
+import ast
+import base64
+import os
+
+import numpy as np
+
+# Longest array a tool accepts
+MAX_ARRAY_LENGTH = int(os.getenv("CALCULATOR_MAX_ARRAY_LENGTH", 1_000_000))
+
+# An array argument: a JSON list of numbers, or the base64 of little-endian float64 values
+Array = list[float] | str
+
+# Functions and constants an expression may use
+FUNCTIONS = {
+    "abs": np.abs,
+    "sqrt": np.sqrt,
+    "exp": np.exp,
+    "log": np.log,
+    "log10": np.log10,
+    "sin": np.sin,
+    "cos": np.cos,
+    "tan": np.tan,
+    "floor": np.floor,
+    "ceil": np.ceil,
+    "round": np.round,
+    "minimum": np.minimum,
+    "maximum": np.maximum,
+    "clip": np.clip,
+    "where": np.where,
+    "sum": np.sum,
+    "mean": np.mean,
+    "std": np.std,
+    "min": np.min,
+    "max": np.max,
+    "dot": np.dot,
+}
+CONSTANTS = {"pi": np.pi, "e": np.e}
+
+ALLOWED_NODES = (
+    ast.Expression, ast.BinOp, ast.UnaryOp, ast.Compare, ast.Call, ast.Name, ast.Load, ast.Constant,
+    ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod, ast.Pow, ast.UAdd, ast.USub,
+    ast.Lt, ast.LtE, ast.Gt, ast.GtE, ast.Eq, ast.NotEq,
+)
+
+
+def to_array(value: Array) -> np.ndarray:
+    """Decodes an array argument into a float64 array."""
+    if isinstance(value, str):
+        try:
+            data = base64.b64decode(value, validate=True)
+        except ValueError as e:
+            raise ValueError(f"Invalid base64 array: {e}")
+        if len(data) % 8:
+            raise ValueError("A base64 array must hold a whole number of float64 values (8 bytes each)")
+        array = np.frombuffer(data, dtype="<f8")
+    else:
+        array = np.asarray(value, dtype=np.float64)
+    if array.ndim != 1:
+        raise ValueError("Arrays must be flat lists of numbers")
+    if len(array) > MAX_ARRAY_LENGTH:
+        raise ValueError(f"Arrays are limited to {MAX_ARRAY_LENGTH} values, got {len(array)}")
+    return array
+
+
+def from_array(result, encoding: str) -> dict:
+    """Encodes a tool's result: a number as {"value": ...}, an array as a list or as base64 float64."""
+    result = np.asarray(result, dtype=np.float64)
+    if result.ndim == 0:
+        return {"value": float(result)}
+    if encoding == "base64":
+        return {"length": len(result), "base64": base64.b64encode(result.astype("<f8").tobytes()).decode("ascii")}
+    return {"length": len(result), "values": result.tolist()}
+
+
+@lru_cache(maxsize=256)
+def compile_expression(expression: str):
+    """
+    Parses and checks an arithmetic expression, and compiles it once per distinct
+    expression. Only numbers, names, arithmetic and comparison operators and calls to
+    FUNCTIONS are allowed: no attributes, subscripts or other builtins. Integer
+    literals become floats, so `10 ** 10 ** 10` overflows instead of computing a huge int.
+    """
+    try:
+        tree = ast.parse(expression, mode="eval")
+    except SyntaxError as e:
+        raise ValueError(f"Invalid expression: {e.msg}")
+    for node in ast.walk(tree):
+        if not isinstance(node, ALLOWED_NODES):
+            raise ValueError(f"Unsupported syntax in expression: {type(node).__name__}")
+        if isinstance(node, ast.Constant):
+            if type(node.value) not in (int, float):
+                raise ValueError(f"Unsupported constant in expression: {node.value!r}")
+            node.value = float(node.value)
+        elif isinstance(node, ast.Compare) and len(node.ops) > 1:
+            raise ValueError("Chained comparisons are not supported; combine comparisons with where()")
+        elif isinstance(node, ast.Call):
+            if not isinstance(node.func, ast.Name) or node.func.id not in FUNCTIONS or node.keywords:
+                raise ValueError(f"Unsupported function call in expression; available: {', '.join(FUNCTIONS)}")
+    return compile(tree, "<expression>", "eval")
+
+
+def evaluate(expression: str, arrays: dict[str, np.ndarray]):
+    """Evaluates `expression` over named arrays. Floating-point errors such as division by zero raise."""
+    reserved = arrays.keys() & (FUNCTIONS.keys() | CONSTANTS.keys())
+    if reserved:
+        raise ValueError(f"Array names clash with built-in names: {', '.join(sorted(reserved))}")
+    code = compile_expression(expression)
+    names = {**FUNCTIONS, **CONSTANTS, **arrays}
+    unknown = set(code.co_names) - names.keys()
+    if unknown:
+        raise ValueError(f"Unknown names in expression: {', '.join(sorted(unknown))}")
+    with np.errstate(divide="raise", over="raise", invalid="raise"):
+        return eval(code, {"__builtins__": {}}, names)
@@ -1,36 +1,128 @@
+from arrays import Array, evaluate, from_array, to_array
 from mcp.server.fastmcp import FastMCP
+from mcp.types import ToolAnnotations
+from typing import Literal
 import logging
+import numpy as np
+import os
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Create an MCP server
-mcp = FastMCP(name="Calculator Server", stateless_http=True, host="127.0.0.1", port=3001)
+# CALCULATOR_PORT lets several replicas run side by side (see scripts/replicas.sh).
+# CALCULATOR_STATELESS=false makes clients open a session first (see scripts/stateful.sh).
+mcp = FastMCP(
+    name="Calculator Server",
+    stateless_http=os.getenv("CALCULATOR_STATELESS", "true").lower() in ("1", "true", "yes"),
+    host="127.0.0.1",
+    port=int(os.getenv("CALCULATOR_PORT", 3001)),
+)
+
+# The tools are pure functions, which lets the gateway cache their results.
+PURE = ToolAnnotations(readOnlyHint=True, idempotentHint=True, openWorldHint=False)
 
 # Define calculator tools
-@mcp.tool(description="Add two numbers")
+@mcp.tool(description="Add two numbers", annotations=PURE)
 def add(a: float, b: float) -> float:
     """Add two numbers and return the result."""
     return a + b
 
-@mcp.tool(description="Subtract two numbers")
+@mcp.tool(description="Subtract two numbers", annotations=PURE)
 def subtract(a: float, b: float) -> float:
     """Subtract b from a and return the result."""
     return a - b
 
-@mcp.tool(description="Multiply two numbers")
+@mcp.tool(description="Multiply two numbers", annotations=PURE)
 def multiply(a: float, b: float) -> float:
     """Multiply two numbers and return the result."""
     return a * b
 
-@mcp.tool(description="Divide two numbers")
+@mcp.tool(description="Divide two numbers", annotations=PURE)
 def divide(a: float, b: float) -> float:
     """Divide a by b and return the result. Raises error if b is zero."""
     if b == 0:
         raise ValueError("Division by zero is not allowed")
     return a / b
 
+# Array tools: one call handles a whole dataset instead of one call per number.
+# Arrays are JSON lists or base64 float64 buffers (see arrays.py), and so are results
+# when `encoding` is "base64".
+ELEMENTWISE = {
+    "add": np.add,
+    "subtract": np.subtract,
+    "multiply": np.multiply,
+    "divide": np.divide,
+    "power": np.power,
+    "minimum": np.minimum,
+    "maximum": np.maximum,
+}
+STATISTICS = {
+    "count": len,
+    "sum": np.sum,
+    "mean": np.mean,
+    "std": np.std,
+    "min": np.min,
+    "max": np.max,
+    "median": np.median,
+}
+# What reduce computes when no statistics are asked for
+DEFAULT_STATISTICS = ["count", "sum", "mean", "std", "min", "max"]
+
+@mcp.tool(description="Apply an arithmetic operation elementwise to two arrays of the same length, or to an array and a number", annotations=PURE)
+def elementwise(
+    operation: Literal["add", "subtract", "multiply", "divide", "power", "minimum", "maximum"],
+    a: Array,
+    b: Array | float,
+    encoding: Literal["list", "base64"] = "list",
+) -> dict:
+    """Apply `operation` to a and b elementwise. Raises an error on division by zero or overflow."""
+    left = to_array(a)
+    right = b if isinstance(b, float) else to_array(b)
+    with np.errstate(divide="raise", over="raise", invalid="raise"):
+        return from_array(ELEMENTWISE[operation](left, right), encoding)
+
+@mcp.tool(description="Compute summary statistics (by default count, sum, mean, std, min and max) and percentiles of an array", annotations=PURE)
+def reduce(
+    values: Array,
+    statistics: list[Literal["count", "sum", "mean", "std", "min", "max", "median"]] | None = None,
+    percentiles: list[float] | None = None,
+) -> dict:
+    """
+    Return each requested statistic of `values` (by default all but the median), and
+    each percentile (0-100) under "p<percentile>".
+    """
+    array = to_array(values)
+    if len(array) == 0:
+        raise ValueError("Cannot reduce an empty array")
+    result = {}
+    for name in statistics if statistics is not None else DEFAULT_STATISTICS:
+        value = STATISTICS[name](array)
+        result[name] = int(value) if name == "count" else float(value)
+    if percentiles:
+        for percentile, value in zip(percentiles, np.percentile(array, percentiles)):
+            result[f"p{percentile:g}"] = float(value)
+    return result
+
+@mcp.tool(description="Dot product of two arrays of the same length", annotations=PURE)
+def dot(a: Array, b: Array) -> float:
+    """Return the sum of the elementwise products of a and b."""
+    return float(np.dot(to_array(a), to_array(b)))
+
+@mcp.tool(
+    description=(
+        "Evaluate an arithmetic expression over named arrays, e.g. 'sqrt(x ** 2 + y ** 2)' or 'where(x > 0, x, 0)'. "
+        "Supports + - * / // % **, comparisons, the constants pi and e, and the functions "
+        "abs, sqrt, exp, log, log10, sin, cos, tan, floor, ceil, round, minimum, maximum, clip, where, sum, mean, std, min, max and dot."
+    ),
+    annotations=PURE,
+)
+def evaluate_expression(expression: str, arrays: dict[str, Array] | None = None, encoding: Literal["list", "base64"] = "list") -> dict:
+    """Evaluate `expression` with each name bound to its array. Returns a number or an array."""
+    arrays = {name: to_array(value) for name, value in (arrays or {}).items()}
+    return from_array(evaluate(expression, arrays), encoding)
+
 
 if __name__ == "__main__":
     print("Hello from Calculator Server!")
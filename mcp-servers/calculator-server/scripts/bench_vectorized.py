@@ -0,0 +1,79 @@
+"""
+Compares adding two arrays with one `add` call per element against a single
+`elementwise` call, with the arrays sent inline as JSON lists and as base64 float64.
+
+Start the calculator first. Point `--url` at the gateway (http://127.0.0.1:8000/mcp)
+to include its hop.
+
+Usage:
+    $ cd mcp-servers/calculator-server
+    $ python scripts/bench_vectorized.py [--url http://127.0.0.1:3001/mcp/] [--count 10000]
+"""
+import argparse
+import base64
+import json
+import random
+import time
+
+import httpx
+import numpy as np
+
+HEADERS = {"Accept": "application/json, text/event-stream", "Content-Type": "application/json"}
+
+
+def call_tool(client: httpx.Client, url: str, name: str, arguments: dict) -> tuple[str, int]:
+    """Calls a tool and returns its text result and the size of the request body."""
+    body = json.dumps({"jsonrpc": "2.0", "id": 1, "method": "tools/call", "params": {"name": name, "arguments": arguments}})
+    res = client.post(url, content=body, headers=HEADERS)
+    res.raise_for_status()
+    if res.headers["content-type"].startswith("text/event-stream"):
+        message = json.loads([line for line in res.text.splitlines() if line.startswith("data:")][-1][5:])
+    else:
+        message = res.json()
+    result = message["result"]
+    if result.get("isError"):
+        raise RuntimeError(result["content"][0]["text"])
+    return result["content"][0]["text"], len(body)
+
+
+def report(label: str, elapsed: float, calls: int, request_bytes: int):
+    print(f"  {label:<28} {elapsed * 1000:10.1f} ms  {calls:>6} calls  {request_bytes / 1024:9.1f} KiB sent")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--url", default="http://127.0.0.1:3001/mcp/")
+    parser.add_argument("--count", type=int, default=10_000)
+    args = parser.parse_args()
+
+    a = [random.uniform(-1000, 1000) for _ in range(args.count)]
+    b = [random.uniform(-1000, 1000) for _ in range(args.count)]
+    expected = np.add(a, b)
+    encode = lambda values: base64.b64encode(np.asarray(values, dtype="<f8").tobytes()).decode("ascii")
+
+    with httpx.Client(timeout=120) as client:
+        print(f"Adding two arrays of {args.count} numbers through {args.url}")
+
+        started, sent, scalar = time.perf_counter(), 0, []
+        for x, y in zip(a, b):
+            text, size = call_tool(client, args.url, "add", {"a": x, "b": y})
+            scalar.append(float(text))
+            sent += size
+        report("add, one call per element", time.perf_counter() - started, args.count, sent)
+        assert np.allclose(scalar, expected)
+
+        started = time.perf_counter()
+        text, size = call_tool(client, args.url, "elementwise", {"operation": "add", "a": a, "b": b})
+        report("elementwise, JSON lists", time.perf_counter() - started, 1, size)
+        assert np.allclose(json.loads(text)["values"], expected)
+
+        started = time.perf_counter()
+        text, size = call_tool(
+            client, args.url, "elementwise", {"operation": "add", "a": encode(a), "b": encode(b), "encoding": "base64"}
+        )
+        report("elementwise, base64", time.perf_counter() - started, 1, size)
+        assert np.array_equal(np.frombuffer(base64.b64decode(json.loads(text)["base64"]), dtype="<f8"), expected)
+
+
+if __name__ == "__main__":
+    main()
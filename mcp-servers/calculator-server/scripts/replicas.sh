@@ -0,0 +1,21 @@
+#!/usr/bin/env bash
+# Starts N calculator replicas on consecutive ports (default: 3 replicas from 3001)
+# and prints the matching servers.json entry for the gateway. Ctrl+C stops them all.
+set -euo pipefail
+
+N=${1:-3}
+BASE_PORT=${2:-3001}
+cd "$(dirname "$0")/.."
+
+trap 'kill $(jobs -p) 2>/dev/null' EXIT
+
+URLS=()
+for ((i = 0; i < N; i++)); do
+  PORT=$((BASE_PORT + i))
+  CALCULATOR_PORT=$PORT python calculator.py > "/tmp/calculator-$PORT.log" 2>&1 &
+  URLS+=("\"http://localhost:$PORT/mcp/\"")
+done
+
+echo "Started $N calculator replicas. servers.json entry:"
+echo "    \"calculator\": {\"replicas\": [$(IFS=,; echo "${URLS[*]}" | sed 's/,/, /g')]}"
+wait
@@ -0,0 +1,272 @@
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Bytes sniffed for a NUL to tell binary files apart from text
+BINARY_SNIFF_BYTES = 8192
+
+# Rows a search fetches from the index at a time
+CANDIDATE_BATCH_SIZE = 64
+
+
+def walk_files(root: str, top: str | None = None):
+    """
+    Yields `(path, stat)` for the regular files under `top` (default `root`), sorted by
+    path. `path` is relative to `root` with "/" separators. Hidden entries and symlinks
+    are skipped.
+    """
+    def entries(directory: str) -> list:
+        # Reversed, so that pop() returns the next entry. A directory sorts as "name/", so
+        # walking depth-first visits paths in the same order as sorting them.
+        try:
+            with os.scandir(directory) as it:
+                visible = [e for e in it if not e.name.startswith(".")]
+            return sorted(visible, key=lambda e: e.name + "/" if e.is_dir(follow_symlinks=False) else e.name, reverse=True)
+        except OSError:
+            return []
+
+    stack = [entries(top or root)]
+    while stack:
+        if not stack[-1]:
+            stack.pop()
+            continue
+        entry = stack[-1].pop()
+        try:
+            if entry.is_symlink():
+                continue
+            if entry.is_dir():
+                stack.append(entries(entry.path))
+            elif entry.is_file():
+                yield os.path.relpath(entry.path, root).replace(os.sep, "/"), entry.stat()
+        except OSError:
+            continue
+
+
+def read_text(path: str, max_bytes: int) -> str | None:
+    """The content of a text file, or None if it is larger than `max_bytes`, binary or unreadable."""
+    try:
+        with open(path, "rb") as f:
+            data = f.read(max_bytes + 1)
+    except OSError:
+        return None
+    if len(data) > max_bytes or b"\0" in data[:BINARY_SNIFF_BYTES]:
+        return None
+    return data.decode("utf-8", errors="replace")
+
+
+def glob_to_regex(pattern: str) -> re.Pattern:
+    """
+    Compiles a glob into a regex over "/"-separated relative paths. `*` and `?` stay
+    within one path segment, `**` spans any number of them and `[...]` is a character class.
+    """
+    parts, i = [], 0
+    while i < len(pattern):
+        if pattern.startswith("**/", i):
+            parts.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("**", i):
+            parts.append(".*")
+            i += 2
+        elif pattern[i] == "*":
+            parts.append("[^/]*")
+            i += 1
+        elif pattern[i] == "?":
+            parts.append("[^/]")
+            i += 1
+        elif pattern[i] == "[" and "]" in pattern[i + 2:]:
+            end = pattern.index("]", i + 2)
+            body = pattern[i + 1:end]
+            if body.startswith("!"):
+                body = "^" + body[1:]
+            parts.append("[" + body.replace("\\", "\\\\") + "]")
+            i = end + 1
+        else:
+            parts.append(re.escape(pattern[i]))
+            i += 1
+    return re.compile("".join(parts) + r"\Z", re.DOTALL)
+
+
+def required_literal(pattern: str) -> str:
+    """
+    The longest run of plain characters that every match of the regex `pattern` must
+    contain, used to narrow down candidate files. Returns "" when unsure, e.g. for
+    alternations, so that no file is wrongly left out.
+    """
+    if "|" in pattern or re.compile(pattern).flags & re.VERBOSE:
+        return ""
+    runs, run, depth, i = [], "", 0, 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == "\\":
+            escaped = pattern[i + 1:i + 2]
+            i += 2
+            if escaped.isalnum() or not escaped:
+                runs.append(run)  # A class like \d, an anchor like \b or a backreference
+                run = ""
+                continue
+            char = escaped
+        elif char == "[":
+            # Skip the character class, whose first character may be a literal "]"
+            i += 2 if pattern[i + 1:i + 2] == "^" else 1
+            i += 1
+            while i < len(pattern) and pattern[i] != "]":
+                i += 2 if pattern[i] == "\\" else 1
+            i += 1
+            runs.append(run)
+            run = ""
+            continue
+        elif char in "*?{":
+            # The preceding character is optional: it ends the run
+            runs.append(run[:-1])
+            run = ""
+            i = pattern.index("}", i) + 1 if char == "{" and "}" in pattern[i:] else i + 1
+            continue
+        elif char in ".^$()+":
+            depth += {"(": 1, ")": -1}.get(char, 0)
+            runs.append(run)
+            run = ""
+            i += 1
+            continue
+        else:
+            i += 1
+        if depth == 0:
+            run += char
+    runs.append(run)
+    return max(runs, key=len)
+
+
+def match_lines(text: str, regex: re.Pattern):
+    """Yields `(line number, line)` for each line of `text` on which `regex` matches, once per line."""
+    line_number, position, last_line = 1, 0, 0
+    for match in regex.finditer(text):
+        line_number += text.count("\n", position, match.start())
+        position = match.start()
+        if line_number == last_line:
+            continue
+        last_line = line_number
+        start = text.rfind("\n", 0, position) + 1
+        end = text.find("\n", position)
+        yield line_number, text[start:end if end != -1 else len(text)]
+
+
+class FileIndex:
+    """
+    An SQLite index of the files under `root`: their paths, and the contents of the text
+    files in an FTS5 trigram table, so a search only has to look at the files that
+    contain its literal part.
+
+    The index is brought up to date by `refresh`: a walk that stats every file and
+    re-reads only those whose size or mtime changed. Searches refresh it at most every
+    `ttl` seconds, so their results may be that much out of date.
+
+    Tools may run in several threads at once (e.g. with the server embedded in the
+    gateway), so the connection and `files` are only used under `lock`.
+    """
+
+    def __init__(self, root: str, database: str, max_file_bytes: int, ttl: float):
+        self.root = root
+        self.max_file_bytes = max_file_bytes
+        self.ttl = ttl
+        self.refreshed_at = float("-inf")
+        self.lock = threading.RLock()
+        self.db = sqlite3.connect(database, check_same_thread=False)
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+            CREATE TABLE IF NOT EXISTS files (id INTEGER PRIMARY KEY, path TEXT UNIQUE NOT NULL, size INTEGER, mtime_ns INTEGER);
+            CREATE VIRTUAL TABLE IF NOT EXISTS contents USING fts5(body, tokenize='trigram');
+        """)
+        with self.db:
+            row = self.db.execute("SELECT value FROM meta WHERE key = 'root'").fetchone()
+            if row is None or row[0] != root:
+                # Built for another root: its relative paths mean nothing here.
+                self.db.execute("DELETE FROM files")
+                self.db.execute("DELETE FROM contents")
+                self.db.execute("INSERT OR REPLACE INTO meta VALUES ('root', ?)", (root,))
+        # path -> (id, size, mtime_ns), in path order
+        self.files = {
+            path: (file_id, size, mtime_ns)
+            for file_id, path, size, mtime_ns in self.db.execute("SELECT id, path, size, mtime_ns FROM files ORDER BY path")
+        }
+
+    def refresh(self, force: bool = False):
+        """Re-indexes the files that were added, changed or removed since the last refresh."""
+        with self.lock:
+            if not force and time.monotonic() - self.refreshed_at < self.ttl:
+                return
+            self._refresh()
+
+    def _refresh(self):
+        """Walks the tree and updates the index. Called with `lock` held."""
+        started = time.perf_counter()
+        seen = {path: (stat.st_size, stat.st_mtime_ns) for path, stat in walk_files(self.root)}
+        changed = removed = 0
+        # Changes go to a copy, kept only once the transaction commits, so that `files`
+        # always matches the database.
+        files = dict(self.files)
+        with self.db:
+            for path in files.keys() - seen.keys():
+                file_id = files.pop(path)[0]
+                self.db.execute("DELETE FROM files WHERE id = ?", (file_id,))
+                self.db.execute("DELETE FROM contents WHERE rowid = ?", (file_id,))
+                removed += 1
+            for path, (size, mtime_ns) in seen.items():
+                known = files.get(path)
+                if known is not None and known[1:] == (size, mtime_ns):
+                    continue
+                if known is None:
+                    file_id = self.db.execute(
+                        "INSERT INTO files (path, size, mtime_ns) VALUES (?, ?, ?)", (path, size, mtime_ns)
+                    ).lastrowid
+                else:
+                    file_id = known[0]
+                    self.db.execute("UPDATE files SET size = ?, mtime_ns = ? WHERE id = ?", (size, mtime_ns, file_id))
+                    self.db.execute("DELETE FROM contents WHERE rowid = ?", (file_id,))
+                text = read_text(os.path.join(self.root, path), self.max_file_bytes)
+                if text is not None:
+                    self.db.execute("INSERT INTO contents (rowid, body) VALUES (?, ?)", (file_id, text))
+                files[path] = (file_id, size, mtime_ns)
+                changed += 1
+        if changed or removed:
+            self.files = dict(sorted(files.items()))
+        self.refreshed_at = time.monotonic()
+        logger.info(
+            f"Index refreshed in {(time.perf_counter() - started) * 1000:.0f} ms: "
+            f"{len(self.files)} files, {changed} re-indexed, {removed} removed"
+        )
+
+    def paths(self) -> list[str]:
+        """The indexed paths, relative to the root and sorted."""
+        with self.lock:
+            self.refresh()
+            return list(self.files)
+
+    def candidates(self, literal: str, prefix: str = ""):
+        """
+        Yields `(path, text)` for the indexed text files under `prefix` (a relative directory
+        path ending in "/", or "" for all) that may contain `literal`, in path order. The
+        trigram match ignores case, so callers still have to run their own regex. Literals
+        shorter than a trigram cannot narrow anything down and yield every text file.
+        """
+        # Paths under the prefix sort between it and the prefix with its "/" bumped to "0".
+        query = (
+            "SELECT files.path, contents.body FROM contents JOIN files ON files.id = contents.rowid "
+            "WHERE files.path >= ? AND files.path < ?"
+        )
+        parameters = [prefix, prefix[:-1] + "0" if prefix else "\U0010ffff"]
+        if len(literal) >= 3:
+            query += " AND contents.body MATCH ?"
+            parameters.append('"' + literal.replace('"', '""') + '"')
+        with self.lock:
+            self.refresh()
+            cursor = self.db.execute(query + " ORDER BY files.path", parameters)
+        while True:
+            with self.lock:
+                rows = cursor.fetchmany(CANDIDATE_BATCH_SIZE)
+            if not rows:
+                return
+            yield from rows
@@ -1,5 +1,13 @@
-from mcp.server.fastmcp import FastMCP
+from contextlib import nullcontext
+from datetime import datetime, timezone
+from mcp.server.fastmcp import Context, FastMCP
+from file_index import FileIndex, glob_to_regex, match_lines, read_text, required_literal, walk_files
+import codecs
 import logging
+import mmap
+import os
+import re
+import sqlite3
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -7,27 +15,381 @@ logger = logging.getLogger(__name__)
 
 server = FastMCP("FileSystem Server", stateless_http=True, host="127.0.0.1", port=3003)
 
+# Largest amount of file content a single tool result may carry. Longer reads are
+# truncated and say where to continue, so a huge file never has to fit in memory here,
+# in the gateway or in the agent.
+MAX_RESULT_BYTES = int(os.getenv("FILESYSTEM_MAX_RESULT_BYTES", 1024 * 1024))
+
+# Block size for scanning and writing files
+CHUNK_SIZE = 1024 * 1024
+
+# Directory the listing and search tools are confined to
+ROOT = os.path.realpath(os.getenv("FILESYSTEM_ROOT", os.getcwd()))
+
+# Files larger than this are not searched
+SEARCH_MAX_FILE_BYTES = int(os.getenv("FILESYSTEM_SEARCH_MAX_FILE_BYTES", 4 * 1024 * 1024))
+
+# Most entries, paths or matching lines a listing or search returns
+MAX_ENTRIES = 1000
+
+# Matching lines are cut to this many characters
+MAX_LINE_CHARS = 500
+
+# Optional index of the files under ROOT: a database file, or ":memory:". Without it,
+# every glob and search walks the tree and reads the files again.
+INDEX_DATABASE = os.getenv("FILESYSTEM_INDEX", "")
+
+# Seconds a search may use the index before checking the tree for changes
+INDEX_TTL = float(os.getenv("FILESYSTEM_INDEX_TTL", 5))
+
+index = None
+if INDEX_DATABASE:
+    try:
+        index = FileIndex(ROOT, INDEX_DATABASE, SEARCH_MAX_FILE_BYTES, INDEX_TTL)
+    except sqlite3.Error as e:
+        logger.warning(f"File index disabled, searches will scan the tree: {e}")
+
+
+def decode_utf8(data: bytes) -> tuple[str, int]:
+    """
+    Decodes `data`, leaving out a multi-byte character cut off at the end.
+    Returns the text and the number of bytes it was decoded from.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    text = decoder.decode(data, final=False)
+    pending, _ = decoder.getstate()
+    return text, len(data) - len(pending)
+
+
+def open_mmap(f):
+    """Maps a file read-only, so only the pages that are touched get loaded. Empty files cannot be mapped."""
+    if os.fstat(f.fileno()).st_size == 0:
+        return nullcontext(b"")
+    return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def skip_lines(f, count: int, position: int = 0) -> int:
+    """
+    Byte offset just past the `count`th newline from `position` in file `f`, or the file
+    size if there are fewer. Reads sequentially in CHUNK_SIZE blocks, so memory stays flat.
+    """
+    f.seek(position)
+    remaining = count
+    while remaining > 0:
+        chunk = f.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        newlines = chunk.count(b"\n")
+        if newlines < remaining:
+            remaining -= newlines
+            position += len(chunk)
+            continue
+        index = -1
+        for _ in range(remaining):
+            index = chunk.find(b"\n", index + 1)
+        return position + index + 1
+    return position
+
+
 @server.tool()
 def read_file(path: str) -> str:
-    """Reads the content of a file at the given path."""
+    """Reads the content of a file at the given path. Files larger than the result limit are truncated; use read_file_range to read the rest."""
     try:
-        with open(path, "r", encoding="utf-8") as f:
-            return f.read()
+        with open(path, "rb") as f:
+            data = f.read(MAX_RESULT_BYTES)
+            size = os.fstat(f.fileno()).st_size
+        text, length = decode_utf8(data)
+        if size > length:
+            text += (
+                f"\n[truncated: returned {length} of {size} bytes; "
+                f"call read_file_range with offset={length} to continue]"
+            )
+        return text
     except FileNotFoundError:
         return f"Error: File not found at {path}"
     except Exception as e:
         return f"An error occurred: {e}"
 
+
 @server.tool()
-def write_file(path: str, content: str) -> str:
+def read_file_range(path: str, offset: int = 0, length: int = 65536) -> dict:
+    """
+    Reads up to `length` bytes of a file starting at byte `offset`, without loading the
+    rest of the file. Returns the text, the file size, and `next_offset` to continue from
+    (null at the end of the file). Reads are capped at the result size limit.
+    """
+    try:
+        with open(path, "rb") as f, open_mmap(f) as data:
+            size = len(data)
+            offset = max(0, min(offset, size))
+            end = min(size, offset + max(0, min(length, MAX_RESULT_BYTES)))
+            text, consumed = decode_utf8(data[offset:end])
+    except FileNotFoundError:
+        return {"error": f"File not found at {path}"}
+    except Exception as e:
+        return {"error": f"An error occurred: {e}"}
+
+    next_offset = offset + consumed
+    return {
+        "path": path,
+        "offset": offset,
+        "length": consumed,
+        "size": size,
+        "content": text,
+        "truncated": next_offset < offset + length and next_offset < size,
+        "next_offset": next_offset if next_offset < size else None,
+    }
+
+
+@server.tool()
+def read_lines(path: str, start_line: int = 1, end_line: int | None = None) -> dict:
+    """
+    Reads lines `start_line` to `end_line` (1-based, inclusive; to the end of the file if
+    omitted). Only the requested lines are loaded, and the result is capped at the result
+    size limit. Returns `next_line` to continue from if the range was cut short, and the
+    byte `next_offset` where the content stops. A line longer than the limit is returned
+    in part, with `partial_line` set; read_file_range reads the rest from `next_offset`.
+    """
+    start_line = max(1, start_line)
+    try:
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            start = skip_lines(f, start_line - 1)
+            if end_line is None:
+                end = size
+            else:
+                end = skip_lines(f, end_line - start_line + 1, start) if end_line >= start_line else start
+            f.seek(start)
+            data = f.read(min(end - start, MAX_RESULT_BYTES))
+        if start + len(data) < end:
+            # Stop at the last whole line that fits, unless not even one does.
+            last_newline = data.rfind(b"\n")
+            if last_newline != -1:
+                data = data[:last_newline + 1]
+        text, consumed = decode_utf8(data)
+        lines_read = text.count("\n")
+        if consumed and start + consumed == size and not text.endswith("\n"):
+            lines_read += 1  # The last line has no newline
+        truncated = start + consumed < end
+        partial_line = truncated and not text.endswith("\n")
+        if partial_line:
+            lines_read += 1  # Counted, so that next_line moves past it
+    except FileNotFoundError:
+        return {"error": f"File not found at {path}"}
+    except Exception as e:
+        return {"error": f"An error occurred: {e}"}
+
+    return {
+        "path": path,
+        "start_line": start_line,
+        "lines": lines_read,
+        "content": text,
+        "truncated": truncated,
+        "partial_line": partial_line,
+        "next_line": start_line + lines_read if truncated else None,
+        "next_offset": start + consumed if truncated else None,
+    }
+
+
+@server.tool()
+def tail_file(path: str, lines: int = 100) -> dict:
+    """Reads the last `lines` lines of a file, scanning backwards from its end. Capped at the result size limit."""
+    try:
+        with open(path, "rb") as f, open_mmap(f) as data:
+            size = len(data)
+            floor = max(0, size - MAX_RESULT_BYTES)
+            # A trailing newline ends the last line rather than starting an empty one.
+            position = size - 1 if data[size - 1:] == b"\n" else size
+            for _ in range(lines):
+                position = data.rfind(b"\n", floor, position)
+                if position == -1:
+                    break
+            if lines <= 0:
+                start = size
+            else:
+                start = floor if position == -1 else position + 1
+            truncated = position == -1 and floor > 0
+            text, _ = decode_utf8(data[start:size])
+    except FileNotFoundError:
+        return {"error": f"File not found at {path}"}
+    except Exception as e:
+        return {"error": f"An error occurred: {e}"}
+
+    return {"path": path, "offset": start, "size": size, "content": text, "truncated": truncated}
+
+
+def resolve_directory(path: str) -> str:
+    """The absolute path of directory `path`, relative to ROOT unless absolute. It must lie within ROOT."""
+    directory = os.path.realpath(os.path.join(ROOT, path))
+    if os.path.commonpath([ROOT, directory]) != ROOT:
+        raise ValueError(f"{path} is outside the root directory {ROOT}")
+    if not os.path.isdir(directory):
+        raise ValueError(f"Not a directory: {path}")
+    return directory
+
+
+def relative_prefix(directory: str) -> str:
+    """The path of `directory` relative to ROOT with a trailing "/", or "" for ROOT itself."""
+    return "" if directory == ROOT else os.path.relpath(directory, ROOT).replace(os.sep, "/") + "/"
+
+
+def scope(directory: str, file_pattern: str | None):
+    """
+    A filter over paths relative to ROOT: it keeps the files under `directory` whose path
+    relative to `directory` matches `file_pattern`, if one is given.
+    """
+    prefix = relative_prefix(directory)
+    pattern = glob_to_regex(file_pattern) if file_pattern else None
+    return lambda path: path.startswith(prefix) and (pattern is None or pattern.match(path, len(prefix)) is not None)
+
+
+@server.tool()
+def list_directory(path: str = ".", include_hidden: bool = False) -> dict:
+    """Lists the entries of a directory, relative to the root directory unless absolute, with their type, size and modification time."""
+    try:
+        directory = resolve_directory(path)
+        with os.scandir(directory) as it:
+            entries = sorted((e for e in it if include_hidden or not e.name.startswith(".")), key=lambda e: e.name)
+        listing = []
+        for entry in entries[:MAX_ENTRIES]:
+            stat = entry.stat(follow_symlinks=False)
+            kind = "symlink" if entry.is_symlink() else "directory" if entry.is_dir() else "file" if entry.is_file() else "other"
+            listing.append({
+                "name": entry.name,
+                "type": kind,
+                "size": stat.st_size,
+                "modified": datetime.fromtimestamp(stat.st_mtime, timezone.utc).isoformat(timespec="seconds"),
+            })
+    except Exception as e:
+        return {"error": str(e)}
+
+    return {"path": directory, "entries": listing, "truncated": len(entries) > MAX_ENTRIES}
+
+
+@server.tool()
+def glob(pattern: str, path: str = ".") -> dict:
+    """
+    Finds the files under a directory (the root directory by default) whose path relative
+    to it matches a glob pattern, e.g. "*.py" or "**/test_*.py". `*` stays within one
+    directory and `**` spans any number of them. Hidden files are skipped.
+    """
+    try:
+        directory = resolve_directory(path)
+    except ValueError as e:
+        return {"error": str(e)}
+
+    in_scope = scope(directory, pattern)
+    paths = index.paths() if index else (path for path, _ in walk_files(ROOT, directory))
+    matches = []
+    for relative in paths:
+        if in_scope(relative):
+            matches.append(os.path.join(ROOT, relative))
+            if len(matches) > MAX_ENTRIES:
+                break
+    return {"pattern": pattern, "matches": matches[:MAX_ENTRIES], "truncated": len(matches) > MAX_ENTRIES}
+
+
+@server.tool()
+def search(
+    pattern: str,
+    path: str = ".",
+    file_pattern: str | None = None,
+    regex: bool = False,
+    ignore_case: bool = False,
+    max_results: int = 100,
+) -> dict:
+    """
+    Searches the text files under a directory (the root directory by default) for lines
+    containing `pattern`, a plain string or, with `regex`, a Python regular expression.
+    `file_pattern` limits the search to files matching a glob, as in the glob tool.
+    Returns the path, line number and text of each matching line, up to `max_results`.
+    Binary files, hidden files and files over the search size limit are skipped.
+    """
+    try:
+        directory = resolve_directory(path)
+        expression = re.compile(pattern if regex else re.escape(pattern), re.MULTILINE | (re.IGNORECASE if ignore_case else 0))
+    except (ValueError, re.error) as e:
+        return {"error": str(e)}
+
+    in_scope = scope(directory, file_pattern)
+    max_results = max(1, min(max_results, MAX_ENTRIES))
+    if index:
+        candidates = index.candidates(required_literal(pattern) if regex else pattern, relative_prefix(directory))
+    else:
+        candidates = (
+            (relative, read_text(os.path.join(ROOT, relative), SEARCH_MAX_FILE_BYTES))
+            for relative, stat in walk_files(ROOT, directory)
+            if stat.st_size <= SEARCH_MAX_FILE_BYTES
+        )
+
+    matches, files_searched = [], 0
+    for relative, text in candidates:
+        if text is None or not in_scope(relative):
+            continue
+        files_searched += 1
+        for line_number, line in match_lines(text, expression):
+            matches.append({"path": os.path.join(ROOT, relative), "line": line_number, "text": line[:MAX_LINE_CHARS]})
+            if len(matches) > max_results:
+                break
+        if len(matches) > max_results:
+            break
+
+    return {
+        "pattern": pattern,
+        "matches": matches[:max_results],
+        "files_searched": files_searched,
+        "truncated": len(matches) > max_results,
+    }
+
+
+async def report_progress(ctx: Context, progress: int, total: int):
+    """
+    ctx.report_progress, but sent on the tool call's own response stream. In mcp 1.9.4
+    report_progress leaves out the request id, so on a stateless server the notification
+    goes to a standalone stream no client is listening on.
+    """
+    try:
+        meta = ctx.request_context.meta
+    except ValueError:
+        return  # Called outside an MCP request, e.g. hosted in process by the gateway, so no one is listening
+    if meta is None or meta.progressToken is None:
+        return
+    await ctx.request_context.session.send_progress_notification(
+        progress_token=meta.progressToken, progress=progress, total=total, related_request_id=ctx.request_id
+    )
+
+
+async def write_chunks(path: str, content: str, mode: str, ctx: Context) -> int:
+    """Writes `content` in CHUNK_SIZE pieces, reporting progress after each one. Returns the bytes written."""
+    data = content.encode("utf-8")
+    with open(path, mode) as f:
+        for start in range(0, len(data), CHUNK_SIZE):
+            f.write(data[start:start + CHUNK_SIZE])
+            await report_progress(ctx, min(start + CHUNK_SIZE, len(data)), len(data))
+    return len(data)
+
+
+@server.tool()
+async def write_file(path: str, content: str, ctx: Context) -> str:
     """Writes content to a file at the given path."""
     try:
-        with open(path, "w", encoding="utf-8") as f:
-            f.write(content)
+        await write_chunks(path, content, "wb", ctx)
         return f"Successfully wrote to {path}"
     except Exception as e:
         return f"An error occurred while writing: {e}"
 
 
+@server.tool()
+async def append_file(path: str, content: str, ctx: Context) -> str:
+    """Appends content to a file, creating it if needed. Large files can be written in several appends."""
+    try:
+        written = await write_chunks(path, content, "ab", ctx)
+        return f"Successfully appended {written} bytes to {path}"
+    except Exception as e:
+        return f"An error occurred while appending: {e}"
+
+
 if __name__ == "__main__":
+    if index:
+        index.refresh(force=True)
     server.run(transport="streamable-http")
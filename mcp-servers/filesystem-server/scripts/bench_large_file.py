@@ -0,0 +1,78 @@
+"""
+Reads a large file through the filesystem tools and reports time and peak RSS
+after each call. The tools run in-process through FastMCP's call_tool, including
+result serialization, so the numbers cover the server's side of a tools/call.
+
+Peak RSS is a high-water mark, so it stays flat only if no call loads the file.
+`--baseline` finally reads the whole file the way read_file used to, for comparison.
+
+Usage:
+    $ cd mcp-servers/filesystem-server
+    $ python scripts/bench_large_file.py [size in MB, default 1024] [--baseline]
+"""
+import asyncio
+import os
+import resource
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from filesystem import server  # noqa: E402
+
+LINE = b"x" * 99 + b"\n"
+
+
+def peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def create_file(path: str, size_mb: int):
+    block = LINE * (1024 * 1024 // len(LINE))
+    with open(path, "wb") as f:
+        written = 0
+        while written < size_mb * 1024 * 1024:
+            f.write(block)
+            written += len(block)
+
+
+async def timed(label: str, call):
+    started = time.perf_counter()
+    result = await call
+    elapsed = (time.perf_counter() - started) * 1000
+    chars = sum(len(content.text) for content in result)
+    print(f"  {label:<40} {elapsed:9.1f} ms  {chars:>10} chars  peak RSS {peak_rss_mb():7.1f} MB")
+
+
+async def main(size_mb: int, baseline: bool):
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "large.log")
+        create_file(path, size_mb)
+        size = os.path.getsize(path)
+        lines = size // len(LINE)
+        print(f"{size / 1024 / 1024:.0f} MB file, {lines} lines; peak RSS before: {peak_rss_mb():.1f} MB")
+
+        await timed("read_file (truncated)", server.call_tool("read_file", {"path": path}))
+        await timed("read_file_range, last 64 KB", server.call_tool(
+            "read_file_range", {"path": path, "offset": size - 65536, "length": 65536}))
+        await timed("read_lines, 100 lines mid-file", server.call_tool(
+            "read_lines", {"path": path, "start_line": lines // 2, "end_line": lines // 2 + 99}))
+        await timed("read_lines, 100 lines at the end", server.call_tool(
+            "read_lines", {"path": path, "start_line": lines - 99}))
+        await timed("tail_file, 100 lines", server.call_tool("tail_file", {"path": path, "lines": 100}))
+
+        if baseline:
+            def read_whole_file():
+                with open(path, "r", encoding="utf-8") as f:
+                    return f.read()
+
+            started = time.perf_counter()
+            content = read_whole_file()
+            elapsed = (time.perf_counter() - started) * 1000
+            print(f"  {'baseline: whole-file f.read()':<40} {elapsed:9.1f} ms  {len(content):>10} chars  "
+                  f"peak RSS {peak_rss_mb():7.1f} MB")
+
+
+if __name__ == "__main__":
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    asyncio.run(main(int(args[0]) if args else 1024, "--baseline" in sys.argv))
@@ -0,0 +1,58 @@
+"""
+Times the search and glob tools over a directory tree, walking the tree on every call
+and with the file index. The tools run in-process; repeated calls show the steady
+state, after the index was built and while its TTL has not expired.
+
+Usage:
+    $ cd mcp-servers/filesystem-server
+    $ python scripts/bench_search.py [directory, default: the Python standard library]
+"""
+import os
+import sys
+import sysconfig
+import time
+
+root = os.path.realpath(sys.argv[1] if len(sys.argv) > 1 else sysconfig.get_paths()["stdlib"])
+os.environ["FILESYSTEM_ROOT"] = root
+os.environ["FILESYSTEM_INDEX"] = ":memory:"
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import filesystem  # noqa: E402
+
+QUERIES = [
+    ("search, rare string", filesystem.search, {"pattern": "def __init_subclass__"}),
+    ("search, no match", filesystem.search, {"pattern": "no_such_identifier_anywhere"}),
+    ("search, regex", filesystem.search, {"pattern": r"class \w+Error\(", "regex": True}),
+    ("search, ignore case", filesystem.search, {"pattern": "todo", "ignore_case": True}),
+    ("glob, **/test_*.py", filesystem.glob, {"pattern": "**/test_*.py"}),
+]
+
+
+def timed(tool, arguments: dict, repeat: int = 3) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        tool(**arguments)
+    return (time.perf_counter() - started) * 1000 / repeat
+
+
+def main():
+    index = filesystem.index
+    started = time.perf_counter()
+    index.refresh(force=True)
+    print(f"{root}: {len(index.files)} files, index built in {time.perf_counter() - started:.1f} s")
+    started = time.perf_counter()
+    index.refresh(force=True)
+    print(f"refresh with nothing changed: {(time.perf_counter() - started) * 1000:.0f} ms\n")
+    index.ttl = float("inf")  # Refreshes are timed above; keep them out of the searches
+
+    print(f"  {'':<24} {'walk':>10} {'index':>10}")
+    for label, tool, arguments in QUERIES:
+        filesystem.index = None
+        walk = timed(tool, arguments)
+        filesystem.index = index
+        indexed = timed(tool, arguments)
+        print(f"  {label:<24} {walk:7.1f} ms {indexed:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
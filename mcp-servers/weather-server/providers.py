@@ -0,0 +1,167 @@
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+import csv
+import difflib
+import re
+import sqlite3
+import time
+import unicodedata
+
+# How similar (0-1) a city name must be to the query to be used as a fuzzy match
+FUZZY_CUTOFF = 0.8
+
+# Leading characters a fuzzy match must share with the query. Only names with that
+# prefix are compared, so a fuzzy lookup stays fast however large the dataset is.
+FUZZY_PREFIX_LENGTH = 2
+
+# Columns of a weather record, in the order providers store them
+FIELDS = ("city", "temperature", "humidity", "condition")
+
+
+def normalize(city: str) -> str:
+    """The lookup key of a city name: case-folded, without accents, punctuation or extra spaces."""
+    decomposed = unicodedata.normalize("NFKD", city.casefold())
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return " ".join(re.sub(r"[^\w]+", " ", stripped).split())
+
+
+def to_record(row) -> dict:
+    """A weather record as the tools return it, from a row in FIELDS order."""
+    return dict(zip(FIELDS, row))
+
+
+class WeatherProvider(ABC):
+    """
+    A source of weather records, looked up by normalized city name. Subclasses
+    implement `get` and `names_with_prefix`; `lookup` adds fuzzy matching on top.
+    """
+
+    @abstractmethod
+    def get(self, name: str) -> dict | None:
+        """The record of the city whose normalized name is `name`, if any."""
+
+    @abstractmethod
+    def names_with_prefix(self, prefix: str) -> list[str]:
+        """The normalized names starting with `prefix`."""
+
+    def lookup(self, city: str) -> dict | None:
+        """
+        The record of `city`, matched by normalized name. If no name matches exactly, the
+        closest name sharing its first letters is used, provided it is similar enough.
+        """
+        name = normalize(city)
+        record = self.get(name)
+        if record is None and len(name) >= FUZZY_PREFIX_LENGTH:
+            candidates = self.names_with_prefix(name[:FUZZY_PREFIX_LENGTH])
+            matches = difflib.get_close_matches(name, candidates, n=1, cutoff=FUZZY_CUTOFF)
+            if matches:
+                record = self.get(matches[0])
+        return record
+
+
+class InMemoryProvider(WeatherProvider):
+    """Records held in a dict, e.g. the built-in mock data or a CSV file loaded at startup."""
+
+    def __init__(self, rows):
+        self.rows: dict[str, tuple] = {}
+        for row in rows:
+            self.rows.setdefault(normalize(row[0]), tuple(row))  # The first of two same-named cities wins
+        self.names = sorted(self.rows)
+
+    @classmethod
+    def from_csv(cls, path: str) -> "InMemoryProvider":
+        """Loads a CSV file with a header row naming the columns city, temperature, humidity and condition."""
+        with open(path, newline="", encoding="utf-8") as f:
+            return cls(
+                (row["city"], int(row["temperature"]), int(row["humidity"]), row["condition"])
+                for row in csv.DictReader(f)
+            )
+
+    def get(self, name: str) -> dict | None:
+        row = self.rows.get(name)
+        return to_record(row) if row else None
+
+    def names_with_prefix(self, prefix: str) -> list[str]:
+        start = bisect_left(self.names, prefix)
+        end = bisect_left(self.names, prefix[:-1] + chr(ord(prefix[-1]) + 1))
+        return self.names[start:end]
+
+
+class SqliteProvider(WeatherProvider):
+    """
+    Records in an SQLite database, read on demand, so a large city table does not have
+    to fit in memory. Create the database with `build_database`.
+    """
+
+    def __init__(self, path: str):
+        self.db = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+
+    def get(self, name: str) -> dict | None:
+        row = self.db.execute(
+            "SELECT city, temperature, humidity, condition FROM weather WHERE name = ?", (name,)
+        ).fetchone()
+        return to_record(row) if row else None
+
+    def names_with_prefix(self, prefix: str) -> list[str]:
+        end = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        return [name for name, in self.db.execute("SELECT name FROM weather WHERE name >= ? AND name < ?", (prefix, end))]
+
+
+def build_database(csv_path: str, database_path: str):
+    """Builds a database for SqliteProvider from a CSV file in the format InMemoryProvider.from_csv reads."""
+    provider = InMemoryProvider.from_csv(csv_path)
+    db = sqlite3.connect(database_path)
+    with db:
+        db.execute("DROP TABLE IF EXISTS weather")
+        db.execute(
+            "CREATE TABLE weather (name TEXT PRIMARY KEY, city TEXT, temperature INTEGER, humidity INTEGER, condition TEXT)"
+        )
+        db.executemany("INSERT INTO weather VALUES (?, ?, ?, ?, ?)", ((name, *row) for name, row in provider.rows.items()))
+    db.close()
+
+
+class CachedProvider(WeatherProvider):
+    """
+    Caches another provider's lookups, misses included, for `ttl` seconds. Holds up to
+    `max_entries` cities; beyond that the oldest entry is dropped.
+    """
+
+    def __init__(self, provider: WeatherProvider, ttl: float, max_entries: int):
+        self.provider = provider
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries: dict[str, tuple[float, dict | None]] = {}  # query -> (expires at, record), oldest first
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, name: str) -> dict | None:
+        return self.provider.get(name)
+
+    def names_with_prefix(self, prefix: str) -> list[str]:
+        return self.provider.names_with_prefix(prefix)
+
+    def lookup(self, city: str) -> dict | None:
+        key = normalize(city)
+        entry = self.entries.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        record = self.provider.lookup(city)
+        self.entries.pop(key, None)
+        self.entries[key] = (time.monotonic() + self.ttl, record)
+        if len(self.entries) > self.max_entries:
+            del self.entries[next(iter(self.entries))]
+        return record
+
+
+def load_provider(data: str | None, mock_data: dict[str, dict]) -> WeatherProvider:
+    """The provider for `data`: an SQLite database (.db, .sqlite, .sqlite3), a CSV file, or `mock_data` if unset."""
+    if not data:
+        return InMemoryProvider(
+            (city.title(), weather["temperature"], weather["humidity"], weather["condition"])
+            for city, weather in mock_data.items()
+        )
+    if data.endswith((".db", ".sqlite", ".sqlite3")):
+        return SqliteProvider(data)
+    return InMemoryProvider.from_csv(data)
@@ -0,0 +1,91 @@
+"""
+Times city lookups in a synthetic dataset of `count` cities, loaded from CSV into
+memory and read from SQLite, with and without the cache in front. Also compares
+looking up 100 cities with one get_current_weather call each against one
+get_weather_many call, both in-process.
+
+Usage:
+    $ cd mcp-servers/weather-server
+    $ python scripts/bench_weather.py [count, default 300000]
+"""
+import asyncio
+import csv
+import os
+import random
+import string
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from providers import CachedProvider, InMemoryProvider, SqliteProvider, build_database  # noqa: E402
+
+LOOKUPS = 10_000
+
+
+def city_names(count: int) -> list[str]:
+    names = set()
+    while len(names) < count:
+        words = ["".join(random.choices(string.ascii_lowercase, k=random.randint(4, 10))) for _ in range(random.randint(1, 2))]
+        names.add(" ".join(words).title())
+    return sorted(names)
+
+
+def misspell(name: str) -> str:
+    """Replaces one letter after the first two, like a typo would."""
+    position = random.randint(2, len(name) - 1)
+    return name[:position] + random.choice(string.ascii_lowercase) + name[position + 1:]
+
+
+def timed(label: str, provider, queries: list[str]):
+    started = time.perf_counter()
+    found = sum(provider.lookup(query) is not None for query in queries)
+    elapsed = time.perf_counter() - started
+    print(f"  {label:<36} {elapsed * 1e6 / len(queries):8.1f} µs/lookup  {found}/{len(queries)} found")
+
+
+def main(count: int):
+    names = city_names(count)
+    exact = random.choices(names, k=LOOKUPS)
+    fuzzy = [misspell(name) for name in exact[:1000]]
+    with tempfile.TemporaryDirectory() as directory:
+        csv_path, database_path = os.path.join(directory, "cities.csv"), os.path.join(directory, "cities.db")
+        with open(csv_path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["city", "temperature", "humidity", "condition"])
+            writer.writerows((name, random.randint(-20, 40), random.randint(10, 100), "sunny") for name in names)
+        build_database(csv_path, database_path)
+
+        started = time.perf_counter()
+        in_memory = InMemoryProvider.from_csv(csv_path)
+        print(f"{count} cities; CSV loaded in {time.perf_counter() - started:.1f} s")
+        sqlite = SqliteProvider(database_path)
+
+        for label, provider in (("CSV in memory", in_memory), ("SQLite", sqlite)):
+            timed(f"{label}, exact", provider, exact)
+            timed(f"{label}, misspelled", provider, fuzzy)
+            cached = CachedProvider(provider, ttl=60, max_entries=100_000)
+            timed(f"{label}, cached, first lookups", cached, exact)
+            timed(f"{label}, cached, repeated", cached, exact)
+
+    asyncio.run(compare_tool_calls())
+
+
+async def compare_tool_calls():
+    os.environ["WEATHER_DATA"] = ""
+    import weather
+
+    cities = ["London", "Tokyo", "New York", "Lodnon", "Atlantis"] * 20
+    started = time.perf_counter()
+    for city in cities:
+        await weather.server.call_tool("get_current_weather", {"city": city})
+    single = time.perf_counter() - started
+    started = time.perf_counter()
+    await weather.server.call_tool("get_weather_many", {"cities": cities})
+    print(f"\n100 cities: {single * 1000:.1f} ms in 100 get_current_weather calls, "
+          f"{(time.perf_counter() - started) * 1000:.1f} ms in one get_weather_many call "
+          "(in-process, without the HTTP round trips)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 300_000)
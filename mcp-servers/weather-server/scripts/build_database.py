@@ -0,0 +1,20 @@
+"""
+Converts a CSV weather dataset into an SQLite database for WEATHER_DATA.
+
+The CSV needs a header row naming the columns city, temperature, humidity and condition.
+
+Usage:
+    $ cd mcp-servers/weather-server
+    $ python scripts/build_database.py cities.csv cities.db
+    $ WEATHER_DATA=cities.db python weather.py
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from providers import build_database  # noqa: E402
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        sys.exit(__doc__)
+    build_database(sys.argv[1], sys.argv[2])
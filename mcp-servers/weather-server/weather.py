@@ -1,5 +1,7 @@
 from mcp.server.fastmcp import FastMCP
+from providers import CachedProvider, load_provider
 from typing import Dict
+import os
 
 # Mock weather data for testing
 MOCK_WEATHER_DATA: Dict[str, Dict] = {
@@ -8,6 +10,19 @@ MOCK_WEATHER_DATA: Dict[str, Dict] = {
     "tokyo": {"temperature": 25, "humidity": 70, "condition": "sunny"},
 }
 
+# Where the weather data comes from: a CSV file or an SQLite database (see providers.py).
+# Without it, the mock data above is served.
+WEATHER_DATA = os.getenv("WEATHER_DATA")
+
+# How long looked-up cities are cached (seconds), and how many
+CACHE_TTL = float(os.getenv("WEATHER_CACHE_TTL", 60))
+CACHE_MAX_ENTRIES = int(os.getenv("WEATHER_CACHE_MAX_ENTRIES", 100_000))
+
+# Most cities one get_weather_many call may ask for
+MAX_CITIES_PER_CALL = 1000
+
+provider = CachedProvider(load_provider(WEATHER_DATA, MOCK_WEATHER_DATA), CACHE_TTL, CACHE_MAX_ENTRIES)
+
 # Create an MCP server as a global variable
 server = FastMCP("Weather Info Server", host="127.0.0.1", port=3002, stateless_http=True,)
 print("settings: ", server.settings)
@@ -16,33 +31,48 @@ print("streamable app: ", server.streamable_http_app())
 @server.tool()
 def get_current_weather(city: str) -> Dict[str, str | int]:
     """Retrieve current weather data for a specified city.
-    
+
     Args:
-        city: Name of the city (e.g., 'New York', 'London').
-    
+        city: Name of the city (e.g., 'New York', 'London'). Close misspellings are matched too.
+
     Returns:
-        A dictionary containing temperature (Celsius), humidity (%), and condition.
+        A dictionary containing the matched city name, temperature (Celsius), humidity (%), and condition.
         If the city is not found, returns an error message.
     """
-    city = city.lower().strip()
-    if city not in MOCK_WEATHER_DATA:
-        return {"error": f"No weather data available for city '{city}'"}
-    return MOCK_WEATHER_DATA[city]
+    weather = provider.lookup(city)
+    if weather is None:
+        return {"error": f"No weather data available for city '{city.lower().strip()}'"}
+    return weather
 
 @server.tool()
 def get_temperature(city: str) -> int | str:
     """Retrieve the current temperature for a specified city.
-    
+
     Args:
-        city: Name of the city (e.g., 'New York', 'London').
-    
+        city: Name of the city (e.g., 'New York', 'London'). Close misspellings are matched too.
+
     Returns:
         The temperature in Celsius, or an error message if the city is not found.
     """
-    city = city.lower().strip()
-    if city not in MOCK_WEATHER_DATA:
-        return f"No temperature data available for city '{city}'"
-    return MOCK_WEATHER_DATA[city]["temperature"]
+    weather = provider.lookup(city)
+    if weather is None:
+        return f"No temperature data available for city '{city.lower().strip()}'"
+    return weather["temperature"]
+
+@server.tool()
+def get_weather_many(cities: list[str]) -> Dict[str, Dict[str, str | int]]:
+    """Retrieve current weather data for several cities in one call.
+
+    Args:
+        cities: Names of the cities (e.g., ['New York', 'London']), at most 1000.
+
+    Returns:
+        A dictionary mapping each requested name to its weather data, as returned by
+        get_current_weather, or to an error message if the city is not found.
+    """
+    if len(cities) > MAX_CITIES_PER_CALL:
+        raise ValueError(f"At most {MAX_CITIES_PER_CALL} cities can be looked up per call")
+    return {city: get_current_weather(city) for city in cities}
 
 if __name__ == "__main__":
     print("Starting Weather Info Server...")